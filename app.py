@@ -1,28 +1,52 @@
 import logging
 import os
 import sys
-from typing import TYPE_CHECKING
+from typing import Optional
 
 from flask import Flask
 
 from config import (
     DEFAULT_PORT,
-    load_config
+    load_config,
+    load_projects
 )
-from routes import home, test, webhook
-from services import RenderService, ProjectService
-
-if TYPE_CHECKING:
-    from services.project_service import ProjectService
-    from services.render_service import RenderService
+from config.constants import (
+    JOB_JOURNAL_PATH,
+    SERVICE_CACHE_PATH,
+    RATE_LIMIT_PATH,
+    NOTIFY_OUTBOX,
+    NOTIFY_STATE_PATH,
+    NOTIFY_CONFIG_FILE,
+    PROJECTS_FILE
+)
+from routes import home, test, webhook, job_status, notify_status, notify_messages, notify_message, metrics
+from services import (
+    RenderService,
+    DeployJournal,
+    ProjectService,
+    JobJournal,
+    JobDispatcher,
+    NotifyOutbox,
+    OutboxDispatcher,
+    ServiceCache
+)
+from services.poll_policy import BuildHistory, PollPolicy
+from services.rate_limiter import RenderRateLimiter
+from services.render_client import RenderClient
+from utils import notify, startup_profile
+from utils.config_reloader import ConfigReloader
 
 # 定义全局 logger
 logger: logging.Logger = None
 
 
 class FlaskApp(Flask):
-    project_service: 'ProjectService'
-    render_service: 'RenderService'
+    project_service: ProjectService
+    render_service: RenderService
+    job_journal: JobJournal
+    job_dispatcher: JobDispatcher
+    outbox_dispatcher: Optional[OutboxDispatcher]
+    config_reloader: ConfigReloader
 
 
 def configure_logging() -> logging.Logger:
@@ -68,6 +92,7 @@ def configure_logging() -> logging.Logger:
 def create_app() -> FlaskApp:
     """创建并配置 Flask 应用"""
     global logger
+    startup_profile.mark('create_app')
 
     # 创建应用实例
     app = FlaskApp(__name__)
@@ -87,13 +112,49 @@ def create_app() -> FlaskApp:
         sys.exit(1)
 
     # 初始化服务
-    app.render_service = RenderService(app.config['BASE_URL'])
-    app.project_service = ProjectService(app.config['PROJECT_CONFIG'])
+    app.outbox_dispatcher = OutboxDispatcher(NotifyOutbox(NOTIFY_STATE_PATH)) if NOTIFY_OUTBOX else None
+    app.render_service = RenderService(
+        app.config['BASE_URL'],
+        service_cache=ServiceCache(SERVICE_CACHE_PATH),
+        client=RenderClient(rate_limiter=RenderRateLimiter(RATE_LIMIT_PATH)),
+        poll_policy=PollPolicy(BuildHistory(SERVICE_CACHE_PATH)),
+        outbox_dispatcher=app.outbox_dispatcher,
+        deploy_journal=DeployJournal(JOB_JOURNAL_PATH)
+    )
+    app.project_service = ProjectService(
+        app.config['PROJECT_CONFIG'],
+        loader=load_projects if PROJECTS_FILE else None
+    )
+    # 配置了项目或推送渠道配置文件时，文件变化后各 worker 自行重新加载，不需要重启 worker
+    app.config_reloader = ConfigReloader()
+    if PROJECTS_FILE:
+        app.config_reloader.watch('项目配置', PROJECTS_FILE, app.project_service.reload)
+    if NOTIFY_CONFIG_FILE:
+        app.config_reloader.watch('推送渠道配置', NOTIFY_CONFIG_FILE, notify.reload_config)
+    app.config_reloader.start()
+    # 接管上次运行（或已退出的 worker）未跟踪完的部署
+    app.render_service.deploy_poller.resume(app.project_service)
+    app.job_journal = JobJournal(JOB_JOURNAL_PATH)
+    app.job_dispatcher = JobDispatcher(app.job_journal, app.render_service, app.project_service)
+    # 启动后台分发器，重放上次未完成的任务
+    app.job_dispatcher.start()
+    if app.outbox_dispatcher:
+        # 启动通知投递器，继续投递上次未完成的通知
+        app.outbox_dispatcher.start()
 
     # 注册路由
     app.add_url_rule('/', 'home', home)
     app.add_url_rule('/test', 'test', test)
     app.add_url_rule('/webhook', 'webhook', webhook, methods=['POST'])
+    app.add_url_rule('/jobs/<job_id>', 'job_status', job_status)
+    app.add_url_rule('/notify/status', 'notify_status', notify_status)
+    app.add_url_rule('/notify/messages', 'notify_messages', notify_messages)
+    app.add_url_rule('/notify/messages/<message_id>', 'notify_message', notify_message)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+    # 第一个请求到达时输出 worker 的冷启动耗时
+    app.before_request(startup_profile.first_request)
+    startup_profile.mark('app_ready')
 
     return app
 
@@ -0,0 +1 @@
+"""压测工具：本地模拟的 Render API 和 webhook 压测脚本"""
@@ -0,0 +1,324 @@
+"""
+本地模拟的 Render API，用于压测和离线调试
+
+实现 RenderService 用到的接口：
+- GET  /services
+- GET  /services/{id}/custom-domains
+- POST /services/{id}/deploys
+- GET  /services/{id}/deploys
+- GET  /services/{id}/deploys/{deploy_id}
+
+另外提供 GET /_stats 查看各接口的调用次数和进行中的部署数，POST /_reset 清空统计。
+
+用法:
+    python -m bench.mock_render --port 18080 --latency 0.05 --error-rate 0.01 --build-seconds 20
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# 部署状态的变化顺序，以及各阶段占总构建时间的比例
+STAGES = (
+    ('created', 0.05),
+    ('build_in_progress', 0.75),
+    ('update_in_progress', 0.2)
+)
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class MockRender:
+    """模拟 Render API 的状态：服务、部署和调用统计"""
+
+    def __init__(
+            self,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            build_seconds: float = 10.0,
+            fail_rate: float = 0.0,
+            rate_limit: float = 0.0,
+            services_per_key: int = 1,
+            custom_domains: int = 0
+    ):
+        """
+        Args:
+            latency: 每个请求的基础延迟（秒）
+            jitter: 延迟的随机抖动上限（秒）
+            error_rate: 随机返回 503 的概率
+            build_seconds: 一次部署从创建到 live 的时间（秒）
+            fail_rate: 部署以 build_failed 结束的概率
+            rate_limit: 每个 API 密钥每分钟允许的请求数，超过时返回 429，0 表示不限制
+            services_per_key: 每个 API 密钥下的服务数量
+            custom_domains: 每个服务的已验证自定义域名数量
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.build_seconds = build_seconds
+        self.fail_rate = fail_rate
+        self.rate_limit = rate_limit
+        self.services_per_key = services_per_key
+        self.custom_domains = custom_domains
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._deploys: Dict[str, Dict[str, Any]] = {}
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self.calls: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = {}
+            self._windows = {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            active = sum(1 for d in self._deploys.values() if self._status(d, now) not in ('live', 'build_failed'))
+            return {'calls': dict(self.calls), 'total': sum(self.calls.values()), 'active_deploys': active}
+
+    @staticmethod
+    def service_id(api_key: str, index: int) -> str:
+        return f"srv-{hashlib.sha256(api_key.encode()).hexdigest()[:12]}-{index}"
+
+    def services(self, api_key: str):
+        return [
+            {
+                'cursor': self.service_id(api_key, i),
+                'service': {
+                    'id': self.service_id(api_key, i),
+                    'name': f"{api_key}-{i}",
+                    'suspended': 'not_suspended',
+                    'suspenders': [],
+                    'serviceDetails': {'url': f"https://{api_key}-{i}.onrender.com"}
+                }
+            }
+            for i in range(self.services_per_key)
+        ]
+
+    def domains(self, service_id: str):
+        return [
+            {'customDomain': {'name': f"d{i}.{service_id}.example.com", 'verificationStatus': 'verified'}}
+            for i in range(self.custom_domains)
+        ]
+
+    def create_deploy(self, service_id: str) -> Dict[str, Any]:
+        deploy_id = f"dep-{next(self._seq):08d}"
+        deploy = {
+            'id': deploy_id,
+            'serviceId': service_id,
+            'createdAt': time.time(),
+            'fails': random.random() < self.fail_rate
+        }
+        with self._lock:
+            self._deploys[deploy_id] = deploy
+        return self.render_deploy(deploy)
+
+    def _status(self, deploy: Dict[str, Any], now: float) -> str:
+        elapsed = (now - deploy['createdAt']) / max(self.build_seconds, 1e-6)
+        for status, share in STAGES:
+            if elapsed < share:
+                return status
+            elapsed -= share
+        return 'build_failed' if deploy['fails'] else 'live'
+
+    def render_deploy(self, deploy: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        status = self._status(deploy, now)
+        data = {
+            'id': deploy['id'],
+            'status': status,
+            'trigger': 'api',
+            'createdAt': _iso(deploy['createdAt']),
+            'updatedAt': _iso(now)
+        }
+        if status in ('live', 'build_failed'):
+            data['finishedAt'] = _iso(deploy['createdAt'] + self.build_seconds)
+        return data
+
+    def get_deploy(self, deploy_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            deploy = self._deploys.get(deploy_id)
+        return self.render_deploy(deploy) if deploy else None
+
+    def list_deploys(self, service_id: str, limit: int):
+        with self._lock:
+            deploys = [d for d in self._deploys.values() if d['serviceId'] == service_id]
+        deploys.sort(key=lambda d: d['createdAt'], reverse=True)
+        return [{'deploy': self.render_deploy(d), 'cursor': d['id']} for d in deploys[:limit]]
+
+    def record(self, endpoint: str, api_key: str) -> Optional[float]:
+        """记录一次调用，超出限流时返回 Retry-After 秒数"""
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            if self.rate_limit <= 0:
+                return None
+            now = time.time()
+            start, count = self._windows.get(api_key, (now, 0))
+            if now - start >= 60:
+                start, count = now, 0
+            count += 1
+            self._windows[api_key] = (start, count)
+            if count > self.rate_limit:
+                return max(start + 60 - now, 1)
+        return None
+
+
+class MockRenderHandler(BaseHTTPRequestHandler):
+    mock: MockRender = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code: int, body=None, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body if body is not None else {}).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _api_key(self) -> Optional[str]:
+        auth = self.headers.get('Authorization', '')
+        return auth[7:] if auth.startswith('Bearer ') else None
+
+    def _route(self, method: str) -> None:
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        query = parse_qs(url.query)
+        mock = self.mock
+
+        if path == '/_stats':
+            return self._send(200, mock.stats())
+        if path == '/_reset':
+            mock.reset()
+            return self._send(200, {'ok': True})
+
+        api_key = self._api_key()
+        if not api_key:
+            return self._send(401, {'message': 'unauthorized'})
+
+        endpoint = 'custom-domains' if path.endswith('/custom-domains') else \
+            'deploys' if '/deploys' in path else 'services'
+        retry_after = mock.record(f"{method} {endpoint}", api_key)
+
+        delay = mock.latency + random.uniform(0, mock.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if retry_after is not None:
+            return self._send(429, {'message': 'rate limited'}, {'Retry-After': str(int(retry_after))})
+        if random.random() < mock.error_rate:
+            return self._send(503, {'message': 'service unavailable'})
+
+        if method == 'GET' and path == '/services':
+            if query.get('suspended') == ['suspended']:
+                return self._send(200, [])
+            return self._send(200, mock.services(api_key))
+
+        match = re.fullmatch(r'/services/([^/]+)/custom-domains', path)
+        if method == 'GET' and match:
+            return self._send(200, mock.domains(match.group(1)))
+
+        match = re.fullmatch(r'/services/([^/]+)/deploys', path)
+        if match and method == 'POST':
+            return self._send(201, mock.create_deploy(match.group(1)))
+        if match and method == 'GET':
+            limit = int(query.get('limit', ['20'])[0])
+            return self._send(200, mock.list_deploys(match.group(1), limit))
+
+        match = re.fullmatch(r'/services/([^/]+)/deploys/([^/]+)', path)
+        if match and method == 'GET':
+            deploy = mock.get_deploy(match.group(2))
+            return self._send(200, deploy) if deploy else self._send(404, {'message': 'not found'})
+
+        return self._send(404, {'message': 'not found'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self._route('POST')
+
+
+def start_server(mock: MockRender, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """
+    在后台线程启动模拟服务器
+
+    Args:
+        mock: 模拟状态
+        host: 监听地址
+        port: 监听端口，0 表示随机端口
+
+    Returns:
+        ThreadingHTTPServer: 已启动的服务器，server_address 中包含实际端口
+    """
+    handler = type('Handler', (MockRenderHandler,), {'mock': mock})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='MockRender', daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """添加模拟服务器的命令行参数"""
+    parser.add_argument('--latency', type=float, default=0.02, help='每个请求的基础延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.01, help='延迟的随机抖动上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='随机返回 503 的概率')
+    parser.add_argument('--build-seconds', type=float, default=10.0, help='部署从创建到 live 的时间(秒)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='部署失败的概率')
+    parser.add_argument('--mock-rate-limit', type=float, default=0.0, help='每个 API 密钥每分钟请求上限，0 不限制')
+    parser.add_argument('--services-per-key', type=int, default=1, help='每个 API 密钥下的服务数量')
+    parser.add_argument('--custom-domains', type=int, default=0, help='每个服务的自定义域名数量')
+
+
+def mock_from_args(args: argparse.Namespace) -> MockRender:
+    """根据命令行参数创建模拟状态"""
+    return MockRender(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        build_seconds=args.build_seconds,
+        fail_rate=args.fail_rate,
+        rate_limit=args.mock_rate_limit,
+        services_per_key=args.services_per_key,
+        custom_domains=args.custom_domains
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地模拟的 Render API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(mock_from_args(args), args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"模拟 Render API 已启动: http://{host}:{port}，设置 RENDER_API_URL=http://{host}:{port} 使用")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+webhook 压测
+
+启动模拟 Render API 和 gunicorn（使用 config/gunicorn_config.py），按指定并发向 /webhook 发送请求，
+输出吞吐量、延迟分位数、每次 webhook 产生的 Render API 调用数和 gunicorn 进程的峰值内存。
+
+用法:
+    python -m bench.run --requests 500 --concurrency 16 --projects 20 --workers 2
+    python -m bench.run --json result.json   # 同时把结果写入文件，便于对比
+    python -m bench.run --profile-startup    # 同时输出模块导入耗时和各 worker 从 fork 到第一个请求的耗时
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import requests
+
+from bench.mock_render import add_arguments, mock_from_args, start_server
+from bench import startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET_TOKEN = 'bench-secret-token'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class RssSampler:
+    """定期采样 gunicorn 主进程及其 worker 的 RSS 总和，记录峰值（依赖 Linux 的 /proc）"""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            total = _rss_kb(self.pid) + sum(_rss_kb(child) for child in _children(self.pid))
+            self.peak_kb = max(self.peak_kb, total)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def start_gunicorn(args: argparse.Namespace, render_url: str, state_dir: str) -> subprocess.Popen:
+    """以压测配置启动 gunicorn"""
+    env = dict(os.environ)
+    env.update({
+        'SECRET_TOKEN': SECRET_TOKEN,
+        'RENDER_API_URL': render_url,
+        'STATE_DIR': state_dir,
+        'PORT': str(args.port),
+        'MAX_WORKERS': str(args.workers),
+        'DEPLOY_INTERVAL': str(args.deploy_interval),
+        'DEPLOY_POLL_MIN_INTERVAL': str(args.poll_interval),
+        'HITOKOTO': 'false',
+        'PYTHONPATH': ROOT
+    })
+    if args.async_mode:
+        env['WEBHOOK_ASYNC_MODE'] = 'true'
+    for i in range(args.projects):
+        env[f'PROJECT__bench{i}__API_KEY'] = f'bench-key-{i}'
+        env[f'PROJECT__bench{i}__SERVICE_NAME'] = f'bench-key-{i}-0'
+
+    log = open(os.path.join(state_dir, 'gunicorn.log'), 'w')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'config/gunicorn_config.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+    )
+
+
+def wait_ready(base: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{base}/', timeout=1).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn 启动超时，请查看日志')
+
+
+def run_load(base: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """按并发发送 webhook 请求，返回延迟和状态码统计"""
+    local = threading.local()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def fire(i: int) -> None:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        project = f'bench{i % args.projects}'
+        payload = {'push_data': {'tag': f'v{i}'}, 'repository': {'repo_name': f'bench/{project}'}}
+        start = time.perf_counter()
+        try:
+            response = session.post(
+                f'{base}/webhook', params={'token': SECRET_TOKEN, 'project': project}, json=payload, timeout=60
+            )
+            status = str(response.status_code)
+        except requests.RequestException:
+            status = 'error'
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(fire, range(args.requests)))
+    duration = time.perf_counter() - start
+
+    return {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'duration_seconds': round(duration, 3),
+        'requests_per_second': round(args.requests / duration, 2) if duration else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2) if latencies else 0.0
+        },
+        'status_codes': statuses
+    }
+
+
+def wait_settled(mock, timeout: float) -> float:
+    """等待所有部署结束（状态轮询随之停止），返回等待的秒数"""
+    start = time.time()
+    while time.time() - start < timeout and mock.stats()['active_deploys'] > 0:
+        time.sleep(0.5)
+    # 留出最后一次轮询和通知的时间
+    time.sleep(1)
+    return time.time() - start
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    latency = result['latency_ms']
+    render = result['render_api']
+    print()
+    print('=' * 60)
+    print(f"请求数 {result['requests']}，并发 {result['concurrency']}，耗时 {result['duration_seconds']} 秒")
+    print(f"吞吐量: {result['requests_per_second']} req/s")
+    print(f"延迟(ms): p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"状态码: {result['status_codes']}")
+    print(f"Render API 调用: 压测期间 {render['during_load']}，部署结束后共 {render['total']}，"
+          f"平均每次 webhook {render['per_webhook']}")
+    print(f"Render API 调用明细: {render['calls']}")
+    print(f"gunicorn 峰值 RSS: {result['peak_rss_mb']} MB")
+    print('=' * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='webhook 压测')
+    parser.add_argument('--requests', type=int, default=200, help='webhook 请求总数')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发数')
+    parser.add_argument('--projects', type=int, default=10, help='项目数量，请求按项目轮流发送')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker 数量')
+    parser.add_argument('--port', type=int, default=18600, help='gunicorn 监听端口')
+    parser.add_argument('--deploy-interval', type=int, default=0, help='DEPLOY_INTERVAL，0 表示不做防抖')
+    parser.add_argument('--poll-interval', type=float, default=1, help='DEPLOY_POLL_MIN_INTERVAL')
+    parser.add_argument('--async-mode', action='store_true', help='启用 WEBHOOK_ASYNC_MODE')
+    parser.add_argument('--settle-timeout', type=float, default=120, help='等待部署全部结束的最长时间(秒)')
+    parser.add_argument('--json', help='把结果写入指定的 JSON 文件')
+    parser.add_argument('--profile-startup', action='store_true', help='输出模块导入耗时和 worker 启动耗时')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    mock = mock_from_args(args)
+    server = start_server(mock)
+    render_url = f'http://127.0.0.1:{server.server_address[1]}'
+    base = f'http://127.0.0.1:{args.port}'
+    state_dir = tempfile.mkdtemp(prefix='docker-hooks-bench-')
+
+    process: Optional[subprocess.Popen] = None
+    try:
+        process = start_gunicorn(args, render_url, state_dir)
+        wait_ready(base)
+        mock.reset()
+
+        sampler = RssSampler(process.pid)
+        sampler.start()
+        result = run_load(base, args)
+        during_load = mock.stats()['total']
+        result['settle_seconds'] = round(wait_settled(mock, args.settle_timeout), 1)
+        sampler.stop()
+
+        stats = mock.stats()
+        result['render_api'] = {
+            'during_load': during_load,
+            'total': stats['total'],
+            'per_webhook': round(stats['total'] / args.requests, 2) if args.requests else 0.0,
+            'calls': stats['calls'],
+            'unfinished_deploys': stats['active_deploys']
+        }
+        result['peak_rss_mb'] = round(sampler.peak_kb / 1024, 1)
+        result['workers'] = args.workers
+        if args.profile_startup:
+            imports = startup.summarize_imports(startup.profile_imports())
+            result['startup'] = {
+                'import_ms': imports['total_ms'],
+                'workers': startup.parse_worker_startup(os.path.join(state_dir, 'gunicorn.log'))
+            }
+
+        print_report(result)
+        if args.profile_startup:
+            startup.print_imports(imports)
+            startup.print_workers(result['startup']['workers'])
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+    finally:
+        if process is not None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+        server.shutdown()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+启动耗时分析
+
+- 用 `python -X importtime` 导入 app，统计各模块的导入耗时（自身耗时和包含子模块的累计耗时）
+- 从 gunicorn 日志中解析各 worker 输出的「worker 启动耗时」（fork 到第一个请求）
+
+用法:
+    python -m bench.startup --top 20
+    python -m bench.run --profile-startup   # 压测时同时输出 worker 的启动耗时
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import shutil
+from typing import Dict, Any, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import time:       self [us] |  cumulative | imported package
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+_WORKER_LINE = re.compile(r'worker 启动耗时: pid=(\d+), (.*)$')
+_PHASE = re.compile(r'(\w+)=(\d+)ms')
+
+
+def profile_imports(env: Optional[Dict[str, str]] = None, module: str = 'app') -> List[Dict[str, Any]]:
+    """
+    在子进程中导入模块并统计各模块的导入耗时
+
+    Args:
+        env: 子进程的额外环境变量
+        module: 要导入的模块
+
+    Returns:
+        List[Dict[str, Any]]: 每个模块的 module、depth、self_ms、cumulative_ms，按导入顺序排列
+    """
+    state_dir = tempfile.mkdtemp(prefix='docker-hooks-startup-')
+    child_env = dict(os.environ)
+    child_env.update({
+        'SECRET_TOKEN': 'startup-profile-token',
+        'PROJECT__startup__API_KEY': 'startup-key',
+        'PROJECT__startup__SERVICE_NAME': 'startup',
+        'STATE_DIR': state_dir,
+        'PYTHONPATH': ROOT
+    })
+    child_env.update(env or {})
+    try:
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=ROOT, env=child_env, capture_output=True, text=True, timeout=120
+        )
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+    if completed.returncode != 0:
+        output = '\n'.join(line for line in completed.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f'导入 {module} 失败: {output[-2000:]}')
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                'module': name,
+                'depth': len(indent) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000
+            })
+    return modules
+
+
+def summarize_imports(modules: List[Dict[str, Any]], top: int = 15) -> Dict[str, Any]:
+    """
+    汇总导入耗时
+
+    Args:
+        modules: profile_imports 的结果
+        top: 输出自身耗时最高的模块数
+
+    Returns:
+        Dict[str, Any]: total_ms 为顶层模块的累计耗时之和，top 为自身耗时最高的模块，
+        project 为本项目各模块的累计耗时
+    """
+    total = sum(item['cumulative_ms'] for item in modules if item['depth'] == 0)
+    local = ('app', 'config', 'routes', 'services', 'utils')
+    return {
+        'total_ms': round(total, 1),
+        'top': sorted(modules, key=lambda item: item['self_ms'], reverse=True)[:top],
+        'project': [
+            item for item in modules if item['module'].split('.')[0] in local
+        ]
+    }
+
+
+def parse_worker_startup(log_path: str) -> List[Dict[str, Any]]:
+    """
+    从 gunicorn 日志解析各 worker 的启动耗时
+
+    Args:
+        log_path: 日志文件路径
+
+    Returns:
+        List[Dict[str, Any]]: 每个 worker 的 pid 和各阶段耗时（毫秒）
+    """
+    workers = []
+    try:
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = _WORKER_LINE.search(line)
+                if match:
+                    phases = {name: int(ms) for name, ms in _PHASE.findall(match.group(2))}
+                    workers.append({'pid': int(match.group(1)), **phases})
+    except OSError:
+        pass
+    return workers
+
+
+def print_imports(summary: Dict[str, Any]) -> None:
+    print(f"导入 app 总耗时: {summary['total_ms']} ms")
+    print('自身耗时最高的模块:')
+    for item in summary['top']:
+        print(f"  {item['self_ms']:8.1f} ms  (累计 {item['cumulative_ms']:8.1f} ms)  {item['module']}")
+    print('项目模块累计耗时:')
+    for item in summary['project']:
+        print(f"  {item['cumulative_ms']:8.1f} ms  {'  ' * item['depth']}{item['module']}")
+
+
+def print_workers(workers: List[Dict[str, Any]]) -> None:
+    if not workers:
+        print('未在 gunicorn 日志中找到 worker 启动耗时')
+        return
+    print('worker 启动耗时 (ms):')
+    for worker in workers:
+        phases = '  '.join(f'{name} {ms}' for name, ms in worker.items() if name != 'pid')
+        print(f"  pid {worker['pid']}: {phases}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时分析')
+    parser.add_argument('--top', type=int, default=15, help='输出自身耗时最高的模块数')
+    parser.add_argument('--module', default='app', help='要导入的模块')
+    parser.add_argument('--log', help='gunicorn 日志文件，解析其中各 worker 的启动耗时')
+    args = parser.parse_args()
+
+    print_imports(summarize_imports(profile_imports(module=args.module), args.top))
+    if args.log:
+        print()
+        print_workers(parse_worker_startup(args.log))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from .constants import *
-from .settings import load_config
+from .settings import load_config, load_projects
 
 __all__ = [
     'LOG_FORMAT',
@@ -7,7 +7,6 @@ __all__ = [
     'DEFAULT_PORT',
     'BASE_API_URL',
     'DEPLOY_INTERVAL',
-    'MAX_DEPLOY_RETRIES',
-    'DEPLOY_CHECK_INTERVAL',
-    'load_config'
+    'load_config',
+    'load_projects'
 ]
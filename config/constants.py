@@ -6,11 +6,92 @@ DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 DEFAULT_PORT = 5000
 
 # API相关配置
-BASE_API_URL = "https://api.render.com/v1"
+BASE_API_URL = os.getenv('RENDER_API_URL', "https://api.render.com/v1")  # Render API 地址，压测时可指向本地模拟服务
 
 # 部署相关配置
 DEPLOY_INTERVAL = int(os.getenv('DEPLOY_INTERVAL', '60'))  # 部署间隔时间(秒)
-MAX_DEPLOY_RETRIES = int(os.getenv('MAX_DEPLOY_RETRIES', '5'))  # 最大部署重试次数
-DEPLOY_CHECK_INTERVAL = int(os.getenv('DEPLOY_CHECK_INTERVAL', '60'))  # 部署状态检查间隔(秒)
 # 域名显示配置
 PREFER_CUSTOM_DOMAIN = os.getenv('PREFER_CUSTOM_DOMAIN', 'true').lower() == 'true'
+
+# 本地状态存储目录（任务日志等 SQLite 文件存放位置）
+STATE_DIR = os.getenv('STATE_DIR', '/tmp/docker-hooks')
+
+# 异步 webhook 配置
+WEBHOOK_ASYNC_MODE = os.getenv('WEBHOOK_ASYNC_MODE', 'false').lower() == 'true'  # 是否启用接收即返回(202)模式
+JOB_JOURNAL_PATH = os.getenv('JOB_JOURNAL_PATH', os.path.join(STATE_DIR, 'jobs.db'))  # 任务日志文件路径
+JOB_DISPATCH_INTERVAL = float(os.getenv('JOB_DISPATCH_INTERVAL', '1'))  # 任务分发器空闲轮询间隔(秒)
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))  # 任务租约时长(秒)，超时未完成的任务会被重新执行
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', '604800'))  # 已结束的任务在任务日志中的保留时长(秒)
+
+# 项目配置文件
+PROJECTS_FILE = os.getenv('PROJECTS_FILE', '')  # 项目配置文件路径(YAML 或 JSON)，与 PROJECT__*__* 环境变量合并，同一配置项以环境变量为准
+CONFIG_RELOAD_INTERVAL = float(os.getenv('CONFIG_RELOAD_INTERVAL', '5'))  # 检查项目/推送渠道配置文件是否变化的间隔(秒)，0 表示不重新加载
+
+# 服务解析缓存配置
+SERVICE_CACHE_PATH = os.getenv('SERVICE_CACHE_PATH', os.path.join(STATE_DIR, 'cache.db'))  # 服务缓存文件路径
+SERVICE_CACHE_TTL = int(os.getenv('SERVICE_CACHE_TTL', '600'))  # 服务缓存有效期(秒)，0 表示禁用
+
+# Render API 限流配置
+RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH', os.path.join(STATE_DIR, 'ratelimit.db'))  # 令牌桶存储文件路径
+RENDER_RATE_LIMIT = float(os.getenv('RENDER_RATE_LIMIT', '100'))  # 每个 API 密钥每分钟的请求数，0 表示不限流
+RENDER_RATE_BURST = int(os.getenv('RENDER_RATE_BURST', '20'))  # 令牌桶容量(允许的突发请求数)
+RENDER_RATE_LIMIT_MAX_WAIT = float(os.getenv('RENDER_RATE_LIMIT_MAX_WAIT', '120'))  # 单个请求等待配额的最长时间(秒)
+
+# gunicorn 配置
+WORKER_CLASS = os.getenv('GUNICORN_WORKER_CLASS', 'auto')  # worker 类型: auto(即 gthread)、sync、gthread、gevent，gevent 需显式指定，SQLite 读写会阻塞 gevent hub
+WORKER_THREADS = int(os.getenv('GUNICORN_THREADS', '16'))  # 每个 worker 的请求处理线程数，请求主要在等待 Render API，与限流配额无关
+WORKER_CONNECTIONS = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', str(WORKER_THREADS * 10)))  # gevent 模式下每个 worker 同时处理的连接数上限
+WORKER_MEMORY_MB = float(os.getenv('GUNICORN_WORKER_MEMORY', '64'))  # 单个 worker 的预估内存(MB)，按容器内存上限限制 worker 数量
+MAX_REQUESTS = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))  # worker 处理多少个请求后重启，0 表示不重启
+MAX_REQUESTS_JITTER = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', str(MAX_REQUESTS // 10)))  # 重启请求数的随机抖动，避免所有 worker 同时重启
+
+# 部署状态轮询配置
+RENDER_POLL_CONCURRENCY = int(os.getenv('RENDER_POLL_CONCURRENCY', '4'))  # 每个进程同时进行的状态查询请求上限
+RENDER_DEPLOY_CONCURRENCY = int(os.getenv('RENDER_DEPLOY_CONCURRENCY', '4'))  # 一个项目包含多个服务时，同时触发部署的服务数上限
+DEPLOY_POLL_MIN_INTERVAL = float(os.getenv('DEPLOY_POLL_MIN_INTERVAL', '5'))  # 状态检查最小间隔(秒)
+DEPLOY_POLL_MAX_INTERVAL = float(os.getenv('DEPLOY_POLL_MAX_INTERVAL', '60'))  # 状态检查最大间隔(秒)
+DEPLOY_POLL_BACKOFF = float(os.getenv('DEPLOY_POLL_BACKOFF', '1.5'))  # 状态检查间隔的指数退避倍数
+DEPLOY_POLL_DEADLINE = float(os.getenv('DEPLOY_POLL_DEADLINE', '1800'))  # 部署状态检查总时限(秒)，超过后视为超时
+
+# Render API 连接池配置
+# 每个进程的连接池大小：每个请求线程一个连接，加上任务分发器的并行部署和部署状态轮询
+RENDER_POOL_SIZE = int(os.getenv('RENDER_POOL_SIZE', str(WORKER_THREADS + RENDER_DEPLOY_CONCURRENCY + RENDER_POLL_CONCURRENCY)))
+RENDER_CONNECT_TIMEOUT = float(os.getenv('RENDER_CONNECT_TIMEOUT', '5'))  # 建立连接超时(秒)
+RENDER_READ_TIMEOUT = float(os.getenv('RENDER_READ_TIMEOUT', '30'))  # 读取响应超时(秒)
+RENDER_MAX_RETRIES = int(os.getenv('RENDER_MAX_RETRIES', '3'))  # 5xx 或连接错误时的最大重试次数
+RENDER_RETRY_BACKOFF = float(os.getenv('RENDER_RETRY_BACKOFF', '0.5'))  # 重试退避基数(秒)
+RENDER_RETRY_BACKOFF_MAX = float(os.getenv('RENDER_RETRY_BACKOFF_MAX', '8'))  # 单次重试退避上限(秒)
+
+# 部署状态存储配置
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'sqlite')  # 部署状态存储后端: sqlite 或 redis
+STATE_REDIS_URL = os.getenv('STATE_REDIS_URL', 'redis://localhost:6379/0')  # redis 后端的连接地址
+STATE_REDIS_PREFIX = os.getenv('STATE_REDIS_PREFIX', 'docker-hooks')  # redis 键前缀
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', os.path.join(STATE_DIR, 'state.db'))  # SQLite 状态存储文件路径
+DEPLOY_LOCK_TTL = int(os.getenv('DEPLOY_LOCK_TTL', '120'))  # 部署锁租约时长(秒)，持有者崩溃后自动释放
+
+# 通知配置
+NOTIFY_MAX_WORKERS = int(os.getenv('NOTIFY_MAX_WORKERS', '4'))  # 每个进程推送通知的线程数上限
+NOTIFY_TIMEOUT = float(os.getenv('NOTIFY_TIMEOUT', '10'))  # 推送渠道的默认请求超时(秒)
+NOTIFY_CHANNEL_TIMEOUTS = os.getenv('NOTIFY_CHANNEL_TIMEOUTS', '')  # 单独设置渠道超时，如 smtp=30,telegram_bot=20
+NOTIFY_SEND_DEADLINE = float(os.getenv('NOTIFY_SEND_DEADLINE', '30'))  # 同步推送等待所有渠道的总时限(秒)
+NOTIFY_BREAKER_THRESHOLD = int(os.getenv('NOTIFY_BREAKER_THRESHOLD', '3'))  # 渠道连续失败多少次后熔断
+NOTIFY_BREAKER_COOLDOWN = float(os.getenv('NOTIFY_BREAKER_COOLDOWN', '300'))  # 熔断后跳过该渠道的时长(秒)
+HITOKOTO_BUFFER_SIZE = int(os.getenv('HITOKOTO_BUFFER_SIZE', '8'))  # 预先获取的一言数量
+HITOKOTO_TIMEOUT = float(os.getenv('HITOKOTO_TIMEOUT', '2'))  # 获取一言的请求超时(秒)
+NOTIFY_STATE_PATH = os.getenv('NOTIFY_STATE_PATH', os.path.join(STATE_DIR, 'notify.db'))  # 通知相关状态的存储文件路径
+WECOM_TOKEN_REFRESH_MARGIN = float(os.getenv('WECOM_TOKEN_REFRESH_MARGIN', '300'))  # 企业微信 token 提前刷新的时间(秒)
+NOTIFY_CONFIG_FILE = os.getenv('NOTIFY_CONFIG_FILE', '')  # 推送渠道配置文件(YAML 或 JSON)，键与推送环境变量相同，同一配置项以环境变量为准，修改后自动重新加载
+NOTIFY_PLUGINS = os.getenv('NOTIFY_PLUGINS', '')  # 推送渠道插件模块，逗号分隔，模块导入时调用 register_channel 注册渠道
+NOTIFY_DIGEST_WINDOW = float(os.getenv('NOTIFY_DIGEST_WINDOW', '0'))  # 部署通知汇总窗口(秒)，0 表示每个部署单独通知
+NOTIFY_DIGEST_MAX = int(os.getenv('NOTIFY_DIGEST_MAX', '20'))  # 单条汇总通知最多包含的部署数，达到后立即推送
+NOTIFY_OUTBOX = os.getenv('NOTIFY_OUTBOX', 'false').lower() == 'true'  # 部署通知是否先写入发件箱再由后台投递(失败重试、重启不丢失)，默认直接推送
+NOTIFY_RETRY_BASE = float(os.getenv('NOTIFY_RETRY_BASE', '30'))  # 发件箱投递失败后第一次重试的等待时间(秒)，之后每次翻倍
+NOTIFY_RETRY_MAX = float(os.getenv('NOTIFY_RETRY_MAX', '3600'))  # 发件箱单次重试等待时间上限(秒)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '8'))  # 每个渠道的最大投递次数
+NOTIFY_OUTBOX_RETENTION = float(os.getenv('NOTIFY_OUTBOX_RETENTION', '604800'))  # 已结束的通知保留时长(秒)
+NOTIFY_RATE_LIMITS = os.getenv('NOTIFY_RATE_LIMITS', '')  # 渠道推送配额，如 dingding_bot=20/60,bark=0，0 表示不限制
+NOTIFY_RATE_LIMIT_MAX_WAIT = float(os.getenv('NOTIFY_RATE_LIMIT_MAX_WAIT', '600'))  # 推送因配额排队的最长时间(秒)
+NOTIFY_SMTP_IDLE_TIMEOUT = float(os.getenv('NOTIFY_SMTP_IDLE_TIMEOUT', '60'))  # SMTP 连接的最长空闲时间(秒)，期间的邮件复用同一个已登录的连接，超过后下次发送前重新连接
+
+# 指标配置
+METRICS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', os.path.join(STATE_DIR, 'metrics'))  # gunicorn 多进程指标文件目录
@@ -1,18 +1,103 @@
+import math
 import multiprocessing
 import os
-from config.constants import DEFAULT_PORT  # 从 constants.py 导入默认端口配置
+import shutil
+from typing import Optional
+
+from config.constants import (  # 从 constants.py 导入默认端口和 worker 配置
+    DEFAULT_PORT,
+    METRICS_DIR,
+    WORKER_CLASS,
+    WORKER_THREADS,
+    WORKER_CONNECTIONS,
+    WORKER_MEMORY_MB,
+    MAX_REQUESTS,
+    MAX_REQUESTS_JITTER
+)
+
+# 启用 prometheus_client 多进程模式，worker 进程的指标写入该目录，由 /metrics 汇总
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = METRICS_DIR
+
+
+def _read_cgroup(*paths: str) -> Optional[str]:
+    # 依次读取 cgroup v2 / v1 的文件，返回第一个存在的内容
+    for path in paths:
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            continue
+    return None
+
+
+def cgroup_memory_limit_mb() -> Optional[float]:
+    """容器的内存上限(MB)，未限制时返回 None"""
+    value = _read_cgroup('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+    if not value or value == 'max':
+        return None
+    limit = int(value)
+    # cgroup v1 未限制时是一个接近 2^63 的值
+    if limit >= 1 << 60:
+        return None
+    return limit / 1024 / 1024
+
+
+def cpu_count() -> int:
+    """可用的 CPU 数，考虑 CPU 亲和性和 cgroup 的 CPU 配额"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = multiprocessing.cpu_count()
+    value = _read_cgroup('/sys/fs/cgroup/cpu.max')
+    if value:
+        quota, _, period = value.partition(' ')
+        if quota != 'max':
+            count = min(count, math.ceil(int(quota) / int(period or 100000)))
+    else:
+        quota = _read_cgroup('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period = _read_cgroup('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if quota and period and int(quota) > 0:
+            count = min(count, math.ceil(int(quota) / int(period)))
+    return max(count, 1)
+
+
+def select_worker_class(name: str) -> str:
+    """
+    解析 worker 类型，auto 使用 gthread
+
+    gevent 只在显式指定时使用：任务日志、部署状态、服务缓存和通知发件箱都通过 sqlite3 读写，
+    sqlite3 的调用不会让出 gevent hub，加锁等待（busy_timeout）期间整个 worker 的请求都会被阻塞。
+    """
+    name = name.lower()
+    if name == 'auto':
+        return 'gthread'
+    if name not in ('sync', 'gthread', 'gevent'):
+        raise ValueError(f"不支持的 GUNICORN_WORKER_CLASS: {name}")
+    return name
+
 
 # 获取环境变量或使用默认值
 port = os.getenv("PORT", DEFAULT_PORT)
 max_workers = int(os.getenv("MAX_WORKERS", "8"))  # 默认最大 8 个 workers
 
-# 计算 workers 数量
-cpu_count = multiprocessing.cpu_count()
-worker_count = min(cpu_count * 2 + 1, max_workers)
+# worker 主要在等待 Render API 和推送渠道，并发由每个 worker 内的线程(gthread)或协程(gevent)提供；
+# 同步 worker 每个进程只能同时处理一个请求，仍按 CPU 数的 2 倍加 1 计算进程数
+worker_class = select_worker_class(WORKER_CLASS)  # worker类型
+cpus = cpu_count()
+worker_count = min(cpus * 2 + 1 if worker_class == 'sync' else cpus + 1, max_workers)
+
+# 按容器内存上限限制 worker 数量，预留 20% 给主进程和突发的内存使用
+memory_limit_mb = cgroup_memory_limit_mb()
+if memory_limit_mb is not None:
+    worker_count = min(worker_count, max(int(memory_limit_mb * 0.8 // WORKER_MEMORY_MB), 1))
 
 # Gunicorn 配置
 bind = f"0.0.0.0:{port}"  # 绑定地址和端口，0.0.0.0表示监听所有网络接口
 workers = worker_count  # worker进程数
+threads = WORKER_THREADS if worker_class == 'gthread' else 1  # 每个 worker 的线程数（仅 gthread）
+worker_connections = WORKER_CONNECTIONS  # 每个 worker 的并发连接数上限（仅 gevent）
+max_requests = MAX_REQUESTS  # worker 处理多少个请求后重启，0 表示不重启
+max_requests_jitter = MAX_REQUESTS_JITTER  # 重启请求数的随机抖动
 loglevel = "info"  # 日志级别
 accesslog = "-"  # 访问日志输出到标准输出(-)
 errorlog = "-"  # 错误日志输出到标准输出(-)
@@ -32,3 +117,27 @@ access_log_format = '[%(t)s] %(h)s %(l)s %(u)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)
 
 # 使用 Gunicorn 的标准日志类
 logger_class = "gunicorn.glogging.Logger"
+
+
+def on_starting(server):
+    """主进程启动时清空上次运行留下的指标文件"""
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    concurrency = threads if worker_class == 'gthread' else worker_connections if worker_class == 'gevent' else 1
+    memory = f"{memory_limit_mb:.0f}MB" if memory_limit_mb is not None else '不限'
+    server.log.info(
+        f"worker 配置: class={worker_class}, workers={workers}, 每个 worker 并发={concurrency}, "
+        f"CPU={cpus}, 内存上限={memory}, max_requests={max_requests}±{max_requests_jitter}"
+    )
+
+
+def post_fork(server, worker):
+    """记录 worker 的 fork 时间，用于统计冷启动耗时（gevent worker 由 gunicorn 在加载应用前打补丁）"""
+    from utils.startup_profile import mark
+    mark('fork')
+
+
+def child_exit(server, worker):
+    """worker 退出时清理其 livesum 类型的指标，避免已退出进程的进行中部署数被计入"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
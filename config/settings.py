@@ -1,29 +1,105 @@
+import json
 import os
 import re
+from typing import Dict, Mapping, Optional
 
 from config import BASE_API_URL
+from config.constants import PROJECTS_FILE
 
+# 正则表达式：验证项目标识格式（字母、数字、下划线、连字符）
+PROJECT_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]+$')
+# 正则表达式：验证环境变量格式（PROJECT__项目标识__配置键）
+ENV_VAR_PATTERN = re.compile(r'^PROJECT__[a-zA-Z0-9_-]+__(SERVICE_NAME|API_KEY)$', re.IGNORECASE)
+# 项目支持的配置项
+PROJECT_KEYS = ('api_key', 'service_name')
 
-def load_config():
-    # 验证 SECRET_TOKEN
-    secret_token = os.environ.get('SECRET_TOKEN')
-    if not secret_token:
-        raise ValueError("环境变量 SECRET_TOKEN 未设置")
-    if len(str(secret_token)) < 8:
-        raise ValueError("SECRET_TOKEN 长度必须大于等于8位")
 
-    # 正则表达式：验证项目标识格式（字母、数字、下划线、连字符）
-    project_id_pattern = re.compile(r'^[a-zA-Z0-9_-]+$')
-    # 正则表达式：验证环境变量格式（PROJECT__项目标识__配置键）
-    env_var_pattern = re.compile(r'^PROJECT__[a-zA-Z0-9_-]+__(SERVICE_NAME|API_KEY)$', re.IGNORECASE)
+def _load_projects_file(path: str) -> Dict[str, Dict[str, str]]:
+    """
+    读取项目配置文件
+
+    文件格式（YAML 或 JSON，按扩展名区分，.yaml/.yml 需要安装 PyYAML）:
+
+        projects:
+          my-app:
+            api_key: rnd_xxx
+            service_name: my-service      # 也可以是服务名或通配符的列表，如 [my-web, my-worker-*]
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Dict[str, Dict[str, str]]: 项目标识 -> 配置项
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+    except OSError as e:
+        raise ValueError(f"无法读取项目配置文件 {path}: {e}")
+
+    if path.lower().endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("使用 YAML 项目配置文件需要安装 PyYAML 包: pip install pyyaml")
+        try:
+            data = yaml.safe_load(text) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"项目配置文件 {path} 格式错误: {e}")
+    else:
+        try:
+            data = json.loads(text) if text.strip() else {}
+        except ValueError as e:
+            raise ValueError(f"项目配置文件 {path} 格式错误: {e}")
+
+    projects = data.get('projects') if isinstance(data, dict) else None
+    if not isinstance(projects, dict):
+        raise ValueError(f"项目配置文件 {path} 缺少 projects 映射")
 
-    # 存储所有项目的配置信息
     projects_config = {}
+    for project_id, config in projects.items():
+        # 与环境变量一致，项目标识统一为小写
+        project_id = str(project_id).lower()
+        if not PROJECT_ID_PATTERN.match(project_id):
+            raise ValueError(f"项目标识 '{project_id}' 格式无效，只能包含字母、数字、下划线和连字符")
+        if not isinstance(config, dict):
+            raise ValueError(f"项目 '{project_id}' 的配置必须是映射")
+        projects_config[project_id] = {}
+        for config_key, value in config.items():
+            config_key = str(config_key).lower()
+            if config_key not in PROJECT_KEYS:
+                raise ValueError(f"项目 '{project_id}' 包含不支持的配置项 '{config_key}'")
+            if config_key == 'service_name' and isinstance(value, list):
+                # 多个服务名或通配符，与环境变量中逗号分隔的写法等价
+                if not value or not all(isinstance(item, str) for item in value):
+                    raise ValueError(f"项目 '{project_id}' 的 service_name 列表只能包含字符串")
+                value = ','.join(value)
+            if isinstance(value, (dict, list)) or value is None:
+                raise ValueError(f"项目 '{project_id}' 的配置项 '{config_key}' 必须是字符串")
+            projects_config[project_id][config_key] = str(value)
+    return projects_config
+
+
+def load_projects(path: Optional[str] = PROJECTS_FILE, environ: Optional[Mapping[str, str]] = None) -> Dict[str, Dict[str, str]]:
+    """
+    加载所有项目配置：先读取项目配置文件，再叠加 PROJECT__*__* 环境变量（同一配置项以环境变量为准）
+
+    Args:
+        path: 项目配置文件路径，为空时只读取环境变量
+        environ: 环境变量，默认为 os.environ
+
+    Returns:
+        Dict[str, Dict[str, str]]: 项目标识 -> 配置项
+    """
+    environ = os.environ if environ is None else environ
+
+    # 存储所有项目的配置信息
+    projects_config = _load_projects_file(path) if path else {}
 
     # 遍历环境变量，查找项目配置
-    for env_key, env_value in os.environ.items():
+    for env_key, env_value in environ.items():
         # 检查是否匹配项目配置格式（如：PROJECT__test__API_KEY）
-        if env_var_pattern.match(env_key):
+        if ENV_VAR_PATTERN.match(env_key):
             # 拆分环境变量名（如：["PROJECT", "test", "API_KEY"]）
             parts = env_key.split('__')
             # 统一项目标识为小写（如：TEST -> test）
@@ -32,7 +108,7 @@ def load_config():
             config_key = parts[2].lower()
 
             # 验证项目标识是否包含非法字符
-            if not project_id_pattern.match(project_id):
+            if not PROJECT_ID_PATTERN.match(project_id):
                 raise ValueError(f"项目标识 '{project_id}' 格式无效，只能包含字母、数字、下划线和连字符")
 
             # 初始化项目配置字典
@@ -43,7 +119,7 @@ def load_config():
 
     # 确保至少存在一个项目配置
     if not projects_config:
-        raise ValueError("未找到任何项目配置，请设置 PROJECT__*__* 环境变量")
+        raise ValueError("未找到任何项目配置，请设置 PROJECT__*__* 环境变量或 PROJECTS_FILE")
 
     # 验证每个项目的必需配置项
     for project_id, config in projects_config.items():
@@ -52,9 +128,20 @@ def load_config():
         if 'service_name' not in config:
             raise ValueError(f"项目 '{project_id}' 缺少必需的 SERVICE_NAME 配置")
 
+    return projects_config
+
+
+def load_config():
+    # 验证 SECRET_TOKEN
+    secret_token = os.environ.get('SECRET_TOKEN')
+    if not secret_token:
+        raise ValueError("环境变量 SECRET_TOKEN 未设置")
+    if len(str(secret_token)) < 8:
+        raise ValueError("SECRET_TOKEN 长度必须大于等于8位")
+
     # 返回完整配置
     return {
         'SECRET_TOKEN': secret_token,
         'BASE_URL': BASE_API_URL,
-        'PROJECT_CONFIG': projects_config
+        'PROJECT_CONFIG': load_projects()
     }
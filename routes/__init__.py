@@ -1,4 +1,4 @@
-from .main import home, test
-from .webhook import webhook
+from .main import home, test, metrics
+from .webhook import webhook, job_status, notify_status, notify_messages, notify_message
 
-__all__ = ['home', 'test', 'webhook']
+__all__ = ['home', 'test', 'metrics', 'webhook', 'job_status', 'notify_status', 'notify_messages', 'notify_message']
@@ -1,5 +1,7 @@
 from datetime import datetime
-from flask import render_template, current_app
+from flask import render_template, current_app, make_response
+from routes.webhook import verify_token
+from utils.metrics import render_metrics
 from utils.response import json_response
 import logging
 
@@ -15,10 +17,11 @@ def home():
 def test():
     """测试路由"""
     logger.info("收到测试请求")
+    snapshot = current_app.project_service.snapshot
     valid_projects = [
         project_name
-        for project_name, config in current_app.config['PROJECT_CONFIG'].items()
-        if config.get('api_key')
+        for project_name in snapshot.names
+        if snapshot.projects[project_name].get('api_key')
     ]
     data = {
         'message': '这是一个测试响应',
@@ -26,7 +29,17 @@ def test():
         'app_config': {
             'BASE_URL': current_app.config['BASE_URL'],
             'PROJECT_COUNT': len(valid_projects),
-            'PROJECTS': valid_projects
+            'PROJECTS': valid_projects,
+            'PROJECT_CONFIG_VERSION': snapshot.version
         }
     }
     return json_response(data)
+
+
+def metrics():
+    """Prometheus 指标路由，指标中包含项目名称，需要携带令牌"""
+    token_error = verify_token()
+    if token_error:
+        return token_error
+    data, content_type = render_metrics()
+    return make_response(data, 200, {'Content-Type': content_type})
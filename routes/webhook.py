@@ -1,18 +1,23 @@
+import os
+import time
 from datetime import datetime, timedelta
 from flask import request, current_app
 import logging
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
+from utils.metrics import observe_webhook
+from utils.notify import circuit_states
 from utils.response import json_response
 from utils.lock_utils import (
-    file_lock,
-    file_unlock,
-    get_deploy_lock,
+    acquire_deploy_lock,
+    release_deploy_lock,
     get_last_deploy_time,
     update_deploy_time
 )
-from config.constants import DEPLOY_INTERVAL
+from config.constants import DEPLOY_INTERVAL, WEBHOOK_ASYNC_MODE
 
 if TYPE_CHECKING:
+    from services.job_queue import JobJournal, JobDispatcher
+    from services.notify_outbox import OutboxDispatcher
     from services.project_service import ProjectService
     from services.render_service import RenderService
     from app import FlaskApp  # 导入自定义的 Flask 应用类
@@ -32,6 +37,48 @@ def get_render_service() -> 'RenderService':
     return current_app.render_service  # IDE 现在能识别这个属性
 
 
+def get_job_journal() -> 'JobJournal':
+    """获取任务日志实例"""
+    return current_app.job_journal
+
+
+def get_job_dispatcher() -> 'JobDispatcher':
+    """获取任务分发器实例"""
+    return current_app.job_dispatcher
+
+
+def get_outbox_dispatcher() -> Optional['OutboxDispatcher']:
+    """获取通知发件箱投递器实例，未启用发件箱时为 None"""
+    return current_app.outbox_dispatcher
+
+
+def verify_token():
+    """验证请求令牌，失败时返回错误响应，成功时返回 None"""
+    token = request.args.get('token')
+    if not token:
+        return json_response({'error': '缺少认证令牌'}, 401)
+    if token != current_app.config['SECRET_TOKEN']:
+        return json_response({'error': '无效的令牌'}, 403)
+    return None
+
+
+def schedule_trailing_deploy(project: str, payload: dict, run_at: float, reason: str):
+    """将推送合并到项目的延迟部署中，并返回包含计划执行时间的响应"""
+    job_id, run_at, merged = get_job_journal().schedule_trailing(project, payload, run_at)
+    get_job_dispatcher().start()
+    scheduled_at = datetime.fromtimestamp(run_at)
+    return json_response({
+        'message': '部署请求已合并，将在静默期结束后执行',
+        'details': reason,
+        'project': project,
+        'job_id': job_id,
+        'merged': merged,
+        'scheduled_at': scheduled_at.isoformat(),
+        'status': 'scheduled'
+    }, 202)
+
+
+@observe_webhook
 def webhook():
     """Webhook 路由处理"""
     logger.info("收到 webhook 请求")
@@ -42,16 +89,15 @@ def webhook():
         return json_response({'error': '无效的 Content-Type，需要 application/json'}, 400)
 
     # 验证令牌
-    token = request.args.get('token')
-    if not token:
-        return json_response({'error': '缺少认证令牌'}, 401)
-    if token != current_app.config['SECRET_TOKEN']:
-        return json_response({'error': '无效的令牌'}, 403)
+    token_error = verify_token()
+    if token_error:
+        return token_error
 
     # 验证项目
     project = request.args.get('project')
-    project_service = get_project_service()
-    if not project_service.is_valid_project(project):
+    # 只读取一次项目配置快照，处理期间重新加载项目配置不影响本次请求
+    project_config = get_project_service().get_project_config(project)
+    if not project_config:
         logger.error(f"无效的项目名称: {project}")
         return json_response({'error': '无效的项目名称'}, 400)
 
@@ -61,21 +107,19 @@ def webhook():
         logger.error("无效的负载")
         return json_response({'error': '无效的负载'}, 400)
 
-    # 获取文件锁
-    lock_file = get_deploy_lock(project)
-    lock_acquired = False
+    lease = None
     try:
-        # 尝试获取文件锁
-        if not file_lock(lock_file):
-            logger.warning(f"项目 {project} 正在部署中，获取锁失败")
-            lock_file.close()
-            return json_response({
-                'error': '部署正在进行中',
-                'details': f'检测到项目 {project} 正在进行部署，请等待当前部署完成后再试',
-                'status': 'deploying'
-            }, 429)
+        # 尝试获取部署锁
+        lease = acquire_deploy_lock(project)
+        if not lease:
+            logger.warning(f"项目 {project} 正在部署中，获取锁失败，安排延迟部署")
+            return schedule_trailing_deploy(
+                project,
+                payload,
+                time.time() + DEPLOY_INTERVAL,
+                f'检测到项目 {project} 正在进行部署，最新的推送将在当前部署完成后自动部署'
+            )
 
-        lock_acquired = True
         logger.info(f"项目 {project} 成功获取锁, 准备部署")
 
         # 检查部署时间间隔
@@ -83,23 +127,30 @@ def webhook():
         if last_deploy_time:
             time_since_last_deploy = datetime.now() - last_deploy_time
             if time_since_last_deploy < timedelta(seconds=DEPLOY_INTERVAL):
-                remaining_seconds = DEPLOY_INTERVAL - time_since_last_deploy.seconds
+                window_end = last_deploy_time + timedelta(seconds=DEPLOY_INTERVAL)
                 logger.warning(
                     f"项目 {project} 在 {DEPLOY_INTERVAL} 秒内已经触发过部署，"
-                    f"还需等待 {remaining_seconds} 秒"
+                    f"安排在 {window_end.isoformat()} 延迟部署"
+                )
+                return schedule_trailing_deploy(
+                    project,
+                    payload,
+                    window_end.timestamp(),
+                    f'系统限制项目 {project} 每 {DEPLOY_INTERVAL} 秒只能部署一次，最新的推送将在静默期结束后自动部署'
                 )
-                return json_response({
-                    'error': '部署请求过于频繁',
-                    'details': f'系统限制项目 {project} 每 {DEPLOY_INTERVAL} 秒只能部署一次',
-                    'retry_after': f"{remaining_seconds}秒",
-                    'status': 'rate_limited'
-                }, 429)
 
-        # 更新部署时间
-        update_deploy_time(project)
+        # 更新部署时间，本次部署已包含最新镜像，取消待执行的延迟部署
+        if not update_deploy_time(project, lease):
+            # 租约在检查期间过期并已被其他节点接管，交给延迟部署处理
+            return schedule_trailing_deploy(
+                project,
+                payload,
+                time.time() + DEPLOY_INTERVAL,
+                f'检测到项目 {project} 正在进行部署，最新的推送将在当前部署完成后自动部署'
+            )
+        get_job_journal().cancel_trailing(project)
 
         # 执行部署
-        project_config = project_service.get_project_config(project)
         api_key = project_config['api_key']
         if not api_key:
             logger.error(f"项目 {project} 缺少 API 密钥")
@@ -109,8 +160,22 @@ def webhook():
                 'status': 'error'
             }, 500)
 
+        # 异步模式：写入任务日志后立即返回，由后台分发器执行部署
+        if WEBHOOK_ASYNC_MODE:
+            job_id = get_job_journal().enqueue(project, payload)
+            get_job_dispatcher().notify()
+            logger.info(f"部署任务已入队: 项目名 {project}, job_id={job_id}")
+            return json_response({
+                'message': '部署任务已接收',
+                'project': project,
+                'job_id': job_id,
+                'status': 'accepted'
+            }, 202)
+
         render_service = get_render_service()
-        response, error, status_code = render_service.handle_webhook(project, api_key)
+        response, error, status_code = render_service.handle_webhook(
+            project, api_key, project_config.get('service_name')
+        )
         if error:
             logger.error(f"处理 webhook 时出错: {error}")
             return json_response({'error': error, 'project': project}, status_code)
@@ -126,7 +191,58 @@ def webhook():
             'status': 'error'
         }, 500)
     finally:
-        if lock_acquired:
-            file_unlock(lock_file)
+        if lease:
+            release_deploy_lock(project, lease)
             logger.info(f"释放锁，时间：{datetime.now().isoformat()}")
-        lock_file.close()
+
+
+def job_status(job_id):
+    """部署任务状态查询路由"""
+    token_error = verify_token()
+    if token_error:
+        return token_error
+
+    job = get_job_journal().get(job_id)
+    if not job:
+        return json_response({'error': '任务不存在', 'job_id': job_id}, 404)
+    return json_response(job)
+
+
+def notify_status():
+    """通知渠道熔断器状态查询路由，返回处理本次请求的 worker 进程中的状态"""
+    token_error = verify_token()
+    if token_error:
+        return token_error
+
+    return json_response({'pid': os.getpid(), 'channels': circuit_states()})
+
+
+def notify_messages():
+    """通知发件箱中最近的通知列表，可用 status 参数筛选（pending、done、failed）"""
+    token_error = verify_token()
+    if token_error:
+        return token_error
+
+    dispatcher = get_outbox_dispatcher()
+    if dispatcher is None:
+        return json_response({'error': '通知发件箱未启用'}, 404)
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 200)
+    except ValueError:
+        return json_response({'error': 'limit 参数必须是整数'}, 400)
+    return json_response({'messages': dispatcher.outbox.recent(request.args.get('status'), limit)})
+
+
+def notify_message(message_id):
+    """单条通知的各渠道投递状态和投递记录"""
+    token_error = verify_token()
+    if token_error:
+        return token_error
+
+    dispatcher = get_outbox_dispatcher()
+    if dispatcher is None:
+        return json_response({'error': '通知发件箱未启用'}, 404)
+    message = dispatcher.outbox.get(message_id)
+    if not message:
+        return json_response({'error': '通知不存在', 'message_id': message_id}, 404)
+    return json_response(message)
@@ -1,4 +1,9 @@
 from .render_service import RenderService
+from .deploy_poller import DeployJournal
 from .project_service import ProjectService
+from .job_queue import JobJournal, JobDispatcher
+from .notify_outbox import NotifyOutbox, OutboxDispatcher
+from .service_cache import ServiceCache
 
-__all__ = ['RenderService', 'ProjectService']
+__all__ = ['RenderService', 'DeployJournal', 'ProjectService', 'JobJournal', 'JobDispatcher', 'NotifyOutbox',
+           'OutboxDispatcher', 'ServiceCache']
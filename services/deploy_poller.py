@@ -0,0 +1,494 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from config.constants import RENDER_POLL_CONCURRENCY
+from services.poll_policy import PollPolicy, parse_render_time
+from services.rate_limiter import RateLimitedError
+from utils.lock_utils import update_deploy_status
+from utils.metrics import DEPLOYS_IN_FLIGHT, DEPLOY_DURATION
+from utils.sqlite_utils import get_connection
+
+if TYPE_CHECKING:
+    from services.project_service import ProjectService
+    from services.render_service import RenderService
+
+
+class DeployRecord:
+    """一次进行中的部署的轻量记录"""
+
+    __slots__ = (
+        'project', 'service_name', 'service_id', 'deploy_id', 'api_key',
+        'attempts', 'started_at', 'expected', 'last_status', 'due'
+    )
+
+    def __init__(self, project: str, service_name: str, service_id: str, deploy_id: str, api_key: str):
+        self.project = project
+        self.service_name = service_name
+        self.service_id = service_id
+        self.deploy_id = deploy_id
+        self.api_key = api_key
+        self.attempts = 0
+        self.started_at = time.time()
+        self.expected = None
+        self.last_status = None
+        # 下次检查时间；为 None 表示正在检查中或已结束，堆中对应的旧条目会被跳过
+        self.due = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.api_key, self.service_id
+
+
+class DeployJournal:
+    """
+    进行中部署的持久化记录，与任务日志共用同一个 SQLite 文件
+
+    每个进程的轮询器持有自己所跟踪部署的租约并定期续期；进程退出或重启后租约过期，
+    记录由其他（或重启后的）进程接管，继续检查部署状态并发送通知。
+    API 密钥不写入文件，接管时按项目名从当前的项目配置中读取。
+    """
+
+    # 租约时长（秒），轮询器每隔三分之一租约续期一次
+    LEASE_SECONDS = 60
+
+    def __init__(self, path: str):
+        """
+        初始化部署记录
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = path
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS deploys (
+                deploy_id TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                service_name TEXT,
+                service_id TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                expected REAL,
+                last_status TEXT,
+                owner TEXT NOT NULL,
+                lease_until REAL NOT NULL
+            )
+            """
+        )
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    def add(self, record: DeployRecord, owner: str) -> None:
+        """写入一个新跟踪的部署"""
+        self._conn().execute(
+            'INSERT OR REPLACE INTO deploys (deploy_id, project, service_name, service_id, attempts, started_at, '
+            'expected, last_status, owner, lease_until) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (record.deploy_id, record.project, record.service_name, record.service_id, record.attempts,
+             record.started_at, record.expected, record.last_status, owner, time.time() + self.LEASE_SECONDS)
+        )
+
+    def update(self, records: List[DeployRecord]) -> None:
+        """保存检查次数和最近的状态，接管后按原来的进度继续轮询"""
+        self._conn().executemany(
+            'UPDATE deploys SET attempts = ?, last_status = ? WHERE deploy_id = ?',
+            [(record.attempts, record.last_status, record.deploy_id) for record in records]
+        )
+
+    def remove(self, deploy_id: str) -> None:
+        """部署结束后删除记录"""
+        self._conn().execute('DELETE FROM deploys WHERE deploy_id = ?', (deploy_id,))
+
+    def renew(self, owner: str) -> None:
+        """续期 owner 持有的所有记录"""
+        self._conn().execute(
+            'UPDATE deploys SET lease_until = ? WHERE owner = ?', (time.time() + self.LEASE_SECONDS, owner)
+        )
+
+    def adopt(self, owner: str) -> List[Dict[str, Any]]:
+        """
+        接管租约已过期的记录
+
+        Args:
+            owner: 接管者标识
+
+        Returns:
+            List[Dict[str, Any]]: 接管的部署记录
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute('SELECT * FROM deploys WHERE lease_until < ?', (now,)).fetchall()
+            conn.executemany(
+                'UPDATE deploys SET owner = ?, lease_until = ? WHERE deploy_id = ?',
+                [(owner, now + self.LEASE_SECONDS, row['deploy_id']) for row in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [dict(row) for row in rows]
+
+
+class DeployPoller:
+    """
+    部署状态轮询器
+
+    每个进程只有一个调度线程，所有进行中的部署以 DeployRecord 的形式放在按下次检查时间排序的堆中；
+    到期时同一服务（同一 API 密钥）下所有进行中的部署合并为一组，由有界线程池用一次
+    列出部署的请求更新整组状态，部署结束后交给 RenderService 发送通知。
+    检查时间由 PollPolicy 决定。
+
+    配置了 DeployJournal 时进行中的部署同时写入 SQLite，worker 重启或退出后由其他 worker 接管，
+    接管需要先调用 resume 提供项目配置。
+    """
+
+    def __init__(
+            self,
+            render_service: 'RenderService',
+            policy: Optional[PollPolicy] = None,
+            max_concurrency: int = RENDER_POLL_CONCURRENCY,
+            journal: Optional[DeployJournal] = None
+    ):
+        """
+        初始化轮询器
+
+        Args:
+            render_service: Render 服务实例
+            policy: 可选，轮询策略，默认不使用历史耗时
+            max_concurrency: 同时进行的状态查询请求上限
+            journal: 可选，进行中部署的持久化记录，默认只保存在内存中
+        """
+        self.render_service = render_service
+        self.policy = policy or PollPolicy()
+        self.max_concurrency = max_concurrency
+        self.journal = journal
+        self.project_service = None
+        self.logger = logging.getLogger('docker-hooks')
+
+        self._heap: List[Tuple[float, int, DeployRecord]] = []
+        self._seq = itertools.count()
+        self._by_key: Dict[Tuple[str, str], Set[DeployRecord]] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._executor = None
+        self._notify_executor = None
+        self._pid = None
+        self._owner = None
+        self._heartbeat_at = 0.0
+
+    def _ensure_started(self) -> None:
+        # 调用方需持有 self._cond；fork 后的子进程中会重新创建线程和线程池
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if self._pid != os.getpid():
+            self._heap = []
+            self._by_key = {}
+            # pid 可能在重启后被复用，加上随机后缀避免续期上一次运行留下的记录
+            self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._heartbeat_at = 0.0
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='DeployPoll')
+        self._notify_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='DeployNotify')
+        self._thread = threading.Thread(target=self._run, name='DeployPoller', daemon=True)
+        self._thread.start()
+        self.logger.info(f"部署状态轮询器已启动: pid={self._pid}, 并发上限 {self.max_concurrency}")
+
+    def resume(self, project_service: 'ProjectService') -> None:
+        """
+        启动轮询器并接管上一次运行（或已退出的 worker）留下的进行中部署
+
+        Args:
+            project_service: 项目服务实例，接管时用于读取项目的 API 密钥
+        """
+        if self.journal is None:
+            return
+        self.project_service = project_service
+        with self._cond:
+            self._ensure_started()
+            self._heartbeat_at = 0.0
+            self._cond.notify()
+
+    def in_flight(self) -> int:
+        """返回当前进程中进行中的部署数量"""
+        with self._cond:
+            return sum(len(records) for records in self._by_key.values())
+
+    def track(self, project: str, service_name: str, service_id: str, deploy_id: str, api_key: str) -> None:
+        """
+        开始跟踪一个新触发的部署
+
+        Args:
+            project: 项目名称
+            service_name: 服务名称
+            service_id: Render 服务的唯一标识符
+            deploy_id: 部署操作的唯一标识符
+            api_key: Render API 密钥
+        """
+        record = DeployRecord(project, service_name, service_id, deploy_id, api_key)
+        record.expected = self.policy.expected_duration(service_id)
+        delay = self.policy.first_delay(record.expected)
+        with self._cond:
+            self._ensure_started()
+            self._by_key.setdefault(record.key, set()).add(record)
+            self._schedule(record, record.started_at + delay)
+            owner = self._owner
+        DEPLOYS_IN_FLIGHT.inc()
+        if self.journal is not None:
+            try:
+                self.journal.add(record, owner)
+            except Exception as e:
+                self.logger.warning(f"写入部署记录失败，重启后无法继续跟踪: deploy_id={deploy_id}, {str(e)}")
+        self.logger.info(
+            f"开始跟踪部署: 项目名 {project}, 服务名称 {service_name}, deploy_id={deploy_id}, "
+            f"预期耗时 {int(record.expected) if record.expected else '未知'} 秒, {delay:.0f} 秒后首次检查"
+        )
+
+    def _schedule(self, record: DeployRecord, due: float) -> None:
+        # 调用方需持有 self._cond
+        record.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), record))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            self._heartbeat()
+            with self._cond:
+                now = time.time()
+                if not self._heap or self._heap[0][0] > now:
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    if self.journal is not None:
+                        heartbeat = max(self._heartbeat_at - now, 0)
+                        timeout = heartbeat if timeout is None else min(timeout, heartbeat)
+                    self._cond.wait(timeout)
+                    continue
+
+                # 取出所有到期的记录，按服务分组；同组中尚未到期的记录也一并检查
+                now = time.time()
+                keys = []
+                while self._heap and self._heap[0][0] <= now:
+                    due, _, record = heapq.heappop(self._heap)
+                    if record.due != due:
+                        continue  # 已在别的分组中检查过或已结束
+                    if record.key not in keys:
+                        keys.append(record.key)
+
+                groups = []
+                for key in keys:
+                    group = [record for record in self._by_key.get(key, ()) if record.due is not None]
+                    for record in group:
+                        record.due = None
+                    if group:
+                        groups.append(group)
+
+            for group in groups:
+                self._executor.submit(self._poll_group, group)
+
+    def _heartbeat(self) -> None:
+        # 续期本进程跟踪的部署记录；提供了项目配置时接管租约已过期（所属进程已退出）的记录
+        if self.journal is None or time.time() < self._heartbeat_at:
+            return
+        self._heartbeat_at = time.time() + self.journal.LEASE_SECONDS / 3
+        try:
+            self.journal.renew(self._owner)
+            rows = self.journal.adopt(self._owner) if self.project_service is not None else []
+        except Exception:
+            self.logger.exception("续期部署记录时出错")
+            return
+        for row in rows:
+            self._restore(row)
+
+    def _restore(self, row: Dict[str, Any]) -> None:
+        project, deploy_id = row['project'], row['deploy_id']
+        api_key = self.project_service.get_project_config(project).get('api_key')
+        if not api_key:
+            self.logger.warning(f"项目已不存在或缺少 API 密钥，停止跟踪部署: 项目名 {project}, deploy_id={deploy_id}")
+            self.journal.remove(deploy_id)
+            return
+
+        record = DeployRecord(project, row['service_name'], row['service_id'], deploy_id, api_key)
+        record.attempts = row['attempts']
+        record.started_at = row['started_at']
+        record.expected = row['expected']
+        record.last_status = row['last_status']
+        with self._cond:
+            records = self._by_key.setdefault(record.key, set())
+            if any(tracked.deploy_id == deploy_id for tracked in records):
+                return
+            records.add(record)
+            self._schedule(record, time.time())
+        DEPLOYS_IN_FLIGHT.inc()
+        self.logger.info(
+            f"接管未完成的部署: 项目名 {project}, 服务名称 {record.service_name}, deploy_id={deploy_id}, "
+            f"已检查 {record.attempts} 次"
+        )
+
+    def _fetch_group(self, group: List[DeployRecord]) -> Dict[str, Optional[dict]]:
+        # 多个部署时用一次列出部署的请求获取整组状态，列表中找不到的部署再单独查询；
+        # 被限流的部署不出现在结果中，由调用方稍后重新检查
+        results: Dict[str, Optional[dict]] = {}
+        service_id, api_key = group[0].service_id, group[0].api_key
+
+        if len(group) > 1:
+            try:
+                deploys = self.render_service.list_deploys(service_id, api_key, limit=len(group) + 10)
+            except RateLimitedError as e:
+                self.logger.warning(f"列出部署被限流，稍后重新检查: {str(e)}")
+                return results
+            except Exception as e:
+                self.logger.error(f"列出部署时发生错误: {str(e)}")
+                deploys = None
+            if deploys is not None:
+                wanted = {record.deploy_id for record in group}
+                for deploy in deploys:
+                    if deploy.get('id') in wanted:
+                        results[deploy['id']] = deploy
+                self.logger.info(
+                    f"合并检查部署状态: service_id={service_id}, 进行中 {len(group)} 个, 命中 {len(results)} 个"
+                )
+
+        for record in group:
+            if record.deploy_id in results:
+                continue
+            try:
+                results[record.deploy_id] = self.render_service.fetch_deploy_status(
+                    record.service_id, record.deploy_id, record.api_key
+                )
+            except RateLimitedError as e:
+                self.logger.warning(f"检查部署状态被限流，稍后重新检查: {str(e)}")
+                break
+            except Exception as e:
+                self.logger.error(f"检查部署状态时发生错误: {str(e)}")
+                results[record.deploy_id] = None
+        return results
+
+    def _poll_group(self, group: List[DeployRecord]) -> None:
+        try:
+            results = self._fetch_group(group)
+        except Exception:
+            self.logger.exception("检查部署状态时出错")
+            results = {}
+
+        pending = []
+        delays = []
+        for record in group:
+            if record.deploy_id in results:
+                delay = self._handle(record, results[record.deploy_id])
+            else:
+                delay = self._defer(record)
+            if delay is not None:
+                pending.append(record)
+                delays.append(delay)
+
+        if pending:
+            # 同组记录使用同一个下次检查时间，保持对齐以便继续合并请求
+            due = time.time() + min(delays)
+            with self._cond:
+                for record in pending:
+                    self._schedule(record, due)
+            if self.journal is not None:
+                try:
+                    self.journal.update(pending)
+                except Exception as e:
+                    self.logger.warning(f"保存部署检查进度失败: {str(e)}")
+
+    def _handle(self, record: DeployRecord, deploy_info: Optional[dict]) -> Optional[float]:
+        """处理一次检查结果，部署未结束时返回下次检查的等待时间，否则返回 None"""
+        record.attempts += 1
+        self.logger.info(
+            f"第 {record.attempts} 次检查部署状态: 项目名 {record.project}, deploy_id={record.deploy_id}"
+        )
+
+        if deploy_info is None:
+            self._finish(record, False, "", "failed")
+            return None
+
+        current_status = deploy_info.get("status", "unknown")
+        if current_status != record.last_status:
+            self.logger.info(f"部署状态从 {record.last_status} 变更为 {current_status}: deploy_id={record.deploy_id}")
+            record.last_status = current_status
+
+        finish_time = deploy_info.get("finishedAt", "")
+        if self.render_service.is_deploy_finished(current_status):
+            if 'errorMessage' in deploy_info:
+                self.logger.error(f"错误信息: {deploy_info['errorMessage']}")
+            deploy_success = self.render_service.is_deploy_live(current_status)
+            if deploy_success:
+                self._record_duration(record, deploy_info)
+            self._finish(record, deploy_success, finish_time, current_status)
+            return None
+
+        delay = self.policy.next_delay(record.attempts, time.time() - record.started_at)
+        if delay is None:
+            self.logger.error(
+                f"检查部署状态超时，已超过总时限 {int(self.policy.deadline)} 秒: deploy_id={record.deploy_id}"
+            )
+            self._finish(record, False, "", record.last_status or "failed")
+        return delay
+
+    def _defer(self, record: DeployRecord) -> Optional[float]:
+        """本次没有拿到部署状态（被限流），不视为失败，按轮询策略稍后重新检查"""
+        delay = self.policy.next_delay(record.attempts + 1, time.time() - record.started_at)
+        if delay is None:
+            self.logger.error(
+                f"检查部署状态超时，已超过总时限 {int(self.policy.deadline)} 秒: deploy_id={record.deploy_id}"
+            )
+            self._finish(record, False, "", record.last_status or "failed")
+        return delay
+
+    def _record_duration(self, record: DeployRecord, deploy_info: dict) -> None:
+        # 优先使用 Render 返回的创建/完成时间，缺失时退回到本地观测到的耗时
+        created = parse_render_time(deploy_info.get("createdAt"))
+        finished = parse_render_time(deploy_info.get("finishedAt"))
+        if created and finished and finished > created:
+            seconds = finished - created
+        else:
+            seconds = time.time() - record.started_at
+        self.policy.record_duration(record.service_id, seconds)
+
+    def _finish(self, record: DeployRecord, deploy_success: bool, finish_time: str, status: str) -> None:
+        with self._cond:
+            records = self._by_key.get(record.key)
+            if records is not None:
+                records.discard(record)
+                if not records:
+                    del self._by_key[record.key]
+        DEPLOYS_IN_FLIGHT.dec()
+        if self.journal is not None:
+            try:
+                self.journal.remove(record.deploy_id)
+            except Exception as e:
+                self.logger.warning(f"删除部署记录失败: deploy_id={record.deploy_id}, {str(e)}")
+        DEPLOY_DURATION.labels(project=record.project, status=status).observe(time.time() - record.started_at)
+        try:
+            update_deploy_status(record.project, record.deploy_id, status)
+        except Exception as e:
+            self.logger.warning(f"记录部署状态失败: {str(e)}")
+        self.logger.info(
+            f"部署结束: 项目名 {record.project}, deploy_id={record.deploy_id}, 状态 {status}, "
+            f"耗时 {int(time.time() - record.started_at)} 秒"
+        )
+        self._notify_executor.submit(self._complete, record, deploy_success, finish_time, status)
+
+    def _complete(self, record: DeployRecord, deploy_success: bool, finish_time: str, status: str) -> None:
+        try:
+            self.render_service.complete_deploy(
+                record.project,
+                record.service_name,
+                record.service_id,
+                record.deploy_id,
+                record.api_key,
+                deploy_success,
+                finish_time,
+                status
+            )
+        except Exception:
+            self.logger.exception(f"发送部署通知时出错: 项目名 {record.project}, deploy_id={record.deploy_id}")
@@ -0,0 +1,451 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
+
+from config.constants import (
+    DEPLOY_INTERVAL,
+    JOB_DISPATCH_INTERVAL,
+    JOB_LEASE_SECONDS,
+    JOB_RETENTION
+)
+from utils.lock_utils import (
+    acquire_deploy_lock,
+    release_deploy_lock,
+    get_last_deploy_time,
+    update_deploy_time
+)
+from utils.sqlite_utils import get_connection
+
+if TYPE_CHECKING:
+    from services.project_service import ProjectService
+    from services.render_service import RenderService
+
+
+# 任务状态常量
+class JobStatus:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+
+# 任务类型常量
+class JobKind:
+    DEPLOY = 'deploy'  # 立即执行的部署
+    TRAILING = 'trailing'  # 静默期结束后执行的延迟部署，每个项目最多一个
+
+
+class JobJournal:
+    """基于 SQLite 的持久化任务日志，所有 worker 进程共享同一个文件"""
+
+    # 任务最多执行次数（包括崩溃后的重放）
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, path: str):
+        """
+        初始化任务日志
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = path
+        self.logger = logging.getLogger('docker-hooks')
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until REAL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._ensure_column('kind', f"TEXT NOT NULL DEFAULT '{JobKind.DEPLOY}'")
+        self._ensure_column('run_at', 'REAL NOT NULL DEFAULT 0')
+        self._conn().execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_at)')
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    def _ensure_column(self, name: str, definition: str) -> None:
+        # 为旧版本创建的任务日志补充新增的列
+        columns = {row['name'] for row in self._conn().execute('PRAGMA table_info(jobs)')}
+        if name not in columns:
+            try:
+                self._conn().execute(f'ALTER TABLE jobs ADD COLUMN {name} {definition}')
+            except sqlite3.OperationalError:
+                pass  # 其他 worker 已经添加
+
+    def enqueue(self, project: str, payload: Dict[str, Any]) -> str:
+        """
+        追加一个待执行的部署任务
+
+        Args:
+            project: 项目名称
+            payload: webhook 负载
+
+        Returns:
+            str: 任务ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO jobs (id, project, payload, status, kind, run_at, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, project, json.dumps(payload, ensure_ascii=False), JobStatus.PENDING, JobKind.DEPLOY,
+             now, now, now)
+        )
+        self.logger.info(f"任务已写入日志: job_id={job_id}, 项目名 {project}")
+        return job_id
+
+    def schedule_trailing(self, project: str, payload: Dict[str, Any], run_at: float) -> Tuple[str, float, bool]:
+        """
+        安排一个延迟部署，同一项目已有待执行的延迟部署时合并到该任务
+
+        合并时使用最新的负载，执行时间取两者中较晚的一个。
+
+        Args:
+            project: 项目名称
+            payload: webhook 负载
+            run_at: 最早执行时间（UNIX 时间戳）
+
+        Returns:
+            Tuple[str, float, bool]:
+                - str: 任务ID
+                - float: 实际执行时间
+                - bool: 是否合并到了已有任务
+        """
+        conn = self._conn()
+        now = time.time()
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id, run_at FROM jobs WHERE project = ? AND kind = ? AND status = ? LIMIT 1',
+                (project, JobKind.TRAILING, JobStatus.PENDING)
+            ).fetchone()
+            if row:
+                job_id, run_at, merged = row['id'], max(row['run_at'], run_at), True
+                conn.execute(
+                    'UPDATE jobs SET payload = ?, run_at = ?, updated_at = ? WHERE id = ?',
+                    (payload_json, run_at, now, job_id)
+                )
+            else:
+                job_id, merged = uuid.uuid4().hex, False
+                conn.execute(
+                    'INSERT INTO jobs (id, project, payload, status, kind, run_at, created_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (job_id, project, payload_json, JobStatus.PENDING, JobKind.TRAILING, run_at, now, now)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self.logger.info(
+            f"延迟部署已{'合并' if merged else '安排'}: job_id={job_id}, 项目名 {project}, "
+            f"执行时间 {datetime.fromtimestamp(run_at).isoformat()}"
+        )
+        return job_id, run_at, merged
+
+    def cancel_trailing(self, project: str) -> None:
+        """
+        取消项目待执行的延迟部署（项目已直接部署了最新镜像时调用）
+
+        Args:
+            project: 项目名称
+        """
+        cursor = self._conn().execute(
+            'UPDATE jobs SET status = ?, updated_at = ? WHERE project = ? AND kind = ? AND status = ?',
+            (JobStatus.CANCELLED, time.time(), project, JobKind.TRAILING, JobStatus.PENDING)
+        )
+        if cursor.rowcount:
+            self.logger.info(f"已取消被覆盖的延迟部署: 项目名 {project}")
+
+    def reschedule(self, job_id: str, owner: str, run_at: float) -> None:
+        """
+        将已领取的任务放回队列，在指定时间后再执行，不计入执行次数
+
+        Args:
+            job_id: 任务ID
+            owner: 领取者标识
+            run_at: 下次执行时间（UNIX 时间戳）
+        """
+        self._conn().execute(
+            'UPDATE jobs SET status = ?, run_at = ?, lease_until = NULL, attempts = MAX(attempts - 1, 0), '
+            'updated_at = ? WHERE id = ? AND owner = ?',
+            (JobStatus.PENDING, run_at, time.time(), job_id, owner)
+        )
+
+    def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        领取一个待执行的任务
+
+        除了 pending 状态的任务外，租约已过期的 running 任务（执行者崩溃或重启）也会被重新领取。
+
+        Args:
+            owner: 领取者标识
+
+        Returns:
+            Optional[Dict[str, Any]]: 任务信息；没有可执行任务时返回 None
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (status = ? AND run_at <= ?) OR (status = ? AND lease_until < ?)
+                ORDER BY run_at
+                LIMIT 1
+                """,
+                (JobStatus.PENDING, now, JobStatus.RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            if row['attempts'] >= self.MAX_ATTEMPTS:
+                conn.execute(
+                    'UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?',
+                    (JobStatus.FAILED, json.dumps({'error': '任务执行次数超过上限'}, ensure_ascii=False),
+                     now, row['id'])
+                )
+                conn.execute('COMMIT')
+                self.logger.error(f"任务执行次数超过上限，标记为失败: job_id={row['id']}")
+                return None
+
+            conn.execute(
+                'UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? '
+                'WHERE id = ?',
+                (JobStatus.RUNNING, owner, now + JOB_LEASE_SECONDS, now, row['id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if row['status'] == JobStatus.RUNNING:
+            self.logger.warning(f"重放未完成的任务: job_id={row['id']}, 原执行者 {row['owner']}")
+        return {
+            'id': row['id'],
+            'project': row['project'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'attempts': row['attempts'] + 1
+        }
+
+    def complete(self, job_id: str, owner: str, success: bool, result: Dict[str, Any]) -> None:
+        """
+        记录任务执行结果
+
+        Args:
+            job_id: 任务ID
+            owner: 领取者标识，只有当前持有者才能提交结果
+            success: 是否执行成功
+            result: 执行结果
+        """
+        status = JobStatus.DONE if success else JobStatus.FAILED
+        self._conn().execute(
+            'UPDATE jobs SET status = ?, result = ?, lease_until = NULL, updated_at = ? WHERE id = ? AND owner = ?',
+            (status, json.dumps(result, ensure_ascii=False), time.time(), job_id, owner)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        查询任务状态
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 任务信息；任务不存在时返回 None
+        """
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'project': row['project'],
+            'status': row['status'],
+            'kind': row['kind'],
+            'run_at': row['run_at'],
+            'attempts': row['attempts'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def prune(self, retention: float = JOB_RETENTION) -> int:
+        """
+        删除已结束且超过保留时长的任务
+
+        Args:
+            retention: 保留时长（秒）
+
+        Returns:
+            int: 删除的任务数量
+        """
+        cursor = self._conn().execute(
+            'DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?',
+            JobStatus.FINISHED + (time.time() - retention,)
+        )
+        return cursor.rowcount
+
+
+class JobDispatcher:
+    """后台任务分发器，在每个 worker 进程中以守护线程运行"""
+
+    # 项目正在部署时，延迟部署重新尝试的等待时间（秒）
+    RETRY_DELAY = 5
+    # 清理过期任务的间隔（秒）
+    PRUNE_INTERVAL = 3600
+
+    def __init__(
+            self,
+            journal: JobJournal,
+            render_service: 'RenderService',
+            project_service: 'ProjectService',
+            interval: float = JOB_DISPATCH_INTERVAL
+    ):
+        """
+        初始化任务分发器
+
+        Args:
+            journal: 任务日志
+            render_service: Render 服务实例
+            project_service: 项目服务实例
+            interval: 空闲时的轮询间隔（秒）
+        """
+        self.journal = journal
+        self.render_service = render_service
+        self.project_service = project_service
+        self.interval = interval
+        self.logger = logging.getLogger('docker-hooks')
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._pruned_at = 0.0
+
+    @property
+    def owner(self) -> str:
+        return f"{os.getpid()}-{threading.get_ident()}"
+
+    def start(self) -> None:
+        """启动分发线程（fork 后的子进程中会重新启动）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='JobDispatcher', daemon=True)
+        self._thread.start()
+        self.logger.info(f"任务分发器已启动: pid={self._pid}")
+
+    def notify(self) -> None:
+        """唤醒分发线程，立即处理新写入的任务"""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job = self.journal.claim(self.owner)
+            except Exception:
+                self.logger.exception("领取任务时出错")
+                job = None
+
+            if job is None:
+                self._maybe_prune()
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job)
+
+    def _maybe_prune(self) -> None:
+        if time.time() - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = time.time()
+        try:
+            removed = self.journal.prune()
+            if removed:
+                self.logger.info(f"已清理 {removed} 个过期任务")
+        except Exception:
+            self.logger.exception("清理过期任务时出错")
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        if job['kind'] == JobKind.TRAILING:
+            self._execute_trailing(job)
+        else:
+            self._deploy(job)
+
+    def _execute_trailing(self, job: Dict[str, Any]) -> None:
+        # 延迟部署执行前需要重新获取项目锁并检查部署间隔，条件不满足时放回队列稍后再试
+        job_id = job['id']
+        project = job['project']
+        lease = None
+        try:
+            lease = acquire_deploy_lock(project)
+            if not lease:
+                self.logger.info(f"项目 {project} 正在部署中，延迟部署稍后执行: job_id={job_id}")
+                self.journal.reschedule(job_id, self.owner, time.time() + self.RETRY_DELAY)
+                return
+
+            last_deploy_time = get_last_deploy_time(project)
+            if last_deploy_time:
+                window_end = last_deploy_time.timestamp() + DEPLOY_INTERVAL
+                if window_end > time.time():
+                    self.logger.info(f"项目 {project} 仍在部署间隔内，延迟部署稍后执行: job_id={job_id}")
+                    self.journal.reschedule(job_id, self.owner, window_end)
+                    return
+
+            if not update_deploy_time(project, lease):
+                self.journal.reschedule(job_id, self.owner, time.time() + self.RETRY_DELAY)
+                return
+            self._deploy(job)
+        except Exception as e:
+            self.logger.exception(f"执行延迟部署时出错: job_id={job_id}")
+            self.journal.complete(job_id, self.owner, False, {'error': str(e)})
+        finally:
+            if lease:
+                release_deploy_lock(project, lease)
+
+    def _deploy(self, job: Dict[str, Any]) -> None:
+        job_id = job['id']
+        project = job['project']
+        self.logger.info(f"开始执行任务: job_id={job_id}, 项目名 {project}, 第 {job['attempts']} 次")
+
+        try:
+            project_config = self.project_service.get_project_config(project)
+            api_key = project_config.get('api_key')
+            if not api_key:
+                self.journal.complete(job_id, self.owner, False, {'error': '项目缺少 API 密钥配置'})
+                return
+
+            response, error, status_code = self.render_service.handle_webhook(
+                project, api_key, project_config.get('service_name')
+            )
+            if error:
+                self.logger.error(f"任务执行失败: job_id={job_id}, {error}")
+                self.journal.complete(job_id, self.owner, False, {'error': error, 'status_code': status_code})
+            else:
+                self.logger.info(f"任务执行完成: job_id={job_id}")
+                self.journal.complete(job_id, self.owner, True, response)
+        except Exception as e:
+            self.logger.exception(f"执行任务时出错: job_id={job_id}")
+            self.journal.complete(job_id, self.owner, False, {'error': str(e)})
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config.constants import NOTIFY_DIGEST_WINDOW, NOTIFY_DIGEST_MAX
+
+
+class DeployResult(NamedTuple):
+    """一次部署的结果，用于生成通知"""
+    project: str
+    service_name: str
+    deploy_id: Optional[str]
+    urls: Optional[Dict[str, Any]]
+    finish_time: Optional[str]
+    status: Optional[str]
+
+
+def _chain(source: Future, targets: List[Future]) -> None:
+    # source 完成后把结果转交给 targets
+    def _done(future: Future) -> None:
+        error = future.exception()
+        for target in targets:
+            if error is not None:
+                target.set_exception(error)
+            else:
+                target.set_result(future.result())
+
+    source.add_done_callback(_done)
+
+
+class NotifyDigest:
+    """
+    部署通知的汇总器
+
+    窗口内的第一个部署结果立即推送并开启一个时间窗口，窗口内后续的结果先缓存，
+    窗口结束或缓存数量达到上限时合并为一条汇总通知推送；窗口结束时仍有结果则继续开启下一个窗口，
+    直到某个窗口内没有新结果为止。窗口中只有一个结果时仍按单条通知的格式推送。
+    汇总在每个进程内独立进行。
+    """
+
+    def __init__(
+            self,
+            send_one: Callable[[DeployResult], Future],
+            send_many: Callable[[List[DeployResult]], Future],
+            window: float = NOTIFY_DIGEST_WINDOW,
+            max_items: int = NOTIFY_DIGEST_MAX
+    ):
+        """
+        初始化汇总器
+
+        Args:
+            send_one: 推送单个部署结果，返回推送的 Future
+            send_many: 推送多个部署结果的汇总，返回推送的 Future
+            window: 汇总窗口时长（秒），0 表示不汇总，每个结果立即推送
+            max_items: 单条汇总通知最多包含的结果数，达到后立即推送
+        """
+        self.send_one = send_one
+        self.send_many = send_many
+        self.window = window
+        self.max_items = max(max_items, 1)
+        self.logger = logging.getLogger('docker-hooks')
+
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[DeployResult, Future]] = []
+        self._window_open = False
+        self._generation = 0
+        self._pid = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用汇总"""
+        return self.window > 0
+
+    def add(self, result: DeployResult) -> Future:
+        """
+        提交一个部署结果
+
+        Args:
+            result: 部署结果
+
+        Returns:
+            Future: 包含该结果的通知推送结束后完成，结果为 渠道名 -> 是否成功
+        """
+        if not self.enabled:
+            return self.send_one(result)
+
+        batch = None
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 后子进程中不存在父进程的窗口定时器
+                self._pid = os.getpid()
+                self._pending = []
+                self._window_open = False
+            if not self._window_open:
+                self._open_window()
+                future = None
+            else:
+                future = Future()
+                self._pending.append((result, future))
+                if len(self._pending) >= self.max_items:
+                    batch = self._take()
+
+        if future is None:
+            return self.send_one(result)
+        if batch:
+            self._send(batch)
+        return future
+
+    def _open_window(self) -> None:
+        # 调用方需持有 self._lock
+        self._window_open = True
+        self._generation += 1
+        timer = threading.Timer(self.window, self._on_window_end, args=(self._generation,))
+        timer.daemon = True
+        timer.start()
+
+    def _take(self) -> List[Tuple[DeployResult, Future]]:
+        # 调用方需持有 self._lock
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _on_window_end(self, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation or self._pid != os.getpid():
+                return
+            batch = self._take()
+            if batch:
+                self._open_window()
+            else:
+                self._window_open = False
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Tuple[DeployResult, Future]]) -> None:
+        results = [result for result, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            if len(results) == 1:
+                source = self.send_one(results[0])
+            else:
+                self.logger.info(f"合并推送 {len(results)} 个部署结果")
+                source = self.send_many(results)
+        except Exception as e:
+            self.logger.error(f"推送部署通知时发生错误: {str(e)}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        _chain(source, futures)
+
+    def pending(self) -> int:
+        """返回当前缓存中等待汇总的结果数"""
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,571 @@
+import functools
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List
+
+from config.constants import (
+    NOTIFY_RETRY_BASE,
+    NOTIFY_RETRY_MAX,
+    NOTIFY_MAX_ATTEMPTS,
+    NOTIFY_OUTBOX_RETENTION,
+    NOTIFY_MAX_WORKERS,
+    JOB_DISPATCH_INTERVAL
+)
+from utils import notify
+from utils.sqlite_utils import get_connection
+
+
+# 通知和单个渠道投递的状态常量
+class DeliveryStatus:
+    PENDING = 'pending'
+    SENDING = 'sending'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'  # 渠道已被移除，不再投递
+
+    # 已结束（不会再投递）的状态
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class NotifyOutbox:
+    """
+    基于 SQLite 的通知发件箱，所有 worker 进程共享同一个文件
+
+    通知先写入发件箱再由 OutboxDispatcher 投递，每个渠道一条投递记录，各自重试：
+    - 通知 ID 即幂等键，同一个键重复写入只保留第一次
+    - 渠道投递失败后按指数退避重试，超过最大次数后标记为失败
+    - 投递中的进程崩溃后，租约过期的记录会被其他进程重新领取
+    - 每次投递尝试都会记录，可通过 get 查询
+    """
+
+    # 投递租约时长（秒），超过后视为投递者已崩溃
+    LEASE_SECONDS = 120
+
+    def __init__(
+            self,
+            path: str,
+            retry_base: float = NOTIFY_RETRY_BASE,
+            retry_max: float = NOTIFY_RETRY_MAX,
+            max_attempts: int = NOTIFY_MAX_ATTEMPTS
+    ):
+        """
+        初始化发件箱
+
+        Args:
+            path: SQLite 文件路径
+            retry_base: 第一次重试前的等待时间（秒），之后每次翻倍
+            retry_max: 单次重试等待时间的上限（秒）
+            max_attempts: 每个渠道的最大投递次数
+        """
+        self.path = path
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max(max_attempts, 1)
+        self.logger = logging.getLogger('docker-hooks')
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notify_messages (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notify_deliveries (
+                message_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                owner TEXT,
+                lease_until REAL,
+                last_error TEXT,
+                delivered_at REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (message_id, channel)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS notify_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                attempt INTEGER NOT NULL,
+                success INTEGER NOT NULL,
+                error TEXT,
+                started_at REAL NOT NULL,
+                duration REAL NOT NULL
+            )
+            """
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_deliveries_due ON notify_deliveries (status, next_attempt_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_attempts_message ON notify_attempts (message_id)')
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    def backoff(self, attempts: int) -> float:
+        """
+        计算第 attempts 次失败后的重试等待时间（秒），带 ±20% 的随机抖动
+
+        Args:
+            attempts: 已失败的次数
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        delay = min(self.retry_base * (2 ** max(attempts - 1, 0)), self.retry_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def enqueue(self, title: str, content: str, key: Optional[str] = None) -> Optional[str]:
+        """
+        写入一条通知，每个当前启用的渠道生成一条投递记录
+
+        Args:
+            title: 通知标题
+            content: 通知内容
+            key: 可选，幂等键，相同的键只会写入一次；默认随机生成
+
+        Returns:
+            Optional[str]: 通知ID（即幂等键）；不需要推送（内容为空、标题被跳过或没有渠道）时返回 None
+        """
+        message_id = key or uuid.uuid4().hex
+        if self._exists(message_id):
+            self.logger.info(f"通知已在发件箱中，忽略重复写入: message_id={message_id}")
+            return message_id
+
+        prepared = notify.prepare(title, content)
+        if not prepared:
+            return None
+        content, channels = prepared
+
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO notify_messages (id, title, content, status, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (message_id, title, content, DeliveryStatus.PENDING, now, now)
+            )
+            if cursor.rowcount:
+                conn.executemany(
+                    'INSERT INTO notify_deliveries (message_id, channel, status, next_attempt_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(message_id, channel, DeliveryStatus.PENDING, now, now) for channel in channels]
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self.logger.info(f"通知已写入发件箱: message_id={message_id}, 渠道 {', '.join(channels)}")
+        return message_id
+
+    def _exists(self, message_id: str) -> bool:
+        row = self._conn().execute('SELECT 1 FROM notify_messages WHERE id = ?', (message_id,)).fetchone()
+        return row is not None
+
+    def claim(self, owner: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        领取到期的投递记录，租约已过期的投递中记录也会被重新领取
+
+        Args:
+            owner: 领取者标识
+            limit: 最多领取的数量
+
+        Returns:
+            List[Dict[str, Any]]: 投递记录，包含通知标题和内容
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                """
+                SELECT d.message_id, d.channel, d.attempts, m.title, m.content
+                FROM notify_deliveries d JOIN notify_messages m ON m.id = d.message_id
+                WHERE (d.status = ? AND d.next_attempt_at <= ?) OR (d.status = ? AND d.lease_until < ?)
+                ORDER BY d.next_attempt_at
+                LIMIT ?
+                """,
+                (DeliveryStatus.PENDING, now, DeliveryStatus.SENDING, now, limit)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE notify_deliveries SET status = ?, owner = ?, lease_until = ?, updated_at = ? '
+                'WHERE message_id = ? AND channel = ?',
+                [(DeliveryStatus.SENDING, owner, now + self.LEASE_SECONDS, now, row['message_id'], row['channel'])
+                 for row in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [dict(row) for row in rows]
+
+    def record(
+            self,
+            delivery: Dict[str, Any],
+            owner: str,
+            success: Optional[bool],
+            error: Optional[str] = None,
+            started_at: Optional[float] = None,
+            retry_at: Optional[float] = None
+    ) -> None:
+        """
+        记录一次投递结果
+
+        Args:
+            delivery: claim 返回的投递记录
+            owner: 领取者标识，只有当前持有者才能提交结果
+            success: 是否成功；None 表示渠道熔断中或配额排队过长未推送，不计入投递次数
+            error: 失败原因
+            started_at: 开始投递的时间戳
+            retry_at: success 为 None 时的下次投递时间
+        """
+        message_id, channel = delivery['message_id'], delivery['channel']
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT attempts FROM notify_deliveries WHERE message_id = ? AND channel = ? AND owner = ? '
+                'AND status = ?',
+                (message_id, channel, owner, DeliveryStatus.SENDING)
+            ).fetchone()
+            if row is None:
+                # 租约已被其他进程接管
+                conn.execute('COMMIT')
+                return
+
+            if success is None:
+                conn.execute(
+                    'UPDATE notify_deliveries SET status = ?, next_attempt_at = ?, lease_until = NULL, updated_at = ? '
+                    'WHERE message_id = ? AND channel = ?',
+                    (DeliveryStatus.PENDING, retry_at or now + self.retry_base, now, message_id, channel)
+                )
+                conn.execute('COMMIT')
+                return
+
+            attempts = row['attempts'] + 1
+            conn.execute(
+                'INSERT INTO notify_attempts (message_id, channel, attempt, success, error, started_at, duration) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (message_id, channel, attempts, int(success), error, started_at or now, now - (started_at or now))
+            )
+            if success:
+                status, next_attempt_at = DeliveryStatus.DONE, now
+            elif attempts >= self.max_attempts:
+                status, next_attempt_at = DeliveryStatus.FAILED, now
+            else:
+                status, next_attempt_at = DeliveryStatus.PENDING, now + self.backoff(attempts)
+            conn.execute(
+                'UPDATE notify_deliveries SET status = ?, attempts = ?, next_attempt_at = ?, lease_until = NULL, '
+                'last_error = ?, delivered_at = ?, updated_at = ? WHERE message_id = ? AND channel = ?',
+                (status, attempts, next_attempt_at, None if success else error, now if success else None, now,
+                 message_id, channel)
+            )
+            self._update_message(conn, message_id, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if status == DeliveryStatus.FAILED:
+            self.logger.error(f"通知投递失败次数超过上限: message_id={message_id}, 渠道 {channel}, {error}")
+        elif status == DeliveryStatus.PENDING:
+            self.logger.warning(
+                f"通知投递失败，{next_attempt_at - now:.0f} 秒后重试: message_id={message_id}, 渠道 {channel}"
+            )
+
+    def cancel(self, delivery: Dict[str, Any], owner: str, reason: str) -> None:
+        """
+        取消一条投递（渠道已不存在），不计入投递次数，也不再重试
+
+        Args:
+            delivery: claim 返回的投递记录
+            owner: 领取者标识，只有当前持有者才能取消
+            reason: 取消原因
+        """
+        message_id, channel = delivery['message_id'], delivery['channel']
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                'UPDATE notify_deliveries SET status = ?, lease_until = NULL, last_error = ?, updated_at = ? '
+                'WHERE message_id = ? AND channel = ? AND owner = ? AND status = ?',
+                (DeliveryStatus.CANCELLED, reason, now, message_id, channel, owner, DeliveryStatus.SENDING)
+            )
+            if cursor.rowcount:
+                self._update_message(conn, message_id, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if cursor.rowcount:
+            self.logger.warning(f"已取消通知投递: message_id={message_id}, 渠道 {channel}, {reason}")
+
+    def _update_message(self, conn, message_id: str, now: float) -> None:
+        # 调用方需处于事务中；所有渠道都结束后更新通知状态，有渠道失败时记为失败
+        statuses = {
+            row['status'] for row in
+            conn.execute('SELECT status FROM notify_deliveries WHERE message_id = ?', (message_id,))
+        }
+        if statuses and statuses <= set(DeliveryStatus.FINISHED):
+            if DeliveryStatus.FAILED in statuses:
+                status = DeliveryStatus.FAILED
+            elif DeliveryStatus.DONE in statuses:
+                status = DeliveryStatus.DONE
+            else:
+                status = DeliveryStatus.CANCELLED
+            conn.execute(
+                'UPDATE notify_messages SET status = ?, updated_at = ? WHERE id = ?', (status, now, message_id)
+            )
+
+    def get(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """
+        查询通知及各渠道的投递记录
+
+        Args:
+            message_id: 通知ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 通知信息；通知不存在时返回 None
+        """
+        conn = self._conn()
+        row = conn.execute('SELECT * FROM notify_messages WHERE id = ?', (message_id,)).fetchone()
+        if row is None:
+            return None
+        deliveries = conn.execute(
+            'SELECT channel, status, attempts, next_attempt_at, last_error, delivered_at FROM notify_deliveries '
+            'WHERE message_id = ? ORDER BY channel',
+            (message_id,)
+        ).fetchall()
+        attempts = conn.execute(
+            'SELECT channel, attempt, success, error, started_at, duration FROM notify_attempts '
+            'WHERE message_id = ? ORDER BY id',
+            (message_id,)
+        ).fetchall()
+        return {
+            'message_id': row['id'],
+            'title': row['title'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'deliveries': [dict(delivery) for delivery in deliveries],
+            'attempts': [dict(attempt, success=bool(attempt['success'])) for attempt in attempts]
+        }
+
+    def recent(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        列出最近的通知
+
+        Args:
+            status: 可选，只列出指定状态的通知
+            limit: 最多返回的数量
+
+        Returns:
+            List[Dict[str, Any]]: 通知ID、标题、状态和时间，按创建时间倒序
+        """
+        query = 'SELECT id, title, status, created_at, updated_at FROM notify_messages'
+        params: tuple = ()
+        if status:
+            query += ' WHERE status = ?'
+            params = (status,)
+        rows = self._conn().execute(query + ' ORDER BY created_at DESC LIMIT ?', params + (limit,)).fetchall()
+        return [
+            {'message_id': row['id'], 'title': row['title'], 'status': row['status'],
+             'created_at': row['created_at'], 'updated_at': row['updated_at']}
+            for row in rows
+        ]
+
+    def prune(self, retention: float = NOTIFY_OUTBOX_RETENTION) -> int:
+        """
+        删除已结束且超过保留时长的通知
+
+        Args:
+            retention: 保留时长（秒）
+
+        Returns:
+            int: 删除的通知数量
+        """
+        conn = self._conn()
+        cutoff = time.time() - retention
+        placeholders = ', '.join('?' * len(DeliveryStatus.FINISHED))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            ids = [
+                row['id'] for row in conn.execute(
+                    f'SELECT id FROM notify_messages WHERE status IN ({placeholders}) AND updated_at < ?',
+                    DeliveryStatus.FINISHED + (cutoff,)
+                )
+            ]
+            for table, column in (('notify_attempts', 'message_id'), ('notify_deliveries', 'message_id'),
+                                  ('notify_messages', 'id')):
+                conn.executemany(f'DELETE FROM {table} WHERE {column} = ?', [(message_id,) for message_id in ids])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(ids)
+
+
+class OutboxDispatcher:
+    """发件箱投递器，在每个 worker 进程中以守护线程运行，推送本身在通知线程池中进行"""
+
+    # 清理过期通知的间隔（秒）
+    PRUNE_INTERVAL = 3600
+    # 因渠道配额排队的最长时间（秒），需明显小于投递租约；超过时放回发件箱，到有配额时再领取
+    MAX_QUEUE_WAIT = NotifyOutbox.LEASE_SECONDS / 2
+
+    def __init__(
+            self,
+            outbox: NotifyOutbox,
+            interval: float = JOB_DISPATCH_INTERVAL,
+            batch_size: int = NOTIFY_MAX_WORKERS,
+            max_in_flight: int = NOTIFY_MAX_WORKERS * 4
+    ):
+        """
+        初始化投递器
+
+        Args:
+            outbox: 通知发件箱
+            interval: 空闲时的轮询间隔（秒）
+            batch_size: 每次领取的投递记录数
+            max_in_flight: 当前进程中同时进行（包括排队等待配额）的投递数上限
+        """
+        self.outbox = outbox
+        self.interval = interval
+        self.batch_size = max(batch_size, 1)
+        self.max_in_flight = max(max_in_flight, 1)
+        self.logger = logging.getLogger('docker-hooks')
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._thread = None
+        self._pid = None
+        self._pruned_at = 0.0
+
+    @property
+    def owner(self) -> str:
+        return f"{os.getpid()}-{threading.get_ident()}"
+
+    def start(self) -> None:
+        """启动投递线程（fork 后的子进程中会重新启动）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if self._pid != os.getpid():
+            self._in_flight = 0
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='OutboxDispatcher', daemon=True)
+        self._thread.start()
+        self.logger.info(f"通知投递器已启动: pid={self._pid}")
+
+    def notify(self) -> None:
+        """唤醒投递线程，立即处理新写入的通知"""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                free = self.max_in_flight - self._in_flight
+            deliveries = []
+            if free > 0:
+                try:
+                    deliveries = self.outbox.claim(self.owner, min(self.batch_size, free))
+                except Exception:
+                    self.logger.exception("领取通知投递记录时出错")
+
+            if not deliveries:
+                if free > 0:
+                    self._maybe_prune()
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+                continue
+
+            self._deliver(deliveries)
+
+    def _deliver(self, deliveries: List[Dict[str, Any]]) -> None:
+        # 推送提交后不等待结果，结果在回调中记录；进行中的推送数量受 max_in_flight 限制，
+        # 排队等待配额的渠道不会阻塞其他渠道的投递
+        owner = self.owner
+        for delivery in deliveries:
+            if not notify.is_enabled(delivery['channel']):
+                # 渠道已在重新加载配置时移除，重试也不会成功
+                try:
+                    self.outbox.cancel(delivery, owner, '渠道已移除')
+                except Exception:
+                    self.logger.exception(f"取消通知投递时出错: message_id={delivery['message_id']}")
+                continue
+            started_at = time.time()
+            try:
+                future = notify.deliver_async(
+                    delivery['channel'], delivery['title'], delivery['content'], max_wait=self.MAX_QUEUE_WAIT
+                )
+            except Exception as e:
+                self._record(delivery, owner, False, str(e), started_at)
+                continue
+            with self._lock:
+                self._in_flight += 1
+            future.add_done_callback(functools.partial(self._on_done, delivery, owner, started_at))
+
+    def _on_done(self, delivery: Dict[str, Any], owner: str, started_at: float, future: Future) -> None:
+        try:
+            try:
+                success = future.result()
+            except Exception as e:
+                self._record(delivery, owner, False, str(e), started_at)
+                return
+            if success is None:
+                # 渠道熔断中或配额排队过长，不计入投递次数；半开状态下试探请求尚未结束时 next_available 为当前时间，
+                # 至少等待一个轮询间隔，避免反复领取
+                retry_at = max(notify.next_available(delivery['channel']), time.time() + self.interval)
+                self._record(delivery, owner, None, retry_at=retry_at)
+            else:
+                state = notify.circuit_states().get(delivery['channel'], {})
+                error = None if success else state.get('last_error') or '推送失败'
+                self._record(delivery, owner, success, error, started_at)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wakeup.set()
+
+    def _record(
+            self,
+            delivery: Dict[str, Any],
+            owner: str,
+            success: Optional[bool],
+            error: Optional[str] = None,
+            started_at: Optional[float] = None,
+            retry_at: Optional[float] = None
+    ) -> None:
+        try:
+            self.outbox.record(delivery, owner, success, error, started_at, retry_at)
+        except Exception:
+            self.logger.exception(f"记录通知投递结果时出错: message_id={delivery['message_id']}")
+
+    def _maybe_prune(self) -> None:
+        if time.time() - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = time.time()
+        try:
+            removed = self.outbox.prune()
+            if removed:
+                self.logger.info(f"已清理 {removed} 条过期通知")
+        except Exception:
+            self.logger.exception("清理过期通知时出错")
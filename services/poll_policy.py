@@ -0,0 +1,192 @@
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from config.constants import (
+    DEPLOY_POLL_MIN_INTERVAL,
+    DEPLOY_POLL_MAX_INTERVAL,
+    DEPLOY_POLL_BACKOFF,
+    DEPLOY_POLL_DEADLINE
+)
+from utils.sqlite_utils import get_connection
+
+
+def parse_render_time(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Render 返回的 ISO 8601 时间
+
+    Args:
+        value: 形如 2024-01-01T00:00:00.000Z 的时间字符串
+
+    Returns:
+        Optional[float]: UNIX 时间戳；无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class BuildHistory:
+    """各服务历史部署耗时的滑动平均，基于 SQLite 在所有 worker 进程间共享"""
+
+    # 指数加权平均的权重，越大越偏向最近一次部署
+    ALPHA = 0.3
+
+    def __init__(self, path: str):
+        """
+        初始化部署耗时记录
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = path
+        self.logger = logging.getLogger('docker-hooks')
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS build_history (
+                service_id TEXT PRIMARY KEY,
+                avg_seconds REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    def expected_duration(self, service_id: str) -> Optional[float]:
+        """
+        获取服务的预期部署耗时
+
+        Returns:
+            Optional[float]: 预期耗时（秒）；没有历史记录时返回 None
+        """
+        row = self._conn().execute(
+            'SELECT avg_seconds FROM build_history WHERE service_id = ?', (service_id,)
+        ).fetchone()
+        return row['avg_seconds'] if row else None
+
+    def record(self, service_id: str, seconds: float) -> None:
+        """
+        记录一次成功部署的耗时
+
+        Args:
+            service_id: 服务ID
+            seconds: 部署耗时（秒）
+        """
+        if seconds <= 0:
+            return
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT avg_seconds, samples FROM build_history WHERE service_id = ?', (service_id,)
+            ).fetchone()
+            if row:
+                avg = self.ALPHA * seconds + (1 - self.ALPHA) * row['avg_seconds']
+                samples = row['samples'] + 1
+            else:
+                avg, samples = seconds, 1
+            conn.execute(
+                'INSERT OR REPLACE INTO build_history (service_id, avg_seconds, samples, updated_at) '
+                'VALUES (?, ?, ?, ?)',
+                (service_id, avg, samples, time.time())
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.logger.info(f"记录部署耗时: service_id={service_id}, 本次 {int(seconds)} 秒, 平均 {int(avg)} 秒")
+
+
+class PollPolicy:
+    """
+    部署状态轮询策略
+
+    - 首次检查安排在历史平均耗时的 EARLY_FACTOR 倍处，没有历史记录时使用最小间隔
+    - 之后的间隔从最小间隔开始按指数退避增长，不超过最大间隔
+    - 从触发部署起超过总时限后放弃检查
+    """
+
+    # 首次检查相对于预期耗时提前的比例
+    EARLY_FACTOR = 0.8
+
+    def __init__(
+            self,
+            history: Optional[BuildHistory] = None,
+            min_interval: float = DEPLOY_POLL_MIN_INTERVAL,
+            max_interval: float = DEPLOY_POLL_MAX_INTERVAL,
+            backoff: float = DEPLOY_POLL_BACKOFF,
+            deadline: float = DEPLOY_POLL_DEADLINE
+    ):
+        """
+        初始化轮询策略
+
+        Args:
+            history: 可选，历史部署耗时记录
+            min_interval: 最小检查间隔（秒）
+            max_interval: 最大检查间隔（秒）
+            backoff: 间隔的指数退避倍数
+            deadline: 检查总时限（秒）
+        """
+        self.history = history
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.deadline = deadline
+        self.logger = logging.getLogger('docker-hooks')
+
+    def expected_duration(self, service_id: str) -> Optional[float]:
+        """获取服务的预期部署耗时，读取失败时返回 None"""
+        if not self.history:
+            return None
+        try:
+            return self.history.expected_duration(service_id)
+        except Exception as e:
+            self.logger.warning(f"读取部署耗时记录失败: {str(e)}")
+            return None
+
+    def record_duration(self, service_id: str, seconds: float) -> None:
+        """记录一次成功部署的耗时，写入失败时只记录日志"""
+        if not self.history:
+            return
+        try:
+            self.history.record(service_id, seconds)
+        except Exception as e:
+            self.logger.warning(f"写入部署耗时记录失败: {str(e)}")
+
+    def first_delay(self, expected: Optional[float]) -> float:
+        """
+        计算触发部署后首次检查的等待时间
+
+        Args:
+            expected: 预期部署耗时（秒）
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        if expected:
+            return min(max(self.min_interval, expected * self.EARLY_FACTOR), self.deadline)
+        return self.min_interval
+
+    def next_delay(self, attempts: int, elapsed: float) -> Optional[float]:
+        """
+        计算下一次检查的等待时间
+
+        Args:
+            attempts: 已经检查的次数
+            elapsed: 从触发部署起经过的时间（秒）
+
+        Returns:
+            Optional[float]: 等待时间（秒）；超过总时限时返回 None
+        """
+        remaining = self.deadline - elapsed
+        if remaining <= 0:
+            return None
+        delay = min(self.max_interval, self.min_interval * (self.backoff ** max(attempts - 1, 0)))
+        return min(delay, remaining)
@@ -1,11 +1,110 @@
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, NamedTuple, Optional, Tuple
+
+_EMPTY = MappingProxyType({})
+
+
+class ProjectSnapshot(NamedTuple):
+    """某一时刻的全部项目配置，创建后不再修改，重新加载时整体替换"""
+    projects: Mapping[str, Mapping[str, str]]
+    names: Tuple[str, ...]
+    version: int
+    loaded_at: float
+
+    @classmethod
+    def build(cls, project_config: Mapping[str, Mapping[str, str]], version: int) -> 'ProjectSnapshot':
+        """
+        根据项目配置构建只读快照
+
+        Args:
+            project_config: 项目标识 -> 配置项
+            version: 快照版本号，每次重新加载加 1
+
+        Returns:
+            ProjectSnapshot: 按项目标识索引的只读快照
+        """
+        projects = MappingProxyType({
+            project: MappingProxyType(dict(config)) for project, config in project_config.items()
+        })
+        return cls(projects, tuple(sorted(projects)), version, time.time())
+
+
 class ProjectService:
-    def __init__(self, project_config):
-        self.project_config = project_config
+    """
+    项目配置服务
+
+    项目配置保存在按项目标识索引的只读快照中，重新加载时先构建新快照再整体替换引用：
+    读取方不需要加锁，总是拿到一个完整的快照，进行中的部署继续使用开始时读取的配置。
+    配置了 loader 时可以调用 reload() 重新加载，通常由 ConfigReloader 在项目配置文件变化时调用。
+    """
+
+    def __init__(
+            self,
+            project_config: Mapping[str, Mapping[str, str]],
+            loader: Optional[Callable[[], Dict[str, Dict[str, str]]]] = None
+    ):
+        """
+        初始化项目服务
+
+        Args:
+            project_config: 初始的项目配置
+            loader: 重新加载时调用，返回新的项目配置，配置无效时抛出 ValueError
+        """
+        self.loader = loader
+        self.logger = logging.getLogger('docker-hooks')
+        self._snapshot = ProjectSnapshot.build(project_config, 1)
+        self._reload_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> ProjectSnapshot:
+        """当前的项目配置快照"""
+        return self._snapshot
 
     def is_valid_project(self, project):
         """检查项目是否有效"""
-        return project in self.project_config
+        return project in self._snapshot.projects
+
+    def get_project_config(self, project) -> Mapping[str, str]:
+        """获取项目配置，项目不存在时返回空映射"""
+        return self._snapshot.projects.get(project, _EMPTY)
+
+    def names(self) -> Tuple[str, ...]:
+        """所有项目标识（已排序）"""
+        return self._snapshot.names
+
+    def reload(self) -> bool:
+        """
+        重新加载项目配置，新配置无效时保留当前配置
+
+        Returns:
+            bool: 是否替换了项目配置
+        """
+        if self.loader is None:
+            return False
+        with self._reload_lock:
+            try:
+                project_config = self.loader()
+            except Exception as e:
+                self.logger.error(f"重新加载项目配置失败，继续使用当前配置: {str(e)}")
+                return False
+
+            current = self._snapshot
+            added = sorted(set(project_config) - set(current.projects))
+            removed = sorted(set(current.projects) - set(project_config))
+            changed = sorted(
+                project for project, config in project_config.items()
+                if project in current.projects and dict(current.projects[project]) != dict(config)
+            )
+            if not (added or removed or changed):
+                self.logger.info("项目配置没有变化")
+                return False
 
-    def get_project_config(self, project):
-        """获取项目配置"""
-        return self.project_config.get(project, {})
+            self._snapshot = ProjectSnapshot.build(project_config, current.version + 1)
+            self.logger.info(
+                f"项目配置已重新加载: 版本 {self._snapshot.version}, 共 {len(project_config)} 个项目, "
+                f"新增 {added}, 移除 {removed}, 修改 {changed}"
+            )
+            return True
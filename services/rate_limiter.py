@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+from config.constants import (
+    RENDER_RATE_LIMIT,
+    RENDER_RATE_BURST,
+    RENDER_RATE_LIMIT_MAX_WAIT
+)
+from utils.metrics import RENDER_RATE_LIMIT_WAIT
+from utils.sqlite_utils import get_connection
+
+
+# 请求优先级常量
+class RatePriority:
+    HIGH = 'high'  # 触发部署
+    LOW = 'low'  # 状态查询、服务列表等
+
+
+class RateLimitedError(Exception):
+    """在最长等待时间内没有拿到 Render API 配额"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 秒数或 HTTP 日期
+
+    Returns:
+        Optional[float]: 需要等待的秒数；无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value.split(',')[0].strip())
+        except ValueError:
+            continue
+    return None
+
+
+class RenderRateLimiter:
+    """
+    Render API 的客户端限流器
+
+    每个 API 密钥一个令牌桶，保存在 SQLite 中由所有 worker 进程共享：
+    - 发送请求前获取令牌，没有令牌时排队等待而不是直接失败
+    - 根据响应中的 Ratelimit-Remaining/Ratelimit-Reset 校正令牌数，收到 429 时按 Retry-After 暂停整个密钥
+    - 有触发部署请求在排队时，状态查询让出令牌
+    """
+
+    # 排队时单次休眠上限（秒），保证能及时看到其他进程释放的配额和高优先级请求
+    POLL_INTERVAL = 0.5
+    # 收到 429 但没有 Retry-After 时的默认暂停时长（秒）
+    DEFAULT_RETRY_AFTER = 10
+
+    def __init__(
+            self,
+            path: str,
+            rate_per_minute: float = RENDER_RATE_LIMIT,
+            burst: int = RENDER_RATE_BURST,
+            max_wait: float = RENDER_RATE_LIMIT_MAX_WAIT
+    ):
+        """
+        初始化限流器
+
+        Args:
+            path: SQLite 文件路径
+            rate_per_minute: 每个 API 密钥每分钟的请求数，0 表示不限流
+            burst: 令牌桶容量
+            max_wait: 单个请求排队的最长时间（秒）
+        """
+        self.path = path
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.max_wait = max_wait
+        self.logger = logging.getLogger('docker-hooks')
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                high_until REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用限流"""
+        return self.rate > 0
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    @staticmethod
+    def _key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+    def _load(self, conn, key: str, now: float):
+        # 调用方需处于事务中；返回补充后的令牌数和暂停信息
+        row = conn.execute(
+            'SELECT tokens, updated_at, blocked_until, high_until FROM rate_buckets WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return float(self.burst), 0.0, 0.0
+        tokens = min(float(self.burst), row['tokens'] + max(now - row['updated_at'], 0) * self.rate)
+        return tokens, row['blocked_until'], row['high_until']
+
+    def _save(self, conn, key: str, now: float, tokens: float, blocked_until: float, high_until: float) -> None:
+        conn.execute(
+            'INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at, blocked_until, high_until) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, tokens, now, blocked_until, high_until)
+        )
+
+    def _try_take(self, key: str, priority: str) -> float:
+        """尝试取出一个令牌，成功返回 0，否则返回建议的等待时间（秒）"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, blocked_until, high_until = self._load(conn, key, now)
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif priority != RatePriority.HIGH and now < high_until:
+                wait = self.POLL_INTERVAL
+            elif tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            if priority == RatePriority.HIGH and wait > 0:
+                # 登记排队中的高优先级请求，过期时间之后自动失效，进程退出不会残留
+                high_until = max(high_until, now + wait + self.POLL_INTERVAL * 2)
+            self._save(conn, key, now, tokens, blocked_until, high_until)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire(self, api_key: str, priority: str = RatePriority.LOW, deadline: Optional[float] = None) -> float:
+        """
+        获取一次请求配额，没有配额时阻塞等待
+
+        Args:
+            api_key: Render API 密钥
+            priority: 请求优先级
+            deadline: 可选，最晚等待到的时间戳，默认为当前时间加 max_wait
+
+        Returns:
+            float: 实际等待的时间（秒）
+
+        Raises:
+            RateLimitedError: 在截止时间前没有拿到配额
+        """
+        if not self.enabled:
+            return 0.0
+        key = self._key(api_key)
+        start = time.time()
+        deadline = deadline if deadline is not None else start + self.max_wait
+        logged = False
+        while True:
+            wait = self._try_take(key, priority)
+            now = time.time()
+            if wait <= 0:
+                waited = now - start
+                RENDER_RATE_LIMIT_WAIT.labels(priority=priority).observe(waited)
+                return waited
+            if now >= deadline:
+                RENDER_RATE_LIMIT_WAIT.labels(priority=priority).observe(now - start)
+                raise RateLimitedError(f"等待 Render API 配额超过 {int(now - start)} 秒")
+            if not logged:
+                self.logger.info(f"Render API 配额不足，排队等待约 {wait:.1f} 秒 (优先级 {priority})")
+                logged = True
+            time.sleep(min(wait, self.POLL_INTERVAL, deadline - now))
+
+    def observe(self, api_key: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        根据响应校正令牌桶
+
+        Args:
+            api_key: Render API 密钥
+            status_code: 响应状态码
+            headers: 响应头
+        """
+        if not self.enabled:
+            return
+        remaining = _header(headers, 'Ratelimit-Remaining', 'X-RateLimit-Remaining')
+        reset = _header(headers, 'Ratelimit-Reset', 'X-RateLimit-Reset')
+        if reset is not None and reset > 1e9:
+            reset = max(reset - time.time(), 0.0)  # 部分实现返回的是时间戳
+        retry_after = parse_retry_after(headers.get('Retry-After')) if status_code == 429 else None
+        if status_code != 429 and remaining is None:
+            return
+
+        key = self._key(api_key)
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, blocked_until, high_until = self._load(conn, key, now)
+            if remaining is not None:
+                tokens = min(tokens, remaining)
+            pause = None
+            if status_code == 429:
+                tokens = 0.0
+                pause = retry_after if retry_after is not None else (reset or self.DEFAULT_RETRY_AFTER)
+            elif remaining is not None and remaining < 1 and reset:
+                pause = reset
+            if pause is not None:
+                blocked_until = max(blocked_until, now + pause)
+            self._save(conn, key, now, tokens, blocked_until, high_until)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if status_code == 429:
+            self.logger.warning(f"Render API 返回 429，暂停该 API 密钥的请求 {pause:.0f} 秒")
@@ -0,0 +1,181 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.constants import (
+    RENDER_POOL_SIZE,
+    RENDER_CONNECT_TIMEOUT,
+    RENDER_READ_TIMEOUT,
+    RENDER_MAX_RETRIES,
+    RENDER_RETRY_BACKOFF,
+    RENDER_RETRY_BACKOFF_MAX
+)
+from services.rate_limiter import RatePriority, RenderRateLimiter, parse_retry_after
+from utils.metrics import RENDER_API_LATENCY, RENDER_API_REQUESTS
+
+
+class RenderClient:
+    """
+    Render API 的 HTTP 客户端
+
+    每个进程持有一个带连接池的 requests.Session，复用到 api.render.com 的 keep-alive 连接；
+    所有请求都带有连接/读取超时，GET 请求在 5xx 和连接错误时按带抖动的指数退避进行有限次重试，
+    POST 请求（触发部署）只在连接超时时重试。
+    配置了限流器时，每次请求前先获取该 API 密钥的配额，429 响应会暂停该密钥并排队重试，不计入重试次数。
+    """
+
+    def __init__(
+            self,
+            pool_size: int = RENDER_POOL_SIZE,
+            connect_timeout: float = RENDER_CONNECT_TIMEOUT,
+            read_timeout: float = RENDER_READ_TIMEOUT,
+            max_retries: int = RENDER_MAX_RETRIES,
+            backoff: float = RENDER_RETRY_BACKOFF,
+            backoff_max: float = RENDER_RETRY_BACKOFF_MAX,
+            rate_limiter: Optional[RenderRateLimiter] = None
+    ):
+        """
+        初始化 RenderClient
+
+        Args:
+            pool_size: 每个进程的连接池大小
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取响应超时（秒）
+            max_retries: 最大重试次数
+            backoff: 重试退避基数（秒）
+            backoff_max: 单次重试退避上限（秒）
+            rate_limiter: 可选，按 API 密钥共享的限流器
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.logger = logging.getLogger('docker-hooks')
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    @property
+    def session(self) -> requests.Session:
+        """当前进程的 Session，fork 后在子进程中重新创建，避免共享父进程的套接字"""
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def _sleep_before_retry(self, attempt: int, minimum: float = 0) -> None:
+        # full jitter: 在 [0, min(上限, 基数 * 2^attempt)] 之间随机等待
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+        time.sleep(max(delay, minimum))
+
+    def request(
+            self,
+            method: str,
+            url: str,
+            api_key: str,
+            params: Optional[Dict[str, Any]] = None,
+            endpoint: str = 'other',
+            priority: Optional[str] = None
+    ) -> requests.Response:
+        """
+        发送 Render API 请求
+
+        GET 请求在 5xx、连接错误和超时时重试；POST 请求只在连接超时（请求未发出）和 429 时重试，
+        5xx 和读取超时时服务端可能已经创建了部署，重试会重复触发部署，直接返回给调用方。
+        429 表示请求未被处理，GET 和 POST 都会等待配额后重试。
+
+        Args:
+            method: HTTP 方法
+            url: 完整请求地址
+            api_key: Render API 密钥
+            params: 可选，查询参数
+            endpoint: 指标中使用的接口名称，如 services、deploys、custom-domains
+            priority: 可选，限流优先级，默认 POST 为高优先级、GET 为低优先级
+
+        Returns:
+            requests.Response: 最后一次请求的响应
+
+        Raises:
+            requests.RequestException: 重试次数用尽后仍然失败
+            RateLimitedError: 在最长等待时间内没有拿到配额
+        """
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json"
+        }
+        method = method.upper()
+        idempotent = method == 'GET'
+        limiter = self.rate_limiter if self.rate_limiter and self.rate_limiter.enabled else None
+        if priority is None:
+            priority = RatePriority.LOW if idempotent else RatePriority.HIGH
+        deadline = time.time() + limiter.max_wait if limiter else None
+
+        attempt = 0
+        while True:
+            if limiter:
+                limiter.acquire(api_key, priority, deadline)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._observe(endpoint, method, 'error', start)
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                self.logger.warning(f"请求 Render API 出错，准备重试 ({attempt + 1}/{self.max_retries}): {e}")
+            else:
+                self._observe(endpoint, method, str(response.status_code), start)
+                if limiter:
+                    limiter.observe(api_key, response.status_code, response.headers)
+                if response.status_code == 429:
+                    if limiter:
+                        continue  # 限流器已记录 Retry-After，下一轮获取配额时会等待
+                    if attempt >= self.max_retries:
+                        return response
+                    self.logger.warning(f"Render API 返回 429，准备重试 ({attempt + 1}/{self.max_retries})")
+                    self._sleep_before_retry(attempt, parse_retry_after(response.headers.get('Retry-After')) or 0)
+                    attempt += 1
+                    continue
+                retryable = idempotent and response.status_code >= 500
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                self.logger.warning(
+                    f"Render API 返回 {response.status_code}，准备重试 ({attempt + 1}/{self.max_retries})"
+                )
+
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    @staticmethod
+    def _observe(endpoint: str, method: str, status: str, start: float) -> None:
+        RENDER_API_LATENCY.labels(endpoint=endpoint, method=method).observe(time.perf_counter() - start)
+        RENDER_API_REQUESTS.labels(endpoint=endpoint, method=method, status=status).inc()
+
+    def get(
+            self,
+            url: str,
+            api_key: str,
+            params: Optional[Dict[str, Any]] = None,
+            endpoint: str = 'other',
+            priority: Optional[str] = None
+    ) -> requests.Response:
+        """发送 GET 请求"""
+        return self.request('GET', url, api_key, params=params, endpoint=endpoint, priority=priority)
+
+    def post(self, url: str, api_key: str, endpoint: str = 'other') -> requests.Response:
+        """发送 POST 请求"""
+        return self.request('POST', url, api_key, endpoint=endpoint)
@@ -1,18 +1,26 @@
+import fnmatch
+import hashlib
 import logging
 import threading
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from multiprocessing import Process, log_to_stderr  # 添加 log_to_stderr 导入
-from typing import Tuple, Optional, Dict, Any
-
-import requests
+from typing import Tuple, Optional, Dict, Any, List, TYPE_CHECKING
 
 from config.constants import (
-    MAX_DEPLOY_RETRIES,
-    DEPLOY_CHECK_INTERVAL,
-    PREFER_CUSTOM_DOMAIN
+    PREFER_CUSTOM_DOMAIN,
+    RENDER_DEPLOY_CONCURRENCY
 )
-from utils.notify import send
+from services.deploy_poller import DeployJournal, DeployPoller
+from services.notify_digest import DeployResult, NotifyDigest
+from services.poll_policy import PollPolicy
+from services.rate_limiter import RateLimitedError
+from services.render_client import RenderClient
+from utils.lock_utils import update_deploy_status
+from utils.notify import send_async
+
+if TYPE_CHECKING:
+    from services.notify_outbox import OutboxDispatcher
+    from services.service_cache import ServiceCache
 
 logger = logging.getLogger(__name__)
 
@@ -30,18 +38,76 @@ class DeployStatus:
     CANCELLED = 'cancelled'
     DEACTIVATED = 'deactivated'
 
+    # 部署已结束（不会再变化）的状态
+    FINISHED = (LIVE, FAILED, CANCELLED, DEACTIVATED)
+
+
+def parse_service_selectors(service_name: Optional[str]) -> List[str]:
+    """
+    解析项目配置的服务名：逗号分隔的服务名、通配符模式（如 myapp-*）或服务ID（如 srv-xxx）
+
+    Args:
+        service_name: 项目配置的 SERVICE_NAME
+
+    Returns:
+        List[str]: 服务选择器列表，未配置时为空列表
+    """
+    return [item.strip() for item in (service_name or '').split(',') if item.strip()]
+
+
+def select_services(services: List[dict], selectors: List[str]) -> List[dict]:
+    """
+    从 Render 返回的服务列表中选出与任一选择器匹配的服务
+
+    Args:
+        services: get_services 返回的列表，每项包含 service 字典
+        selectors: parse_service_selectors 的结果
+
+    Returns:
+        List[dict]: 匹配的 service 字典，保持 Render 返回的顺序
+    """
+    selected = []
+    for item in services:
+        service_data = item.get('service') or {}
+        name = service_data.get('name') or ''
+        if any(selector == service_data.get('id') or fnmatch.fnmatchcase(name, selector) for selector in selectors):
+            selected.append(service_data)
+    return selected
+
 
 class RenderService:
     """Render 服务的操作封装类"""
 
-    def __init__(self, base_url):
+    def __init__(
+            self,
+            base_url,
+            service_cache: Optional['ServiceCache'] = None,
+            client: Optional[RenderClient] = None,
+            poll_policy: Optional[PollPolicy] = None,
+            outbox_dispatcher: Optional['OutboxDispatcher'] = None,
+            deploy_concurrency: int = RENDER_DEPLOY_CONCURRENCY,
+            deploy_journal: Optional[DeployJournal] = None
+    ):
         """
         初始化 RenderService
 
         Args:
             base_url: Render API 的基础 URL
+            service_cache: 可选，项目到服务的解析缓存
+            client: 可选，Render API 客户端，默认创建带连接池的客户端
+            poll_policy: 可选，部署状态轮询策略
+            outbox_dispatcher: 可选，通知发件箱的投递器，设置后部署通知先写入发件箱再由后台投递
+            deploy_concurrency: 一个项目包含多个服务时，同时触发部署的服务数上限
+            deploy_journal: 可选，进行中部署的持久化记录，设置后 worker 重启不会丢失正在跟踪的部署
         """
         self.base_url = base_url
+        self.service_cache = service_cache
+        self.client = client or RenderClient()
+        self.poll_policy = poll_policy or PollPolicy()
+        self.outbox_dispatcher = outbox_dispatcher
+        self.deploy_concurrency = deploy_concurrency
+        self.deploy_poller = DeployPoller(self, self.poll_policy, journal=deploy_journal)
+        self.notify_digest = NotifyDigest(self._send_single_notification, self._send_summary_notification)
         # 直接使用 docker-hooks logger 而不是创建新的
         self.logger = logging.getLogger('docker-hooks')
 
@@ -61,21 +127,17 @@ class RenderService:
             None: 失败时返回 None
         """
         self.logger.info("正在获取服务列表")
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json"
-        }
 
         # 构建查询参数
         params = {}
         if suspended is not None:
             params['suspended'] = suspended
 
-        response = requests.get(
-            f"{self.base_url}/services",
-            headers=headers,
-            params=params
-        )
+        try:
+            response = self.client.get(f"{self.base_url}/services", api_key, params=params, endpoint='services')
+        except Exception as e:
+            logger.error(f"获取服务列表时出错: {str(e)}")
+            return None
 
         if response.status_code == 200:
             services = response.json()
@@ -98,15 +160,9 @@ class RenderService:
         Returns:
             list[str]: 已验证的自定义域名列表，每个域名都包含 https:// 前缀
         """
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json"
-        }
-
         try:
-            response = requests.get(
-                f"{self.base_url}/services/{service_id}/custom-domains",
-                headers=headers
+            response = self.client.get(
+                f"{self.base_url}/services/{service_id}/custom-domains", api_key, endpoint='custom-domains'
             )
 
             if response.status_code == 200:
@@ -145,18 +201,21 @@ class RenderService:
                 'custom_domains': ['https://domain1.com', 'https://domain2.com']
             }
         """
-        # 获取服务列表
-        services = self.get_services(api_key)
-        if not services:
-            return None
+        # 优先使用缓存的服务信息，避免再次列出所有服务
+        service_info = self.service_cache.get_by_service_id(service_id) if self.service_cache else None
 
-        # 查找指定的服务
-        service_info = None
-        for service in services:
-            service_data = service.get('service')
-            if isinstance(service_data, dict) and service_data.get('id') == service_id:
-                service_info = service_data
-                break
+        if not service_info:
+            # 获取服务列表
+            services = self.get_services(api_key)
+            if not services:
+                return None
+
+            # 查找指定的服务
+            for service in services:
+                service_data = service.get('service')
+                if isinstance(service_data, dict) and service_data.get('id') == service_id:
+                    service_info = service_data
+                    break
 
         if not service_info:
             logger.error(f"未找到服务: {service_id}")
@@ -192,103 +251,84 @@ class RenderService:
             dict: 成功时返回部署信息
             None: 失败时返回 None
         """
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json"
-        }
-        response = requests.post(f"{self.base_url}/services/{service_id}/deploys", headers=headers)
+        try:
+            response = self.client.post(f"{self.base_url}/services/{service_id}/deploys", api_key, endpoint='deploys')
+        except RateLimitedError as e:
+            logger.error(f"触发部署被 Render API 限流: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"触发部署时出错: {str(e)}")
+            return None
+
         if response.status_code == 201:
             return response.json()
         else:
+            if response.status_code == 404 and self.service_cache:
+                # 服务已不存在（被删除或 API 密钥变更），清除缓存
+                self.service_cache.invalidate_service(service_id)
             logger.error(f"触发部署失败: {response.status_code}")
             logger.error(f"响应内容: {response.text}")
             return None
 
-    def check_deploy_status(
-            self,
-            service_id: str,
-            deploy_id: str,
-            api_key: str,
-            max_retries: int = MAX_DEPLOY_RETRIES,
-            interval: int = DEPLOY_CHECK_INTERVAL
-    ) -> Tuple[bool, str, str]:
+    def fetch_deploy_status(self, service_id: str, deploy_id: str, api_key: str) -> Optional[Dict[str, Any]]:
         """
-        检查部署状态，直到部署成功或失败，或达到最大重试次数
+        查询一次部署状态
 
         Args:
             service_id: Render 服务的唯一标识符
             deploy_id: 部署操作的唯一标识符
             api_key: Render API 密钥
-            max_retries: 最大重试次数，默认从配置获取
-            interval: 重试间隔（秒），默认从配置获取
 
         Returns:
-            Tuple[bool, str, str]:
-                - bool: 部署是否成功
-                - str: 部署完成时间（UTC格式），失败时为空字符串
-                - str: 部署状态
+            Optional[Dict[str, Any]]: 部署信息；请求失败时返回 None
         """
-        url = f"{self.base_url}/services/{service_id}/deploys/{deploy_id}"
-        headers = {"Authorization": f"Bearer {api_key}"}
-
-        retries = 0
-        last_status = None
-
-        self.logger.info(f"开始检查部署状态: deploy_id={deploy_id}")
-        self.logger.info(f"最大重试次数: {max_retries}, 检查间隔: {interval}秒")
-
-        while retries < max_retries:
-            try:
-                self.logger.info(f"第 {retries + 1}/{max_retries} 次检查部署状态")
-                response = requests.get(url, headers=headers)
-
-                if response.status_code != 200:
-                    logger.error(f"获取部署状态失败: HTTP {response.status_code}")
-                    logger.error(f"响应内容: {response.text}")
-                    return False, "", "failed"
-
-                deploy_info = response.json()
-                current_status = deploy_info.get("status", "unknown")
-
-                # 记录详细的部署信息
-                self.logger.info(f"部署信息: {deploy_info}")
-
-                # 记录当前状态，即使没有变化
-                self.logger.info(f"当前部署状态: {current_status}")
+        response = self.client.get(
+            f"{self.base_url}/services/{service_id}/deploys/{deploy_id}", api_key, endpoint='deploys'
+        )
+        if response.status_code != 200:
+            logger.error(f"获取部署状态失败: HTTP {response.status_code}")
+            logger.error(f"响应内容: {response.text}")
+            return None
 
-                # 记录状态变化
-                if current_status != last_status:
-                    self.logger.info(f"部署状态从 {last_status} 变更为 {current_status}")
-                    last_status = current_status
+        deploy_info = response.json()
+        self.logger.info(f"部署信息: {deploy_info}")
+        return deploy_info
 
-                finish_time = deploy_info.get("finishedAt", "")
+    def list_deploys(self, service_id: str, api_key: str, limit: int = 20) -> Optional[list]:
+        """
+        列出服务最近的部署
 
-                if current_status == DeployStatus.LIVE:
-                    self.logger.info(f"部署成功完成！总耗时: {retries * interval} 秒")
-                    self.logger.info(f"完成时间: {finish_time}")
-                    return True, finish_time, current_status
+        Args:
+            service_id: Render 服务的唯一标识符
+            api_key: Render API 密钥
+            limit: 返回的部署数量上限（Render 最多支持 100）
 
-                elif current_status in [DeployStatus.FAILED, DeployStatus.CANCELLED, DeployStatus.DEACTIVATED]:
-                    logger.error(f"部署失败！状态: {current_status}")
-                    logger.error(f"总耗时: {retries * interval} 秒")
-                    logger.error(f"完成时间: {finish_time}")
-                    # 记录更多失败细节
-                    if 'errorMessage' in deploy_info:
-                        logger.error(f"错误信息: {deploy_info['errorMessage']}")
-                    return False, finish_time, current_status
+        Returns:
+            Optional[list]: 部署信息列表，按创建时间倒序；请求失败时返回 None
+        """
+        response = self.client.get(
+            f"{self.base_url}/services/{service_id}/deploys",
+            api_key,
+            params={'limit': min(max(limit, 1), 100)},
+            endpoint='deploys'
+        )
+        if response.status_code != 200:
+            logger.error(f"列出部署失败: HTTP {response.status_code}")
+            logger.error(f"响应内容: {response.text}")
+            return None
 
-                retries += 1
-                if retries < max_retries:
-                    self.logger.info(f"等待 {interval} 秒后进行下一次检查...")
-                    time.sleep(interval)
+        return [
+            item['deploy'] if isinstance(item, dict) and 'deploy' in item else item
+            for item in response.json()
+        ]
 
-            except Exception as e:
-                logger.error(f"检查部署状态时发生错误: {str(e)}")
-                return False, "", "failed"
+    def is_deploy_finished(self, status: str) -> bool:
+        """部署是否已结束（成功或失败）"""
+        return status in DeployStatus.FINISHED
 
-        logger.error(f"检查部署状态超时，已达到最大重试次数 {max_retries}")
-        logger.error(f"最后的部署状态: {last_status}")
-        return False, "", last_status or "failed"
+    def is_deploy_live(self, status: str) -> bool:
+        """部署是否成功"""
+        return status == DeployStatus.LIVE
 
     def send_deploy_notification(
             self,  # 添加 self 参数
@@ -298,9 +338,11 @@ class RenderService:
             urls: Optional[Dict[str, Any]] = None,
             finish_time: Optional[str] = None,
             status: str = None
-    ) -> None:
+    ) -> Future:
         """
-        发送部署通知
+        发送部署通知，推送在通知线程池中进行，不阻塞调用方
+
+        启用 NOTIFY_DIGEST_WINDOW 时，同一窗口内的多个部署结果会合并为一条汇总通知。
 
         Args:
             project: 项目名称
@@ -310,6 +352,9 @@ class RenderService:
             finish_time: 部署完成时间，格式为 ISO 8601
             status: 部署状态（live、failed、cancelled）
 
+        Returns:
+            Future: 包含本次结果的通知推送结束后完成；使用发件箱时在通知写入发件箱后完成
+
         Note:
             - URL 显示格式由 PREFER_CUSTOM_DOMAIN 环境变量控制
               - true: 仅显示自定义域名（如果有）
@@ -317,26 +362,43 @@ class RenderService:
             - 时间显示包括部署完成时间（UTC转本地）和通知发送时间（本地）
             - 多个自定义域名使用 | 符号分隔显示
         """
+        result = DeployResult(project, service_name, deploy_id, urls, finish_time, status)
+        return self.notify_digest.add(result)
+
+    def _format_finish_time(self, finish_time: Optional[str]) -> Optional[str]:
+        """将 UTC 的部署完成时间转换为本地时间字符串，无法解析时返回 None"""
+        if not finish_time:
+            return None
+        try:
+            utc_time = datetime.strptime(finish_time, "%Y-%m-%dT%H:%M:%S.%fZ")
+            local_time = utc_time.replace(tzinfo=timezone.utc).astimezone()
+            return local_time.strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            self.logger.warning(f"无法解析部署完成时间: {finish_time}")
+            return None
+
+    def _send_single_notification(self, result: DeployResult) -> Future:
+        """推送单个部署结果的通知"""
         # 构建基本通知内容
         title = "Render 部署通知"
         # 根据状态添加图标
-        status_icon = "✅" if status == "live" else "❌"
+        status_icon = "✅" if result.status == "live" else "❌"
 
         content = (
             f"--- \n\n"
-            f"**项目名**: {project}\n\n"
-            f"**服务名**: {service_name}\n\n"
-            f"**部署状态**: {status_icon} {status}\n\n"
+            f"**项目名**: {result.project}\n\n"
+            f"**服务名**: {result.service_name}\n\n"
+            f"**部署状态**: {status_icon} {result.status}\n\n"
         )
 
         # 添加部署ID（如果有）
-        if deploy_id:
-            content += f"**部署ID**: {deploy_id}\n\n"
+        if result.deploy_id:
+            content += f"**部署ID**: {result.deploy_id}\n\n"
 
         # 添加域名信息（如果有）
-        if urls:
-            custom_domains = urls.get('custom_domains', [])
-            default_url = urls.get('default_url')
+        if result.urls:
+            custom_domains = result.urls.get('custom_domains', [])
+            default_url = result.urls.get('default_url')
 
             if PREFER_CUSTOM_DOMAIN and custom_domains:
                 # 仅显示自定义域名，使用 | 分隔多个域名
@@ -349,36 +411,86 @@ class RenderService:
                     content += f"**自定义域名**: {' | '.join(custom_domains)}\n\n"
 
         # 添加时间信息
-        if finish_time:
-            try:
-                # 将 UTC 时间转换为本地时间
-                utc_time = datetime.strptime(finish_time, "%Y-%m-%dT%H:%M:%S.%fZ")
-                local_time = utc_time.replace(tzinfo=timezone.utc).astimezone()
-                content += f"**部署完成时间**: {local_time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-            except ValueError:
-                self.logger.warning(f"无法解析部署完成时间: {finish_time}")
+        local_time = self._format_finish_time(result.finish_time)
+        if local_time:
+            content += f"**部署完成时间**: {local_time}\n\n"
 
         # 添加通知发送时间
         content += f"**通知时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
-        # 发送通知
-        send(title, content)
+        # 发送通知，同一部署的同一状态只通知一次
+        key = f"deploy:{result.deploy_id}:{result.status}" if result.deploy_id else None
+        return self._notify(title, content, key)
+
+    def _send_summary_notification(self, results: List[DeployResult]) -> Future:
+        """把多个部署结果合并为一张表格推送"""
+        succeeded = sum(1 for result in results if result.status == "live")
+        title = f"Render 部署汇总: {len(results)} 个部署，成功 {succeeded} 个，失败 {len(results) - succeeded} 个"
+
+        rows = [
+            "| 项目名 | 服务名 | 状态 | 域名 | 完成时间 |",
+            "| --- | --- | --- | --- | --- |"
+        ]
+        for result in results:
+            status_icon = "✅" if result.status == "live" else "❌"
+            domains = []
+            if result.urls:
+                custom_domains = result.urls.get('custom_domains', [])
+                default_url = result.urls.get('default_url')
+                if not (PREFER_CUSTOM_DOMAIN and custom_domains) and default_url:
+                    domains.append(default_url)
+                domains.extend(custom_domains)
+            local_time = self._format_finish_time(result.finish_time) or "-"
+            rows.append(
+                f"| {result.project} | {result.service_name} | {status_icon} {result.status} | "
+                f"{' '.join(domains) or '-'} | {local_time} |"
+            )
+
+        content = "\n".join(rows) + f"\n\n**通知时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        deploy_ids = sorted(f"{result.deploy_id}:{result.status}" for result in results if result.deploy_id)
+        key = None
+        if len(deploy_ids) == len(results):
+            key = "digest:" + hashlib.sha256(",".join(deploy_ids).encode('utf-8')).hexdigest()
+        return self._notify(title, content, key)
+
+    def _notify(self, title: str, content: str, key: Optional[str] = None) -> Future:
+        """
+        推送通知：配置了发件箱时写入发件箱并唤醒投递器，否则直接提交到通知线程池
+
+        Args:
+            title: 通知标题
+            content: 通知内容
+            key: 可选，发件箱的幂等键
 
-    def check_deploy_and_notify(
+        Returns:
+            Future: 直接推送时结果为 渠道名 -> 是否成功；写入发件箱时结果为 {'message_id': 通知ID}
+        """
+        if self.outbox_dispatcher is None:
+            return send_async(title, content)
+        try:
+            message_id = self.outbox_dispatcher.outbox.enqueue(title, content, key)
+        except Exception as e:
+            self.logger.error(f"写入通知发件箱失败，直接推送: {str(e)}")
+            return send_async(title, content)
+        if message_id:
+            self.outbox_dispatcher.notify()
+        future = Future()
+        future.set_result({'message_id': message_id})
+        return future
+
+    def complete_deploy(
             self,
             project: str,
             service_name: str,
             service_id: str,
             deploy_id: str,
-            api_key: str
+            api_key: str,
+            deploy_success: bool,
+            finish_time: str,
+            status: str
     ) -> None:
         """
-        检查部署状态并发送通知的后台任务
-
-        此方法会执行以下操作：
-        1. 定期检查部署状态直到完成
-        2. 获取服务的域名信息（包括默认域名和自定义域名）
-        3. 发送包含部署结果、域名信息和时间信息的通知
+        部署结束后获取域名信息并发送通知
 
         Args:
             project: 项目名称，用于日志和通知显示
@@ -386,19 +498,11 @@ class RenderService:
             service_id: Render 服务的唯一标识符
             deploy_id: 部署操作的唯一标识符
             api_key: Render API 密钥
-
-        Note:
-            - 此方法通常在单独的线程中运行
-            - 部署状态检查会根据 MAX_DEPLOY_RETRIES 和 DEPLOY_CHECK_INTERVAL 配置进行重试
-            - 域名显示格式由 PREFER_CUSTOM_DOMAIN 环境变量控制
-            - 如果部署失败，通知中将不包含域名信息
-            - 时间信息包括部署完成时间和通知发送时间
-            - 部署状态
+            deploy_success: 部署是否成功
+            finish_time: 部署完成时间（UTC格式）
+            status: 部署状态
         """
         thread_name = threading.current_thread().name
-        self.logger.info(f"[{thread_name}] 开始检查部署状态: 项目名 {project}, 服务名称 {service_name}")
-
-        deploy_success, finish_time, status = self.check_deploy_status(service_id, deploy_id, api_key)
 
         # 获取服务 URL 信息
         urls = None
@@ -408,7 +512,7 @@ class RenderService:
         else:
             self.logger.error(f"[{thread_name}] 部署{status}: 项目名 {project}, 服务名称 {service_name}")
 
-        # 发送带有 URL 和完成时间的通知
+        # 发送带有 URL 和完成时间的通知，推送在通知线程池中进行，慢渠道不会占用轮询器的线程
         self.send_deploy_notification(
             project=project,
             service_name=service_name,
@@ -418,78 +522,196 @@ class RenderService:
             status=status
         )
 
-        self.logger.info(f"[{thread_name}] 部署状态检查和通知发送完成: 项目名 {project}, 服务名称 {service_name}")
+        self.logger.info(f"[{thread_name}] 部署状态检查完成，通知已提交: 项目名 {project}, 服务名称 {service_name}")
+
+    def _match_services(self, services: List[dict], selectors: List[str]) -> List[dict]:
+        """
+        按服务选择器从服务列表中选出要部署的服务，未配置选择器时部署第一个服务
+
+        Args:
+            services: get_services 返回的列表
+            selectors: parse_service_selectors 的结果
+
+        Returns:
+            List[dict]: 匹配的 service 字典列表
+        """
+        if not services:
+            return []
+        if not selectors:
+            return [services[0].get('service', {})]
+        return select_services(services, selectors)
 
-    def handle_webhook(self, project, api_key):
+    def _resolve_services(self, project: str, api_key: str, service_name: Optional[str] = None):
         """
-        处理 webhook 请求，触发部署并启动状态监控
+        通过服务列表解析项目要部署的服务，并写入缓存
+
+        Args:
+            project: 项目名称
+            api_key: Render API 密钥
+            service_name: 项目配置的服务名，见 parse_service_selectors
+
+        Returns:
+            Tuple[Optional[List[dict]], Optional[dict], int]:
+                - List[dict]: Render 返回的 service 字典列表，失败时为 None
+                - dict: 错误信息，成功时为 None
+                - int: HTTP 状态码，没有与 SERVICE_NAME 匹配的服务时为 404
         """
-        self.logger.info(f"处理 webhook: 项目名 {project}")
+        selectors = parse_service_selectors(service_name)
 
         # 获取未暂停的服务
         services = self.get_services(api_key, suspended=ServiceStatus.NOT_SUSPENDED)
-        if not services:
+        selected = self._match_services(services, selectors)
+        if not selected:
             # 如果没有找到未暂停的服务，检查是否有已暂停的服务
             suspended_services = self.get_services(api_key, suspended=ServiceStatus.SUSPENDED)
-            if suspended_services:
-                service = suspended_services[0]
-                service_data = service.get('service', {})
-                service_name = service_data.get('name', 'unknown')
+            suspended_selected = self._match_services(suspended_services, selectors)
+            if suspended_selected:
+                service_data = suspended_selected[0]
+                suspended_name = service_data.get('name', 'unknown')
                 suspenders = service_data.get('suspenders', [])
 
                 # 根据暂停者类型返回相应的错误信息
                 suspend_reason = "服务已被 Render 管理员暂停" if "admin" in suspenders else "服务已被用户手动暂停"
 
                 return None, {
-                    "error": f"触发部署失败: 项目名 {project}, 服务名称 {service_name}",
+                    "error": f"触发部署失败: 项目名 {project}, 服务名称 {suspended_name}",
                     "details": suspend_reason
                 }, 500
+            elif services:
+                self.logger.error(f"项目 {project} 没有与 {service_name} 匹配的服务")
+                return None, {
+                    "error": f"触发部署失败: 项目名 {project}",
+                    "details": f"没有与 {service_name} 匹配的服务（SERVICE_NAME 可以是逗号分隔的服务名、通配符或服务ID）"
+                }, 404
             else:
                 return None, {
                     "error": f"触发部署失败: 项目名 {project}",
                     "details": "未找到相关服务，请检查 API 密钥是否正确"
                 }, 500
 
-        # 部署第一个服务
-        service = services[0]
-        service_id = service.get('service', {}).get('id')
-        service_name = service.get('service', {}).get('name')
+        if self.service_cache:
+            self.service_cache.set(project, api_key, service_name, selected)
+        return selected, None, 200
 
+    def _deploy_one(self, project: str, api_key: str, service_data: dict) -> Optional[dict]:
+        """
+        触发一个服务的部署并交给轮询器跟踪部署状态
+
+        Returns:
+            Optional[dict]: 部署信息；失败时为 None
+        """
+        service_id = service_data.get('id')
+        service_name = service_data.get('name')
         if not service_id:
             logger.error(f"无法获取服务ID: 项目名 {project}, 服务名称 {service_name}")
-            return None, {
-                "error": f"触发部署失败: 项目名 {project}, 服务名称 {service_name}",
-                "details": "无法获取服务ID"
-            }, 500
+            return None
 
         self.logger.info(f"准备部署服务: 项目名 {project}, 服务名称 {service_name}")
-
         deploy_result = self.trigger_deploy(service_id, api_key)
         if deploy_result:
             deploy_id = deploy_result.get('id')
             self.logger.info(f"新的部署已触发: 项目名 {project}, 服务名称 {service_name}")
 
-            # 启用多进程日志
-            log_to_stderr()
+            # 记录当前部署，并交给进程内的轮询器跟踪部署状态
+            update_deploy_status(project, deploy_id, 'pending')
+            self.deploy_poller.track(project, service_name, service_id, deploy_id, api_key)
+        return deploy_result
 
-            # 使用进程
-            process = Process(
-                target=self.check_deploy_and_notify,
-                name=f"Process-{project}",
-                args=(project, service_name, service_id, deploy_id, api_key)
-            )
-            process.start()
-            self.logger.info(f"后台检查部署状态的进程已启动: 项目名: {project}, 服务名称 {service_name}")
-
-            return {
-                'message': '部署已触发',
-                'project': project,
-                'service_name': service_name,
-                'service_id': service_id,
-                'status': 'pending'
-            }, None, 200
+    def _deploy_services(
+            self,
+            project: str,
+            api_key: str,
+            services: List[dict]
+    ) -> List[Tuple[dict, Optional[dict]]]:
+        """
+        并行触发多个服务的部署，同时进行的请求数不超过 deploy_concurrency
+
+        Returns:
+            List[Tuple[dict, Optional[dict]]]: (service 字典, 部署信息或 None)，顺序与 services 相同
+        """
+        if len(services) <= 1 or self.deploy_concurrency <= 1:
+            return [(service_data, self._deploy_one(project, api_key, service_data)) for service_data in services]
+
+        workers = min(len(services), self.deploy_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Deploy") as executor:
+            deploy_results = list(executor.map(lambda item: self._deploy_one(project, api_key, item), services))
+        return list(zip(services, deploy_results))
+
+    def handle_webhook(self, project, api_key, service_name: Optional[str] = None):
+        """
+        处理 webhook 请求，触发项目所有匹配服务的部署并启动状态监控
+
+        SERVICE_NAME 匹配多个服务时并行触发部署（并发数受 RENDER_DEPLOY_CONCURRENCY 限制），
+        结果合并为一个响应，部分服务失败时状态为 partial。
+        服务解析结果会被缓存，缓存命中时直接触发部署，不再列出服务；
+        如果触发部署返回 404，缓存会被清除，重新解析后部署尚未触发的服务。
+        """
+        self.logger.info(f"处理 webhook: 项目名 {project}")
+
+        services = self.service_cache.get(project, api_key, service_name) if self.service_cache else None
+        from_cache = services is not None
+        if from_cache:
+            service_ids = ', '.join(service_data.get('id') or '' for service_data in services)
+            self.logger.info(f"命中服务缓存: 项目名 {project}, 服务ID {service_ids}")
         else:
-            return None, {
-                "error": f"触发部署失败: 项目名 {project}, 服务名称 {service_name}",
-                "details": "API 调用失败，请检查服务状态"
-            }, 500
+            services, error, status_code = self._resolve_services(project, api_key, service_name)
+            if error:
+                return None, error, status_code
+
+        results = self._deploy_services(project, api_key, services)
+        failed = [service_data for service_data, deploy_result in results if not deploy_result]
+        if failed and from_cache and any(
+                not self.service_cache.get_by_service_id(service_data.get('id')) for service_data in failed
+        ):
+            # 缓存的服务已失效，重新解析后部署尚未触发的服务
+            self.logger.warning(f"缓存的服务已失效，重新解析: 项目名 {project}")
+            resolved, error, status_code = self._resolve_services(project, api_key, service_name)
+            triggered = [(service_data, deploy_result) for service_data, deploy_result in results if deploy_result]
+            if error:
+                if not triggered:
+                    return None, error, status_code
+            else:
+                triggered_ids = {service_data.get('id') for service_data, _ in triggered}
+                retry = [service_data for service_data in resolved if service_data.get('id') not in triggered_ids]
+                results = triggered + self._deploy_services(project, api_key, retry)
+
+        return self._deploy_response(project, results)
+
+    def _deploy_response(self, project: str, results: List[Tuple[dict, Optional[dict]]]):
+        """
+        把各服务的部署结果合并为 handle_webhook 的返回值
+
+        Returns:
+            Tuple[Optional[dict], Optional[dict], int]: 响应、错误信息和状态码
+        """
+        entries = []
+        for service_data, deploy_result in results:
+            entry = {'service_name': service_data.get('name'), 'service_id': service_data.get('id')}
+            if deploy_result:
+                entry.update(deploy_id=deploy_result.get('id'), status='pending')
+            else:
+                details = "API 调用失败，请检查服务状态" if entry['service_id'] else "无法获取服务ID"
+                entry.update(status='failed', error=details)
+            entries.append(entry)
+
+        service_names = ', '.join(str(entry['service_name']) for entry in entries)
+        succeeded = sum(1 for entry in entries if entry['status'] == 'pending')
+        if not succeeded:
+            error = {
+                "error": f"触发部署失败: 项目名 {project}, 服务名称 {service_names}",
+                "details": entries[0]['error'] if len(entries) == 1 else f"{len(entries)} 个服务均触发部署失败"
+            }
+            if len(entries) > 1:
+                error['services'] = entries
+            return None, error, 500
+
+        if succeeded < len(entries):
+            self.logger.warning(f"项目 {project} 部分服务触发部署失败: 成功 {succeeded} 个，共 {len(entries)} 个")
+        return {
+            'message': '部署已触发' if succeeded == len(entries) else f'部分服务部署已触发: 成功 {succeeded} 个，共 {len(entries)} 个',
+            'project': project,
+            'service_name': service_names,
+            'service_id': ', '.join(str(entry['service_id']) for entry in entries),
+            'status': 'pending' if succeeded == len(entries) else 'partial',
+            'services': entries
+        }, None, 200
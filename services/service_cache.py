@@ -0,0 +1,129 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+from config.constants import SERVICE_CACHE_TTL
+from utils.sqlite_utils import get_connection
+
+
+class ServiceCache:
+    """项目到 Render 服务的解析缓存，基于 SQLite 在所有 worker 进程间共享；一个项目可以对应多个服务"""
+
+    def __init__(self, path: str, ttl: int = SERVICE_CACHE_TTL):
+        """
+        初始化服务缓存
+
+        Args:
+            path: SQLite 文件路径
+            ttl: 缓存有效期（秒），小于等于 0 时禁用缓存
+        """
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger('docker-hooks')
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_services (
+                cache_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                service_id TEXT NOT NULL,
+                service TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (cache_key, position)
+            )
+            """
+        )
+        self._conn().execute('CREATE INDEX IF NOT EXISTS idx_project_services_id ON project_services (service_id)')
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    @staticmethod
+    def _make_key(project: str, api_key: str, service_name: Optional[str]) -> str:
+        # API 密钥只以摘要形式参与缓存键，不落盘明文
+        raw = f"{project}\0{api_key}\0{service_name or ''}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, project: str, api_key: str, service_name: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        按项目、API 密钥和服务名查询缓存的服务列表
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Render 返回的 service 字典列表；未命中或已过期时返回 None
+        """
+        if self.ttl <= 0:
+            return None
+        rows = self._conn().execute(
+            'SELECT service FROM project_services WHERE cache_key = ? AND expires_at > ? ORDER BY position',
+            (self._make_key(project, api_key, service_name), time.time())
+        ).fetchall()
+        return [json.loads(row['service']) for row in rows] or None
+
+    def get_by_service_id(self, service_id: str) -> Optional[Dict[str, Any]]:
+        """
+        按服务ID查询缓存的服务信息
+
+        Returns:
+            Optional[Dict[str, Any]]: Render 返回的 service 字典；未命中或已过期时返回 None
+        """
+        if self.ttl <= 0:
+            return None
+        row = self._conn().execute(
+            'SELECT service FROM project_services WHERE service_id = ? AND expires_at > ? LIMIT 1',
+            (service_id, time.time())
+        ).fetchone()
+        return json.loads(row['service']) if row else None
+
+    def set(
+            self,
+            project: str,
+            api_key: str,
+            service_name: Optional[str],
+            services: List[Dict[str, Any]]
+    ) -> None:
+        """
+        写入项目对应的服务列表，替换原有的缓存
+
+        Args:
+            project: 项目名称
+            api_key: Render API 密钥
+            service_name: 项目配置的服务名
+            services: Render 返回的 service 字典列表
+        """
+        services = [service for service in services if service.get('id')]
+        if self.ttl <= 0 or not services:
+            return
+        cache_key = self._make_key(project, api_key, service_name)
+        expires_at = time.time() + self.ttl
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM project_services WHERE cache_key = ?', (cache_key,))
+            conn.executemany(
+                'INSERT INTO project_services (cache_key, position, service_id, service, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (cache_key, position, service['id'], json.dumps(service, ensure_ascii=False), expires_at)
+                    for position, service in enumerate(services)
+                ]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def invalidate_service(self, service_id: str) -> None:
+        """
+        删除包含指定服务ID的所有缓存项（例如触发部署返回 404 时），同一项目的其他服务一并清除
+
+        Args:
+            service_id: 服务ID
+        """
+        cursor = self._conn().execute(
+            'DELETE FROM project_services WHERE cache_key IN '
+            '(SELECT cache_key FROM project_services WHERE service_id = ?)',
+            (service_id,)
+        )
+        if cursor.rowcount:
+            self.logger.info(f"已清除服务缓存: service_id={service_id}")
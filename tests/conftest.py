@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 在导入项目模块之前设置环境变量：config.constants 在导入时读取，状态文件放到临时目录
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['STATE_DIR'] = tempfile.mkdtemp(prefix='docker-hooks-tests-')
+os.environ.setdefault('SECRET_TOKEN', 'test-secret-token')
+os.environ.setdefault('PROJECT__demo__API_KEY', 'demo-key')
+os.environ.setdefault('PROJECT__demo__SERVICE_NAME', 'demo-key-0')
+os.environ['HITOKOTO'] = 'false'
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    return create_app().test_client()
+
+
+@pytest.fixture
+def fake_channel(monkeypatch):
+    """注册一个测试渠道，sent 记录推送内容，results 依次作为推送结果"""
+    from utils import notify
+    sent, results = [], []
+
+    def send(title, content, config):
+        sent.append((title, content))
+        return results.pop(0) if results else True
+
+    monkeypatch.setenv('FAKE_KEY', 'x')
+    notify.register_channel('fake', send, required=('FAKE_KEY',))
+    yield sent, results
+    with notify._specs_lock:
+        notify._channel_specs[:] = [spec for spec in notify._channel_specs if spec.name != 'fake']
+    monkeypatch.delenv('FAKE_KEY')
+    notify.reload_config()
+
+
+@pytest.fixture
+def mock_render():
+    """启动 bench/mock_render.py 中的模拟 Render API，返回 (模拟状态, 基础 URL)"""
+    from bench.mock_render import MockRender, start_server
+    mock = MockRender(build_seconds=0.5)
+    server = start_server(mock)
+    yield mock, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,93 @@
+"""
+测试用的最小 SMTP 服务器，支持 EHLO/AUTH/MAIL/RCPT/DATA/NOOP/RSET/QUIT
+
+记录建立的连接数、登录次数和收到的邮件，可以让 NOOP 失败或拒收指定的收件人。
+"""
+import socketserver
+import threading
+from typing import List, Set
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server: 'FakeSMTPServer' = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 fake-smtp ready')
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250-fake-smtp')
+                self.reply('250 AUTH PLAIN LOGIN')
+            elif verb == 'AUTH':
+                with server.lock:
+                    server.logins += 1
+                self.reply('235 authenticated')
+            elif verb == 'NOOP':
+                if server.fail_noop:
+                    self.reply('421 closing connection')
+                    return
+                self.reply('250 ok')
+            elif verb == 'MAIL':
+                self.reply('250 ok')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in server.reject:
+                    self.reply('550 no such user')
+                else:
+                    self.reply('250 ok')
+            elif verb == 'DATA':
+                self.reply('354 end with .')
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line)
+                with server.lock:
+                    server.messages.append(b''.join(lines))
+                self.reply('250 queued')
+            elif verb == 'RSET':
+                self.reply('250 ok')
+            elif verb == 'QUIT':
+                with server.lock:
+                    server.quits += 1
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('502 not implemented')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.quits = 0
+        self.messages: List[bytes] = []
+        self.reject: Set[str] = set()
+        self.fail_noop = False
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> str:
+        return f'127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'FakeSMTPServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
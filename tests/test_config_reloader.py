@@ -0,0 +1,30 @@
+import os
+import signal
+import threading
+
+from utils.config_reloader import ConfigReloader
+
+
+def test_reloads_when_file_changes_without_sighup_handler(tmp_path):
+    path = os.path.join(tmp_path, 'projects.yaml')
+    with open(path, 'w') as f:
+        f.write('a: 1\n')
+    reloaded = threading.Event()
+    handler = signal.getsignal(signal.SIGHUP)
+
+    reloader = ConfigReloader(interval=0.05)
+    reloader.watch('项目配置', path, reloaded.set)
+    reloader.start()
+    assert signal.getsignal(signal.SIGHUP) is handler
+    assert not reloaded.wait(0.2)
+
+    with open(path, 'w') as f:
+        f.write('a: 2\nb: 3\n')
+    assert reloaded.wait(2)
+
+
+def test_zero_interval_disables_reload(tmp_path):
+    reloader = ConfigReloader(interval=0)
+    reloader.watch('项目配置', os.path.join(tmp_path, 'projects.yaml'), lambda: None)
+    reloader.start()
+    assert reloader._thread is None
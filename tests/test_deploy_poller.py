@@ -0,0 +1,63 @@
+import os
+import threading
+
+from services.deploy_poller import DeployJournal, DeployPoller
+from services.project_service import ProjectService
+from services.render_service import DeployStatus
+
+
+class FakeRender:
+    """只实现轮询器用到的 RenderService 方法"""
+
+    def __init__(self, status='build_in_progress'):
+        self.status = status
+        self.api_keys = []
+        self.completed = []
+        self.done = threading.Event()
+
+    def fetch_deploy_status(self, service_id, deploy_id, api_key):
+        self.api_keys.append(api_key)
+        return {'id': deploy_id, 'status': self.status}
+
+    def is_deploy_finished(self, status):
+        return status in DeployStatus.FINISHED
+
+    def is_deploy_live(self, status):
+        return status == DeployStatus.LIVE
+
+    def complete_deploy(self, project, service_name, service_id, deploy_id, api_key, success, finish_time, status):
+        self.completed.append((project, deploy_id, success))
+        self.done.set()
+
+
+def test_restarted_worker_adopts_in_flight_deploy(tmp_path):
+    journal = DeployJournal(os.path.join(tmp_path, 'jobs.db'))
+    journal.LEASE_SECONDS = 0.3
+    before = DeployPoller(FakeRender(), journal=journal)
+    before.track('demo', 'demo-key-0', 'srv-1', 'dep-1', 'demo-key')
+    # 模拟 worker 退出：租约不再续期
+    before.journal = None
+
+    render = FakeRender(DeployStatus.LIVE)
+    after = DeployPoller(render, journal=journal)
+    after.resume(ProjectService({'demo': {'api_key': 'demo-key'}}))
+
+    assert render.done.wait(5)
+    assert render.completed == [('demo', 'dep-1', True)]
+    assert render.api_keys == ['demo-key']
+    assert journal.adopt('someone-else') == []
+
+
+def test_deploy_of_removed_project_is_dropped(tmp_path):
+    journal = DeployJournal(os.path.join(tmp_path, 'jobs.db'))
+    journal.LEASE_SECONDS = 0.3
+    before = DeployPoller(FakeRender(), journal=journal)
+    before.track('gone', 'gone-0', 'srv-1', 'dep-1', 'gone-key')
+    before.journal = None
+
+    render = FakeRender(DeployStatus.LIVE)
+    after = DeployPoller(render, journal=journal)
+    after.resume(ProjectService({}))
+
+    assert not render.done.wait(1)
+    assert journal.adopt('someone-else') == []
@@ -0,0 +1,85 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from config.constants import DEPLOY_INTERVAL
+from services.notify_outbox import DeliveryStatus, NotifyOutbox, OutboxDispatcher
+from services.poll_policy import PollPolicy
+from services.project_service import ProjectService
+from services.render_service import RenderService
+
+TOKEN = 'test-secret-token'
+
+
+@pytest.fixture
+def app(mock_render, fake_channel, tmp_path):
+    """指向模拟 Render API 的应用，部署通知经发件箱投递到测试渠道"""
+    from app import create_app
+    _, url = mock_render
+    app = create_app()
+    app.outbox_dispatcher = OutboxDispatcher(NotifyOutbox(os.path.join(tmp_path, 'notify.db')), interval=0.05)
+    app.render_service = RenderService(
+        url,
+        poll_policy=PollPolicy(min_interval=0.1, max_interval=0.2),
+        outbox_dispatcher=app.outbox_dispatcher
+    )
+    # 每个测试使用新的项目名，部署锁和部署时间互不影响
+    app.project = f"e2e-{uuid.uuid4().hex[:8]}"
+    app.project_service = ProjectService({app.project: {'api_key': 'demo-key', 'service_name': 'demo-key-0'}})
+    return app
+
+
+def post_webhook(client, project, tag='latest'):
+    return client.post(
+        f"/webhook?token={TOKEN}&project={project}",
+        json={'push_data': {'tag': tag}, 'repository': {'repo_name': 'demo/app'}}
+    )
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def test_webhook_deploys_polls_and_delivers_notification(app, mock_render, fake_channel):
+    mock, _ = mock_render
+    sent, _ = fake_channel
+    client = app.test_client()
+
+    response = post_webhook(client, app.project)
+    assert response.status_code == 200, response.get_json()
+    assert mock.calls['POST deploys'] == 1
+
+    outbox = app.outbox_dispatcher.outbox
+    assert wait_for(lambda: outbox.recent(DeliveryStatus.DONE))
+    message = outbox.get(outbox.recent(DeliveryStatus.DONE)[0]['message_id'])
+    assert [delivery['channel'] for delivery in message['deliveries']] == ['fake']
+    assert len(sent) == 1
+    assert app.project in sent[0][0] + sent[0][1]
+    assert mock.calls['GET deploys'] >= 1
+    assert app.render_service.deploy_poller.in_flight() == 0
+
+
+def test_pushes_during_deploy_interval_merge_into_one_trailing_deploy(app, mock_render):
+    mock, _ = mock_render
+    client = app.test_client()
+    assert post_webhook(client, app.project, 'v1').status_code == 200
+
+    first = post_webhook(client, app.project, 'v2').get_json()
+    second = post_webhook(client, app.project, 'v3').get_json()
+    assert first['status'] == second['status'] == 'scheduled'
+    assert (first['merged'], second['merged']) == (False, True)
+    assert first['job_id'] == second['job_id']
+
+    job = app.job_journal.get(first['job_id'])
+    assert job['kind'] == 'trailing'
+    assert job['status'] == 'pending'
+    assert job['run_at'] == pytest.approx(time.time() + DEPLOY_INTERVAL, abs=5)
+    # 静默期内只触发了一次部署
+    assert mock.calls['POST deploys'] == 1
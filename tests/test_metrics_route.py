@@ -0,0 +1,7 @@
+def test_metrics_requires_token(client):
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics?token=wrong').status_code == 403
+
+    response = client.get('/metrics?token=test-secret-token')
+    assert response.status_code == 200
+    assert b'docker_hooks_' in response.data
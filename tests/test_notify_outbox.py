@@ -0,0 +1,106 @@
+import os
+import time
+
+import pytest
+
+from services.notify_outbox import DeliveryStatus, NotifyOutbox, OutboxDispatcher
+from utils import notify
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return NotifyOutbox(os.path.join(tmp_path, 'notify.db'), retry_base=0, retry_max=0, max_attempts=3)
+
+
+def test_removed_channel_is_cancelled_without_attempts(fake_channel, outbox):
+    sent, _ = fake_channel
+    message_id = outbox.enqueue('部署完成', 'demo')
+    dispatcher = OutboxDispatcher(outbox)
+    deliveries = outbox.claim(dispatcher.owner, 10)
+    assert [d['channel'] for d in deliveries] == ['fake']
+
+    # 配置重新加载后渠道被移除
+    notify.reload_config({'FAKE_KEY': ''})
+    dispatcher._deliver(deliveries)
+
+    message = outbox.get(message_id)
+    assert message['status'] == DeliveryStatus.CANCELLED
+    assert message['deliveries'][0]['status'] == DeliveryStatus.CANCELLED
+    assert message['deliveries'][0]['attempts'] == 0
+    assert message['attempts'] == []
+    assert sent == []
+    assert outbox.claim(dispatcher.owner, 10) == []
+
+
+def test_breaker_refusal_is_rescheduled_without_attempt(fake_channel, outbox, monkeypatch):
+    sent, _ = fake_channel
+    breaker = notify.CircuitBreaker('fake', threshold=1, cooldown=0)
+    monkeypatch.setitem(notify._breakers, 'fake', breaker)
+    # 熔断器处于半开状态，另一个试探请求还未结束
+    breaker.record(False, 'boom')
+    assert breaker.allow()
+    channel = notify._registry.channels[notify._registry.names().index('fake')]
+    assert notify.timed_notify(channel, '部署完成', 'demo') is None
+
+    message_id = outbox.enqueue('部署完成', 'demo')
+    dispatcher = OutboxDispatcher(outbox, interval=30)
+    dispatcher._deliver(outbox.claim(dispatcher.owner, 10))
+    dispatcher._wakeup.wait(2)
+
+    delivery = outbox.get(message_id)['deliveries'][0]
+    assert delivery['status'] == DeliveryStatus.PENDING
+    assert delivery['attempts'] == 0
+    assert delivery['next_attempt_at'] > time.time() + 20
+    assert sent == []
+
+
+def test_failed_delivery_is_retried_until_done(fake_channel, outbox):
+    sent, results = fake_channel
+    results.extend([False, True])
+    message_id = outbox.enqueue('部署完成', 'demo')
+    dispatcher = OutboxDispatcher(outbox, interval=0.05)
+    dispatcher.start()
+
+    deadline = time.time() + 5
+    while outbox.get(message_id)['status'] != DeliveryStatus.DONE and time.time() < deadline:
+        time.sleep(0.05)
+
+    message = outbox.get(message_id)
+    assert message['status'] == DeliveryStatus.DONE
+    assert [attempt['success'] for attempt in message['attempts']] == [False, True]
+    assert message['deliveries'][0]['attempts'] == 2
+    assert len(sent) == 2
+
+
+def test_expired_lease_is_reclaimed_and_late_result_ignored(fake_channel, outbox):
+    outbox.LEASE_SECONDS = 0.2
+    message_id = outbox.enqueue('部署完成', 'demo')
+    first = outbox.claim('worker-a', 10)
+    assert len(first) == 1
+    # 租约有效期内其他进程领取不到
+    assert outbox.claim('worker-b', 10) == []
+
+    time.sleep(0.3)
+    second = outbox.claim('worker-b', 10)
+    assert [d['channel'] for d in second] == ['fake']
+
+    # 原持有者在租约过期后提交的结果被忽略
+    outbox.record(first[0], 'worker-a', False, '超时')
+    assert outbox.get(message_id)['attempts'] == []
+
+    outbox.record(second[0], 'worker-b', True)
+    message = outbox.get(message_id)
+    assert message['status'] == DeliveryStatus.DONE
+    assert len(message['attempts']) == 1
+
+
+def test_delivery_fails_after_max_attempts(fake_channel, outbox):
+    message_id = outbox.enqueue('部署完成', 'demo')
+    for _ in range(outbox.max_attempts):
+        (delivery,) = outbox.claim('worker-a', 10)
+        outbox.record(delivery, 'worker-a', False, '推送失败')
+
+    message = outbox.get(message_id)
+    assert message['status'] == DeliveryStatus.FAILED
+    assert message['deliveries'][0]['attempts'] == outbox.max_attempts
+    assert outbox.claim('worker-a', 10) == []
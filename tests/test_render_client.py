@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from services.rate_limiter import RateLimitedError, RenderRateLimiter
+from services.render_client import RenderClient
+
+
+@pytest.fixture
+def throttled(mock_render, monkeypatch):
+    """前 n 个请求返回 429 和 Retry-After: 1"""
+    mock, url = mock_render
+    remaining = [1]
+    record = mock.record
+
+    def throttle(endpoint, api_key):
+        record(endpoint, api_key)
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            return 1
+        return None
+
+    monkeypatch.setattr(mock, 'record', throttle)
+    return mock, url, remaining
+
+
+def test_retry_after_is_honoured_without_limiter(throttled):
+    mock, url, _ = throttled
+    client = RenderClient(max_retries=1, backoff=0)
+
+    start = time.time()
+    response = client.get(f"{url}/services", 'demo-key', endpoint='services')
+    assert response.status_code == 200
+    assert time.time() - start >= 0.9
+    assert mock.calls['GET services'] == 2
+
+
+def test_limiter_pauses_key_and_retries_without_using_retries(throttled, tmp_path):
+    mock, url, remaining = throttled
+    remaining[0] = 2
+    limiter = RenderRateLimiter(os.path.join(tmp_path, 'ratelimit.db'), rate_per_minute=6000, burst=5, max_wait=10)
+    client = RenderClient(max_retries=0, backoff=0, rate_limiter=limiter)
+
+    start = time.time()
+    response = client.get(f"{url}/services", 'demo-key', endpoint='services')
+    assert response.status_code == 200
+    assert time.time() - start >= 1.9
+    assert mock.calls['GET services'] == 3
+
+
+def test_retry_after_is_shared_across_workers(tmp_path):
+    path = os.path.join(tmp_path, 'ratelimit.db')
+    RenderRateLimiter(path, rate_per_minute=6000, burst=5).observe('demo-key', 429, {'Retry-After': '5'})
+
+    # 另一个 worker 的限流器读取同一个文件，在 Retry-After 结束前拿不到配额
+    other = RenderRateLimiter(path, rate_per_minute=6000, burst=5, max_wait=0.3)
+    with pytest.raises(RateLimitedError):
+        other.acquire('demo-key')
+    assert other.acquire('other-key') < 0.1
@@ -0,0 +1,67 @@
+import smtplib
+import time
+
+import pytest
+
+from fake_smtp import FakeSMTPServer
+from utils.notify_channels.smtp import SMTPSession
+
+
+@pytest.fixture
+def server():
+    server = FakeSMTPServer().start()
+    yield server
+    server.stop()
+
+
+def make_session(server, idle_timeout=60.0):
+    return SMTPSession(server.address, False, 'bot@example.com', 'secret', 5, idle_timeout)
+
+
+def test_messages_share_one_session(server):
+    session = make_session(server)
+    for i in range(3):
+        session.send('ops@example.com', f'Subject: {i}\r\n\r\nbody {i}'.encode())
+
+    assert len(server.messages) == 3
+    assert server.connections == 1
+    assert server.logins == 1
+    assert session.connects == 1
+
+
+def test_failed_noop_reconnects(server):
+    session = make_session(server)
+    session.send('ops@example.com', b'Subject: a\r\n\r\nfirst')
+
+    server.fail_noop = True
+    session.send('ops@example.com', b'Subject: b\r\n\r\nsecond')
+
+    assert len(server.messages) == 2
+    assert server.connections == 2
+    assert server.logins == 2
+
+
+def test_idle_session_is_closed_before_reuse(server):
+    session = make_session(server, idle_timeout=0.2)
+    session.send('ops@example.com', b'Subject: a\r\n\r\nfirst')
+    time.sleep(0.3)
+    session.send('ops@example.com', b'Subject: b\r\n\r\nsecond')
+
+    assert server.quits == 1
+    assert server.connections == 2
+    assert len(server.messages) == 2
+
+
+def test_rejected_message_is_not_resent(server):
+    session = make_session(server)
+    session.send('ops@example.com', b'Subject: a\r\n\r\nfirst')
+    server.reject.add('nobody@example.com')
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        session.send('nobody@example.com', b'Subject: b\r\n\r\nrejected')
+
+    # 拒收不会断开连接重发，之后的邮件继续使用同一个连接
+    session.send('ops@example.com', b'Subject: c\r\n\r\nthird')
+    assert server.connections == 1
+    assert server.logins == 1
+    assert len(server.messages) == 2
@@ -0,0 +1,90 @@
+import os
+import time
+
+import pytest
+
+from utils import lock_utils, state_store
+from utils.state_store import RedisStateBackend, SQLiteStateBackend
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteStateBackend(os.path.join(tmp_path, 'state.db'))
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')  # fakeredis 执行 Lua 脚本需要 lupa
+    return RedisStateBackend('redis://fake', prefix='test', client=fakeredis.FakeRedis(decode_responses=True))
+
+
+@pytest.fixture
+def lease_backend(backend, monkeypatch):
+    # lock_utils 通过 get_state_backend() 获取后端
+    monkeypatch.setattr(state_store, '_backend', backend)
+    return backend
+
+
+def test_acquire_and_release(backend):
+    fence = backend.acquire_lock('app', 'a', 30)
+    assert fence == 1
+    assert backend.acquire_lock('app', 'b', 30) is None
+    assert backend.get_state('app')['lock_owner'] == 'a'
+
+    backend.release_lock('app', 'a')
+    assert backend.get_state('app')['lock_owner'] is None
+    assert backend.acquire_lock('app', 'b', 30) == 2
+
+
+def test_release_by_other_owner_is_ignored(backend):
+    backend.acquire_lock('app', 'a', 30)
+    backend.release_lock('app', 'b')
+    assert backend.acquire_lock('app', 'c', 30) is None
+    assert backend.get_state('app')['lock_owner'] == 'a'
+
+
+def test_expired_lease_is_taken_over_with_a_new_fence(backend):
+    first = backend.acquire_lock('app', 'a', 0.1)
+    time.sleep(0.2)
+    second = backend.acquire_lock('app', 'b', 30)
+    assert second == first + 1
+
+    # 旧持有者的释放不会释放新持有者的锁
+    backend.release_lock('app', 'a')
+    assert backend.get_state('app')['lock_owner'] == 'b'
+    assert backend.acquire_lock('app', 'c', 30) is None
+
+
+def test_late_writer_is_rejected_by_its_fence(backend):
+    stale = backend.acquire_lock('app', 'a', 0.1)
+    time.sleep(0.2)
+    current = backend.acquire_lock('app', 'b', 30)
+
+    assert not backend.update('app', fence=stale, deploy_id='dep-old')
+    assert backend.update('app', fence=current, deploy_id='dep-new')
+    assert backend.get_state('app')['deploy_id'] == 'dep-new'
+
+
+def test_compare_and_set(backend):
+    version = backend.get_state('app')['version']
+    assert backend.compare_and_set('app', version, deploy_status='live')
+    assert not backend.compare_and_set('app', version, deploy_status='failed')
+    assert backend.get_state('app')['deploy_status'] == 'live'
+
+
+def test_unknown_field_is_rejected(backend):
+    with pytest.raises(ValueError):
+        backend.update('app', owner='x')
+
+
+def test_update_deploy_time_with_stale_lease(lease_backend):
+    stale = lock_utils.acquire_deploy_lock('app', ttl=0.1)
+    time.sleep(0.2)
+    current = lock_utils.acquire_deploy_lock('app', ttl=30)
+    assert current.fence > stale.fence
+
+    assert not lock_utils.update_deploy_time('app', stale)
+    assert lock_utils.get_last_deploy_time('app') is None
+
+    assert lock_utils.update_deploy_time('app', current)
+    assert lock_utils.get_last_deploy_time('app') is not None
+    lock_utils.release_deploy_lock('app', current)
+    assert lock_utils.acquire_deploy_lock('app') is not None
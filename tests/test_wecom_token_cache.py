@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+import pytest
+
+from utils.notify_channels.wecom import WeComTokenCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return os.path.join(tmp_path, 'notify.db')
+
+
+def slow_fetch(calls, started, release):
+    def fetch():
+        calls.append(time.time())
+        started.set()
+        assert release.wait(5)
+        return f"token-{len(calls)}", 7200
+    return fetch
+
+
+def run(target, *args):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(target(*args)))
+    thread.start()
+    return thread, results
+
+
+def test_only_one_process_refreshes_while_others_reuse_valid_token(path):
+    # 两个缓存实例模拟两个 worker 进程，共享同一个 SQLite 文件
+    first, second = WeComTokenCache(path, margin=300), WeComTokenCache(path, margin=300)
+    first.get('k', lambda: ('old', 100))  # 仍有效，但已进入提前刷新的时间段
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    thread, results = run(first.get, 'k', slow_fetch(calls, started, release))
+    assert started.wait(2)
+    # 刷新进行中，另一个进程直接使用旧 token，不再请求 gettoken
+    assert second.get('k', slow_fetch(calls, started, release)) == 'old'
+
+    release.set()
+    thread.join(5)
+    assert results == ['token-1']
+    assert len(calls) == 1
+    assert WeComTokenCache(path).get('k', lambda: pytest.fail('不应再次获取')) == 'token-1'
+
+
+def test_waits_for_refresh_when_token_is_stale(path):
+    first, second = WeComTokenCache(path), WeComTokenCache(path)
+    first.get('k', lambda: ('old', 7200))
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    thread, results = run(first.get, 'k', slow_fetch(calls, started, release), 'old')
+    assert started.wait(2)
+    waiter, waited = run(second.get, 'k', slow_fetch(calls, started, release), 'old')
+    time.sleep(0.2)
+    assert waited == []
+
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+    assert results == waited == ['token-1']
+    assert len(calls) == 1
+
+
+def test_failed_refresh_releases_lease(path):
+    first, second = WeComTokenCache(path), WeComTokenCache(path)
+
+    def broken():
+        raise RuntimeError('gettoken 失败')
+
+    with pytest.raises(RuntimeError):
+        first.get('k', broken)
+    assert second.get('k', lambda: ('token', 7200)) == 'token'
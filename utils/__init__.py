@@ -1,15 +1,22 @@
 from .lock_utils import (
-    file_lock,
-    file_unlock,
-    get_deploy_lock,
+    DeployLease,
+    acquire_deploy_lock,
+    release_deploy_lock,
     get_last_deploy_time,
-    update_deploy_time
+    update_deploy_time,
+    update_deploy_status
 )
+from .state_store import StateBackend, SQLiteStateBackend, RedisStateBackend, get_state_backend
 
 __all__ = [
-    'file_lock',
-    'file_unlock',
-    'get_deploy_lock',
+    'DeployLease',
+    'acquire_deploy_lock',
+    'release_deploy_lock',
     'get_last_deploy_time',
-    'update_deploy_time'
+    'update_deploy_time',
+    'update_deploy_status',
+    'StateBackend',
+    'SQLiteStateBackend',
+    'RedisStateBackend',
+    'get_state_backend'
 ]
@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.constants import CONFIG_RELOAD_INTERVAL
+
+
+class ConfigReloader:
+    """
+    按进程运行的配置重新加载线程
+
+    每个被监视的文件对应一个回调：定期比较文件的修改时间、大小和 inode，变化时调用对应的回调。
+    不处理 SIGHUP，gunicorn 主进程收到 SIGHUP 时仍按默认行为重启 worker。
+    回调抛出的异常只记录日志，不影响其他回调，调用方应在新配置无效时保留当前配置。
+    """
+
+    def __init__(self, interval: float = CONFIG_RELOAD_INTERVAL):
+        """
+        初始化重新加载线程
+
+        Args:
+            interval: 检查文件变化的间隔（秒），0 表示不重新加载
+        """
+        self.interval = interval
+        self.logger = logging.getLogger('docker-hooks')
+        self._watches: List[Tuple[str, str, Callable[[], Any]]] = []
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def watch(self, name: str, path: str, callback: Callable[[], Any]) -> None:
+        """
+        监视一个配置文件
+
+        Args:
+            name: 配置名称，用于日志
+            path: 文件路径
+            callback: 文件变化时调用
+        """
+        self._watches.append((name, path, callback))
+
+    def request_reload(self) -> None:
+        """请求后台线程立即重新加载所有配置"""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """启动重新加载线程（fork 后的子进程中会重新启动），没有监视的文件或 interval 为 0 时不做任何事"""
+        if not self._watches or self.interval <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='ConfigReloader', daemon=True)
+        self._thread.start()
+        files = ', '.join(f"{name}={path}" for name, path, _ in self._watches)
+        self.logger.info(f"配置重新加载已启用: pid={self._pid}, {files}")
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        # 文件被原子替换（如 ConfigMap 更新）时 inode 会变化，即使修改时间相同
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _reload(self, name: str, callback: Callable[[], Any]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            self.logger.error(f"重新加载{name}失败，继续使用当前配置: {str(e)}")
+
+    def _run(self) -> None:
+        signatures: Dict[str, Optional[Tuple[int, int, int]]] = {
+            path: self._file_signature(path) for _, path, _ in self._watches
+        }
+        while True:
+            requested = self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            for name, path, callback in self._watches:
+                current = self._file_signature(path)
+                if requested or current != signatures[path]:
+                    # 加载失败时同样记录新的文件状态，等文件再次变化后再重试
+                    signatures[path] = current
+                    self._reload(name, callback)
@@ -1,69 +1,69 @@
 import os
-import platform
+import threading
+import uuid
 import logging
 from datetime import datetime
+from typing import NamedTuple, Optional
+
+from config.constants import DEPLOY_LOCK_TTL
+from utils.state_store import get_state_backend
 
 logger = logging.getLogger(__name__)
 
-# 根据操作系统选择锁实现
-if platform.system() == 'Windows':
-    import msvcrt
 
+class DeployLease(NamedTuple):
+    """部署锁租约：持有者标识和 fencing token"""
+    owner: str
+    fence: int
 
-    def file_lock(file):
-        try:
-            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
-            return True
-        except IOError:
-            return False
 
+def acquire_deploy_lock(project: str, ttl: float = DEPLOY_LOCK_TTL) -> Optional[DeployLease]:
+    """
+    获取项目的部署锁
 
-    def file_unlock(file):
-        try:
-            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
-        except IOError:
-            pass
-else:
-    import fcntl
+    Args:
+        project: 项目名称
+        ttl: 锁租约时长（秒），持有者崩溃后锁会在到期后自动失效
 
+    Returns:
+        Optional[DeployLease]: 成功时返回租约，用于带 fencing 的写入和释放锁；锁已被占用时返回 None
+    """
+    owner = f"{os.getpid()}-{threading.get_ident()}-{uuid.uuid4().hex[:8]}"
+    fence = get_state_backend().acquire_lock(project, owner, ttl)
+    if fence is None:
+        return None
+    return DeployLease(owner, fence)
 
-    def file_lock(file):
-        try:
-            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            return True
-        except IOError:
-            return False
 
+def release_deploy_lock(project: str, lease: DeployLease) -> None:
+    """释放项目的部署锁"""
+    get_state_backend().release_lock(project, lease.owner)
 
-    def file_unlock(file):
-        try:
-            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
-        except IOError:
-            pass
 
-# 锁文件目录
-LOCKS_DIR = '/tmp/locks'
-os.makedirs(LOCKS_DIR, exist_ok=True)
+def get_last_deploy_time(project: str) -> Optional[datetime]:
+    """获取项目最后部署时间"""
+    last_deploy_at = get_state_backend().get_state(project)['last_deploy_at']
+    return datetime.fromtimestamp(last_deploy_at) if last_deploy_at else None
 
 
-def get_deploy_lock(project):
-    """获取项目的文件锁"""
-    lock_file = f'{LOCKS_DIR}/{project}.lock'
-    return open(lock_file, 'w')
+def update_deploy_time(project: str, lease: Optional[DeployLease] = None) -> bool:
+    """
+    更新项目部署时间
 
+    Args:
+        project: 项目名称
+        lease: 可选，部署锁租约；指定时只有租约仍然有效（未被他人接管）才会写入
 
-def get_last_deploy_time(project):
-    """获取项目最后部署时间"""
-    status_file = f'{LOCKS_DIR}/{project}.status'
-    try:
-        mtime = os.path.getmtime(status_file)
-        return datetime.fromtimestamp(mtime)
-    except OSError:
-        return None
+    Returns:
+        bool: 是否写入成功，返回 False 表示租约已失效，调用方不应继续部署
+    """
+    fence = lease.fence if lease else None
+    written = get_state_backend().update(project, fence=fence, last_deploy_at=datetime.now().timestamp())
+    if not written:
+        logger.warning(f"部署锁租约已失效，放弃写入部署时间: {project}")
+    return written
 
 
-def update_deploy_time(project):
-    """更新项目部署时间"""
-    status_file = f'{LOCKS_DIR}/{project}.status'
-    with open(status_file, 'w') as f:
-        f.write(datetime.now().isoformat())
+def update_deploy_status(project: str, deploy_id: Optional[str], status: str) -> None:
+    """记录项目当前的部署ID和部署状态"""
+    get_state_backend().update(project, deploy_id=deploy_id, deploy_status=status)
@@ -0,0 +1,119 @@
+import functools
+import os
+import time
+from typing import Callable, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess
+)
+
+# 部署耗时跨度较大，使用单独的分桶（秒）
+DEPLOY_BUCKETS = (30, 60, 120, 180, 300, 450, 600, 900, 1200, 1800, float('inf'))
+
+WEBHOOK_LATENCY = Histogram(
+    'docker_hooks_webhook_duration_seconds',
+    'webhook 请求处理耗时',
+    ['outcome']
+)
+
+RENDER_API_LATENCY = Histogram(
+    'docker_hooks_render_api_duration_seconds',
+    'Render API 单次请求耗时',
+    ['endpoint', 'method']
+)
+
+RENDER_API_REQUESTS = Counter(
+    'docker_hooks_render_api_requests_total',
+    'Render API 请求次数，status 为 HTTP 状态码或 error（连接错误、超时）',
+    ['endpoint', 'method', 'status']
+)
+
+RENDER_RATE_LIMIT_WAIT = Histogram(
+    'docker_hooks_render_rate_limit_wait_seconds',
+    '请求 Render API 前等待配额的时间',
+    ['priority']
+)
+
+DEPLOYS_IN_FLIGHT = Gauge(
+    'docker_hooks_deploys_in_flight',
+    '正在跟踪状态的部署数量',
+    multiprocess_mode='livesum'
+)
+
+DEPLOY_DURATION = Histogram(
+    'docker_hooks_deploy_duration_seconds',
+    '从触发部署到部署结束的耗时',
+    ['project', 'status'],
+    buckets=DEPLOY_BUCKETS
+)
+
+NOTIFY_LATENCY = Histogram(
+    'docker_hooks_notify_duration_seconds',
+    '单个通知渠道的推送耗时',
+    ['channel']
+)
+
+
+NOTIFY_QUEUE_DEPTH = Gauge(
+    'docker_hooks_notify_queue_depth',
+    '因渠道配额不足而排队等待推送的消息数',
+    ['channel'],
+    multiprocess_mode='livesum'
+)
+
+NOTIFY_RATE_LIMIT_WAIT = Histogram(
+    'docker_hooks_notify_rate_limit_wait_seconds',
+    '推送前等待渠道配额的时间',
+    ['channel'],
+    buckets=(0, 1, 5, 15, 30, 60, 120, 300, 600, float('inf'))
+)
+
+
+WORKER_STARTUP = Gauge(
+    'docker_hooks_worker_startup_seconds',
+    'worker 冷启动各阶段耗时：imports 为 fork 到开始创建应用，create_app 为创建应用，first_request 为 fork 到第一个请求',
+    ['phase'],
+    multiprocess_mode='max'
+)
+
+
+def observe_webhook(view: Callable) -> Callable:
+    """记录 webhook 视图函数的处理耗时，按响应状态码分类"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = '500'
+        try:
+            response = view(*args, **kwargs)
+            outcome = str(getattr(response, 'status_code', 200))
+            return response
+        finally:
+            WEBHOOK_LATENCY.labels(outcome=outcome).observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    生成 Prometheus 文本格式的指标
+
+    设置了 PROMETHEUS_MULTIPROC_DIR 时（gunicorn 下由配置文件设置）汇总所有 worker 进程的指标，
+    否则只输出当前进程的指标。
+
+    Returns:
+        Tuple[bytes, str]: 指标内容和 Content-Type
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,20 +1,40 @@
 #!/usr/bin/env python3
 # _*_ coding:utf-8 _*_
-import base64
-import hashlib
-import hmac
+import heapq
+import importlib
+import itertools
 import json
 import os
+import random
 import re
-import smtplib
 import threading
 import time
 import urllib.parse
-from email.header import Header
-from email.mime.text import MIMEText
-from email.utils import formataddr
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from config.constants import (
+    NOTIFY_MAX_WORKERS,
+    NOTIFY_TIMEOUT,
+    NOTIFY_CHANNEL_TIMEOUTS,
+    NOTIFY_SEND_DEADLINE,
+    NOTIFY_BREAKER_THRESHOLD,
+    NOTIFY_BREAKER_COOLDOWN,
+    HITOKOTO_BUFFER_SIZE,
+    HITOKOTO_TIMEOUT,
+    NOTIFY_STATE_PATH,
+    NOTIFY_PLUGINS,
+    NOTIFY_CONFIG_FILE,
+    NOTIFY_RATE_LIMITS,
+    NOTIFY_RATE_LIMIT_MAX_WAIT
+)
+from utils.metrics import NOTIFY_LATENCY, NOTIFY_QUEUE_DEPTH, NOTIFY_RATE_LIMIT_WAIT
+from utils.sqlite_utils import get_connection
 
 # 原先的 print 函数和主线程的锁
 _print = print
@@ -30,9 +50,9 @@ def print(text, *args, **kw):
         _print(text, *args, **kw)
 
 
-# 通知服务
+# 通知服务的默认配置，实际使用的配置由 _load_config 叠加环境变量得到
 # fmt: off
-push_config = {
+DEFAULT_CONFIG = {
     'HITOKOTO': True,  # 启用一言（随机句子）
 
     'BARK_PUSH': '',  # bark IP 或设备码，例：https://api.day.app/DxHcxxxxxRxxxxxxcm/
@@ -120,25 +140,405 @@ push_config = {
 }
 # fmt: on
 
-for k in push_config:
-    if os.getenv(k):
-        v = os.getenv(k)
-        push_config[k] = v
+# 插件渠道声明的额外配置项，同样从环境变量读取
+_plugin_keys = set()
 
 
-def bark(title: str, content: str) -> None:
+def _read_config_file(path: str) -> dict:
+    """
+    读取推送渠道配置文件（YAML 或 JSON，按扩展名区分），键与环境变量相同；文件无效时抛出 ValueError。
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise ValueError(f"无法读取推送渠道配置文件 {path}: {e}")
+    try:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+
+            data = yaml.safe_load(text) or {}
+        else:
+            data = json.loads(text) if text.strip() else {}
+    except ImportError:
+        raise ValueError("使用 YAML 推送渠道配置文件需要安装 PyYAML 包: pip install pyyaml")
+    except Exception as e:
+        raise ValueError(f"推送渠道配置文件 {path} 格式错误: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"推送渠道配置文件 {path} 必须是映射")
+    config = {}
+    for k, v in data.items():
+        if isinstance(v, (dict, list)):
+            raise ValueError(f"推送渠道配置文件中 {k} 的值必须是字符串")
+        if v is not None:
+            config[str(k)] = v if isinstance(v, str) else json.dumps(v)
+    return config
+
+
+def _load_config(overrides: Mapping = None, strict: bool = True) -> dict:
+    """
+    依次叠加默认配置、NOTIFY_CONFIG_FILE 和环境变量，overrides 中的值优先级最高。
+    strict 为 False 时配置文件无效只打印错误并忽略该文件，否则抛出 ValueError。
+    """
+    config = dict(DEFAULT_CONFIG)
+    if NOTIFY_CONFIG_FILE:
+        try:
+            config.update(_read_config_file(NOTIFY_CONFIG_FILE))
+        except ValueError as e:
+            if strict:
+                raise
+            print(f"{e}，忽略推送渠道配置文件")
+    for k in list(DEFAULT_CONFIG) + sorted(_plugin_keys):
+        if os.getenv(k):
+            config[k] = os.getenv(k)
+    if overrides:
+        config.update(overrides)
+    return config
+
+
+# 启动时读取的配置，reload_config 时整体替换而不是原地修改
+push_config = _load_config(strict=False)
+
+# 每个推送渠道一个 keep-alive 的 Session，和推送线程池一样按进程创建，fork 后在子进程中重建
+_sessions = {}
+_executor = None
+_queue = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _ensure_pool() -> None:
+    global _sessions, _executor, _queue, _pool_pid
+    if _pool_pid == os.getpid():
+        return
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            _sessions = {}
+            _executor = ThreadPoolExecutor(max_workers=NOTIFY_MAX_WORKERS, thread_name_prefix="Notify")
+            _queue = _SendQueue()
+            _pool_pid = os.getpid()
+
+
+def _parse_timeouts(value: str) -> dict:
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, seconds = item.partition("=")
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            print(f"NOTIFY_CHANNEL_TIMEOUTS 中的 {item} 格式错误，已忽略")
+    return timeouts
+
+
+_channel_timeouts = _parse_timeouts(NOTIFY_CHANNEL_TIMEOUTS)
+
+
+def _timeout(channel: str) -> float:
+    """
+    获取推送渠道的请求超时（秒），NOTIFY_CHANNEL_TIMEOUTS 中未单独配置的渠道使用 NOTIFY_TIMEOUT。
+    """
+    return _channel_timeouts.get(channel, NOTIFY_TIMEOUT)
+
+
+class _ChannelSession(requests.Session):
+    """
+    未显式指定 timeout 的请求使用渠道的默认超时，避免一个无响应的推送地址一直挂起。
+    """
+
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _http(channel: str) -> requests.Session:
+    """
+    获取推送渠道复用的 Session，同一渠道的请求复用 keep-alive 连接。
+    """
+    _ensure_pool()
+    session = _sessions.get(channel)
+    if session is None:
+        with _pool_lock:
+            session = _sessions.get(channel)
+            if session is None:
+                session = _ChannelSession(_timeout(channel))
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=NOTIFY_MAX_WORKERS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[channel] = session
+    return session
+
+
+class CircuitBreaker:
+    """
+    推送渠道的熔断器：连续失败达到阈值后打开，冷却期内跳过该渠道；
+    冷却期结束后放行一次试探请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+            self,
+            name: str,
+            threshold: int = NOTIFY_BREAKER_THRESHOLD,
+            cooldown: float = NOTIFY_BREAKER_COOLDOWN
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        是否允许本次推送。
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, success: bool, error: str = None) -> None:
+        """
+        记录一次推送结果。
+        """
+        with self._lock:
+            if success:
+                self.state = self.CLOSED
+                self.failures = 0
+                self.last_error = None
+                return
+            self.failures += 1
+            self.last_error = error
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    print(f"{self.name} 连续失败 {self.failures} 次，{int(self.cooldown)} 秒内跳过该渠道")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def is_open(self) -> bool:
+        """
+        是否处于熔断冷却期内，不改变熔断器状态。
+        """
+        with self._lock:
+            return self.state == self.OPEN and time.time() - self.opened_at < self.cooldown
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened_at": self.opened_at,
+                "retry_at": self.opened_at + self.cooldown if self.state == self.OPEN else None,
+                "last_error": self.last_error,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker(channel: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(channel)
+        if breaker is None:
+            breaker = _breakers[channel] = CircuitBreaker(channel)
+        return breaker
+
+
+def circuit_states() -> dict:
+    """
+    返回当前进程中各推送渠道熔断器的状态，供排查问题时查看。
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+# 常见推送渠道的服务端配额，格式为 次数/秒数，可通过 NOTIFY_RATE_LIMITS 覆盖，设为 0 表示不限制
+DEFAULT_RATE_LIMITS = {
+    "dingding_bot": "20/60",  # 钉钉自定义机器人每分钟 20 条
+    "feishu_bot": "100/60",  # 飞书自定义机器人每分钟 100 条
+    "wecom_bot": "20/60",  # 企业微信群机器人每分钟 20 条
+    "telegram_bot": "20/60",  # telegram 机器人向同一个群每分钟 20 条
+}
+
+
+def _parse_rate_limits(value: str) -> dict:
+    limits = {}
+    items = [f"{name}={limit}" for name, limit in DEFAULT_RATE_LIMITS.items()]
+    items += [part.strip() for part in value.split(",") if part.strip()]
+    for item in items:
+        name, _, limit = item.partition("=")
+        count, _, seconds = limit.partition("/")
+        try:
+            count, seconds = float(count), float(seconds or 60)
+        except ValueError:
+            print(f"NOTIFY_RATE_LIMITS 中的 {item} 格式错误，已忽略")
+            continue
+        if count > 0 and seconds > 0:
+            limits[name.strip()] = (count, count / seconds)
+        else:
+            limits.pop(name.strip(), None)
+    return limits
+
+
+class ChannelRateLimiter:
+    """
+    推送渠道的令牌桶，保存在 SQLite 中由所有 worker 进程共享；容量为配额次数，按配额速率补充。
+    令牌不足时预约后续的令牌（令牌数可以为负），返回需要排队的时间，推送按预约的时间依次发出。
+    """
+
+    def __init__(self, path: str = NOTIFY_STATE_PATH, limits: dict = None):
+        self.path = path
+        self.limits = limits if limits is not None else _parse_rate_limits(NOTIFY_RATE_LIMITS)
+        self._ready = False
+
+    def _conn(self):
+        conn = get_connection(self.path)
+        if not self._ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS notify_rate_buckets ("
+                "channel TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._ready = True
+        return conn
+
+    def _load(self, conn, channel: str, now: float) -> float:
+        capacity, rate = self.limits[channel]
+        row = conn.execute(
+            "SELECT tokens, updated_at FROM notify_rate_buckets WHERE channel = ?", (channel,)
+        ).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row["tokens"] + max(now - row["updated_at"], 0) * rate)
+
+    def reserve(self, channel: str, max_wait: float = NOTIFY_RATE_LIMIT_MAX_WAIT):
+        """
+        预约一次推送，返回需要排队的秒数；排队时间超过 max_wait 时不预约，返回 None。
+        """
+        if channel not in self.limits:
+            return 0.0
+        rate = self.limits[channel][1]
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens = self._load(conn, channel, now) - 1
+            wait_seconds = -tokens / rate if tokens < 0 else 0.0
+            if wait_seconds > max_wait:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO notify_rate_buckets (channel, tokens, updated_at) VALUES (?, ?, ?)",
+                (channel, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait_seconds
+
+    def available_at(self, channel: str) -> float:
+        """
+        渠道下一个令牌可用的时间戳。
+        """
+        now = time.time()
+        if channel not in self.limits:
+            return now
+        tokens = self._load(self._conn(), channel, now)
+        return now if tokens >= 1 else now + (1 - tokens) / self.limits[channel][1]
+
+
+_rate_limiter = ChannelRateLimiter()
+
+
+class _SendQueue:
+    """
+    排队中的推送：按预约时间排序，到时间后提交到推送线程池，排队期间不占用线程池的线程。
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="NotifyQueue", daemon=True).start()
+
+    def put(self, due: float, channel, title: str, content: str) -> Future:
+        future = Future()
+        NOTIFY_QUEUE_DEPTH.labels(channel=channel.name).inc()
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), time.time(), channel, title, content, future))
+            self._cond.notify()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+                _, _, queued_at, channel, title, content, future = heapq.heappop(self._heap)
+            NOTIFY_QUEUE_DEPTH.labels(channel=channel.name).dec()
+            NOTIFY_RATE_LIMIT_WAIT.labels(channel=channel.name).observe(time.time() - queued_at)
+            _chain(_executor.submit(timed_notify, channel, title, content), future)
+
+
+def _chain(source: Future, target: Future) -> None:
+    def _done(f):
+        if f.exception() is not None:
+            target.set_exception(f.exception())
+        else:
+            target.set_result(f.result())
+
+    source.add_done_callback(_done)
+
+
+def _submit(channel, title: str, content: str, max_wait: float = NOTIFY_RATE_LIMIT_MAX_WAIT):
+    """
+    按渠道配额提交一次推送，配额不足时排队；排队时间超过 max_wait 时不推送，返回 None。
+    """
+    _ensure_pool()
+    try:
+        wait_seconds = _rate_limiter.reserve(channel.name, max_wait)
+    except Exception as e:
+        # 配额存储不可用时不限流，避免通知丢失
+        print(f"读取 {channel.name} 推送配额失败，不限流: {e}")
+        wait_seconds = 0.0
+    if wait_seconds is None:
+        return None
+    if wait_seconds <= 0:
+        if channel.name in _rate_limiter.limits:
+            NOTIFY_RATE_LIMIT_WAIT.labels(channel=channel.name).observe(0)
+        return _executor.submit(timed_notify, channel, title, content)
+    print(f"{channel.name} 推送配额不足，排队 {wait_seconds:.1f} 秒")
+    return _queue.put(time.time() + wait_seconds, channel, title, content)
+
+
+def bark(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 bark 推送消息。
     """
-    if not push_config.get("BARK_PUSH"):
+    config = _config(config)
+    if not config.get("BARK_PUSH"):
         print("bark 服务的 BARK_PUSH 未设置!!\n取消推送")
-        return
+        return False
     print("bark 服务启动")
 
-    if push_config.get("BARK_PUSH").startswith("http"):
-        url = f'{push_config.get("BARK_PUSH")}'
+    if config.get("BARK_PUSH").startswith("http"):
+        url = f'{config.get("BARK_PUSH")}'
     else:
-        url = f'https://api.day.app/{push_config.get("BARK_PUSH")}'
+        url = f'https://api.day.app/{config.get("BARK_PUSH")}'
 
     bark_params = {
         "BARK_ARCHIVE": "isArchive",
@@ -157,262 +557,244 @@ def bark(title: str, content: str) -> None:
                           and pairs[0] != "BARK_PUSH"
                           and pairs[1]
                           and bark_params.get(pairs[0]),
-            push_config.items(),
+            config.items(),
     ):
         data[bark_params.get(pair[0])] = pair[1]
     headers = {"Content-Type": "application/json;charset=utf-8"}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = _http("bark").post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["code"] == 200:
         print("bark 推送成功！")
+        return True
     else:
         print("bark 推送失败！")
+        return False
 
 
-def console(title: str, content: str) -> None:
+def console(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 控制台 推送消息。
     """
     print(f"{title}\n\n{content}")
+    return True
 
 
-def send_dingtalk_message(webhook, secret, msg_type, content):
-    timestamp = str(round(time.time() * 1000))
-    secret_enc = secret.encode('utf-8')
-    string_to_sign = '{}\n{}'.format(timestamp, secret)
-    string_to_sign_enc = string_to_sign.encode('utf-8')
-    hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
-    sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
-
-    url = f"{webhook}&timestamp={timestamp}&sign={sign}"
-
-    headers = {'Content-Type': 'application/json'}
-    data = {
-        "msgtype": msg_type,
-        msg_type: content
-    }
-
-    response = requests.post(url, json=data, headers=headers)
-    return response.json()
-
-
-def dingding_bot(title: str, content: str) -> None:
-    """
-    使用 钉钉机器人 推送消息。
-    """
-    webhook = f"https://oapi.dingtalk.com/robot/send?access_token={push_config.get('DD_BOT_TOKEN')}"
-    secret = push_config.get('DD_BOT_SECRET')
-
-    if not secret or not webhook:
-        print("钉钉机器人 服务的 DD_BOT_SECRET 或者 DD_BOT_TOKEN 未设置!!\n取消推送")
-        return
-
-    print("钉钉机器人 服务启动")
-
-    msg_type = "markdown"
-    markdown_content = {
-        "title": title,
-        "text": f"## {title}\n\n{content}"
-    }
-
-    result = send_dingtalk_message(webhook, secret, msg_type, markdown_content)
-
-    if result.get("errcode") == 0:
-        print("钉钉机器人 推送成功！")
-    else:
-        print(f"钉钉机器人 推送失败！错误信息：{result}")
-
-
-def feishu_bot(title: str, content: str) -> None:
+def feishu_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 飞书机器人 推送消息。
     """
-    if not push_config.get("FSKEY"):
+    config = _config(config)
+    if not config.get("FSKEY"):
         print("飞书 服务的 FSKEY 未设置!!\n取消推送")
-        return
+        return False
     print("飞书 服务启动")
 
-    url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{push_config.get("FSKEY")}'
+    url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{config.get("FSKEY")}'
     data = {"msg_type": "text", "content": {"text": f"{title}\n\n{content}"}}
-    response = requests.post(url, data=json.dumps(data)).json()
+    response = _http("feishu_bot").post(url, data=json.dumps(data)).json()
 
     if response.get("StatusCode") == 0 or response.get("code") == 0:
         print("飞书 推送成功！")
+        return True
     else:
         print("飞书 推送失败！错误信息如下：\n", response)
+        return False
 
 
-def go_cqhttp(title: str, content: str) -> None:
+def go_cqhttp(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 go_cqhttp 推送消息。
     """
-    if not push_config.get("GOBOT_URL") or not push_config.get("GOBOT_QQ"):
+    config = _config(config)
+    if not config.get("GOBOT_URL") or not config.get("GOBOT_QQ"):
         print("go-cqhttp 服务的 GOBOT_URL 或 GOBOT_QQ 未设置!!\n取消推送")
-        return
+        return False
     print("go-cqhttp 服务启动")
 
-    url = f'{push_config.get("GOBOT_URL")}?access_token={push_config.get("GOBOT_TOKEN")}&{push_config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
-    response = requests.get(url).json()
+    url = f'{config.get("GOBOT_URL")}?access_token={config.get("GOBOT_TOKEN")}&{config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
+    response = _http("go_cqhttp").get(url).json()
 
     if response["status"] == "ok":
         print("go-cqhttp 推送成功！")
+        return True
     else:
         print("go-cqhttp 推送失败！")
+        return False
 
 
-def gotify(title: str, content: str) -> None:
+def gotify(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 gotify 推送消息。
     """
-    if not push_config.get("GOTIFY_URL") or not push_config.get("GOTIFY_TOKEN"):
+    config = _config(config)
+    if not config.get("GOTIFY_URL") or not config.get("GOTIFY_TOKEN"):
         print("gotify 服务的 GOTIFY_URL 或 GOTIFY_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("gotify 服务启动")
 
-    url = f'{push_config.get("GOTIFY_URL")}/message?token={push_config.get("GOTIFY_TOKEN")}'
+    url = f'{config.get("GOTIFY_URL")}/message?token={config.get("GOTIFY_TOKEN")}'
     data = {
         "title": title,
         "message": content,
-        "priority": push_config.get("GOTIFY_PRIORITY"),
+        "priority": config.get("GOTIFY_PRIORITY"),
     }
-    response = requests.post(url, data=data).json()
+    response = _http("gotify").post(url, data=data).json()
 
     if response.get("id"):
         print("gotify 推送成功！")
+        return True
     else:
         print("gotify 推送失败！")
+        return False
 
 
-def iGot(title: str, content: str) -> None:
+def iGot(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 iGot 推送消息。
     """
-    if not push_config.get("IGOT_PUSH_KEY"):
+    config = _config(config)
+    if not config.get("IGOT_PUSH_KEY"):
         print("iGot 服务的 IGOT_PUSH_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("iGot 服务启动")
 
-    url = f'https://push.hellyw.com/{push_config.get("IGOT_PUSH_KEY")}'
+    url = f'https://push.hellyw.com/{config.get("IGOT_PUSH_KEY")}'
     data = {"title": title, "content": content}
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(url, data=data, headers=headers).json()
+    response = _http("iGot").post(url, data=data, headers=headers).json()
 
     if response["ret"] == 0:
         print("iGot 推送成功！")
+        return True
     else:
         print(f'iGot 推送失败！{response["errMsg"]}')
+        return False
 
 
-def serverJ(title: str, content: str) -> None:
+def serverJ(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过 serverJ 推送消息。
     """
-    if not push_config.get("PUSH_KEY"):
+    config = _config(config)
+    if not config.get("PUSH_KEY"):
         print("serverJ 服务的 PUSH_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("serverJ 服务启动")
 
     data = {"text": title, "desp": content.replace("\n", "\n\n")}
-    if push_config.get("PUSH_KEY").find("SCT") != -1:
-        url = f'https://sctapi.ftqq.com/{push_config.get("PUSH_KEY")}.send'
+    if config.get("PUSH_KEY").find("SCT") != -1:
+        url = f'https://sctapi.ftqq.com/{config.get("PUSH_KEY")}.send'
     else:
-        url = f'https://sc.ftqq.com/{push_config.get("PUSH_KEY")}.send'
-    response = requests.post(url, data=data).json()
+        url = f'https://sc.ftqq.com/{config.get("PUSH_KEY")}.send'
+    response = _http("serverJ").post(url, data=data).json()
 
     if response.get("errno") == 0 or response.get("code") == 0:
         print("serverJ 推送成功！")
+        return True
     else:
         print(f'serverJ 推送失败！错误码：{response["message"]}')
+        return False
 
 
-def pushdeer(title: str, content: str) -> None:
+def pushdeer(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过PushDeer 推送消息
     """
-    if not push_config.get("DEER_KEY"):
+    config = _config(config)
+    if not config.get("DEER_KEY"):
         print("PushDeer 服务的 DEER_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("PushDeer 服务启动")
     data = {
         "text": title,
         "desp": content,
         "type": "markdown",
-        "pushkey": push_config.get("DEER_KEY"),
+        "pushkey": config.get("DEER_KEY"),
     }
     url = "https://api2.pushdeer.com/message/push"
-    if push_config.get("DEER_URL"):
-        url = push_config.get("DEER_URL")
+    if config.get("DEER_URL"):
+        url = config.get("DEER_URL")
 
-    response = requests.post(url, data=data).json()
+    response = _http("pushdeer").post(url, data=data).json()
 
     if len(response.get("content").get("result")) > 0:
         print("PushDeer 推送成功！")
+        return True
     else:
         print("PushDeer 推送失败！错误信息：", response)
+        return False
 
 
-def chat(title: str, content: str) -> None:
+def chat(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过Chat 推送消息
     """
-    if not push_config.get("CHAT_URL") or not push_config.get("CHAT_TOKEN"):
+    config = _config(config)
+    if not config.get("CHAT_URL") or not config.get("CHAT_TOKEN"):
         print("chat 服务的 CHAT_URL或CHAT_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("chat 服务启动")
     data = "payload=" + json.dumps({"text": title + "\n" + content})
-    url = push_config.get("CHAT_URL") + push_config.get("CHAT_TOKEN")
-    response = requests.post(url, data=data)
+    url = config.get("CHAT_URL") + config.get("CHAT_TOKEN")
+    response = _http("chat").post(url, data=data)
 
     if response.status_code == 200:
         print("Chat 推送成功！")
+        return True
     else:
         print("Chat 推送失败！错误信息：", response)
+        return False
 
 
-def pushplus_bot(title: str, content: str) -> None:
+def pushplus_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过 push+ 推送消息。
     """
-    if not push_config.get("PUSH_PLUS_TOKEN"):
+    config = _config(config)
+    if not config.get("PUSH_PLUS_TOKEN"):
         print("PUSHPLUS 服务的 PUSH_PLUS_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("PUSHPLUS 服务启动")
 
     url = "http://www.pushplus.plus/send"
     data = {
-        "token": push_config.get("PUSH_PLUS_TOKEN"),
+        "token": config.get("PUSH_PLUS_TOKEN"),
         "title": title,
         "content": content,
-        "topic": push_config.get("PUSH_PLUS_USER"),
+        "topic": config.get("PUSH_PLUS_USER"),
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("pushplus_bot").post(url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("PUSHPLUS 推送成功！")
+        return True
 
     else:
         url_old = "http://pushplus.hxtrip.com/send"
         headers["Accept"] = "application/json"
-        response = requests.post(url=url_old, data=body, headers=headers).json()
+        response = _http("pushplus_bot").post(url=url_old, data=body, headers=headers).json()
 
         if response["code"] == 200:
             print("PUSHPLUS(hxtrip) 推送成功！")
+            return True
 
         else:
             print("PUSHPLUS 推送失败！")
+            return False
 
 
-def weplus_bot(title: str, content: str) -> None:
+def weplus_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过 微加机器人 推送消息。
     """
-    if not push_config.get("WE_PLUS_BOT_TOKEN"):
+    config = _config(config)
+    if not config.get("WE_PLUS_BOT_TOKEN"):
         print("微加机器人 服务的 WE_PLUS_BOT_TOKEN 未设置!!\n取消推送")
-        return
+        return False
     print("微加机器人 服务启动")
 
     template = "txt"
@@ -421,353 +803,217 @@ def weplus_bot(title: str, content: str) -> None:
 
     url = "https://www.weplusbot.com/send"
     data = {
-        "token": push_config.get("WE_PLUS_BOT_TOKEN"),
+        "token": config.get("WE_PLUS_BOT_TOKEN"),
         "title": title,
         "content": content,
         "template": template,
-        "receiver": push_config.get("WE_PLUS_BOT_RECEIVER"),
-        "version": push_config.get("WE_PLUS_BOT_VERSION"),
+        "receiver": config.get("WE_PLUS_BOT_RECEIVER"),
+        "version": config.get("WE_PLUS_BOT_VERSION"),
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("weplus_bot").post(url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("微加机器人 推送成功！")
+        return True
     else:
         print("微加机器人 推送失败！")
+        return False
 
 
-def qmsg_bot(title: str, content: str) -> None:
+def qmsg_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 qmsg 推送消息。
     """
-    if not push_config.get("QMSG_KEY") or not push_config.get("QMSG_TYPE"):
+    config = _config(config)
+    if not config.get("QMSG_KEY") or not config.get("QMSG_TYPE"):
         print("qmsg 的 QMSG_KEY 或者 QMSG_TYPE 未设置!!\n取消推送")
-        return
+        return False
     print("qmsg 服务启动")
 
-    url = f'https://qmsg.zendee.cn/{push_config.get("QMSG_TYPE")}/{push_config.get("QMSG_KEY")}'
+    url = f'https://qmsg.zendee.cn/{config.get("QMSG_TYPE")}/{config.get("QMSG_KEY")}'
     payload = {"msg": f'{title}\n\n{content.replace("----", "-")}'.encode("utf-8")}
-    response = requests.post(url=url, params=payload).json()
+    response = _http("qmsg_bot").post(url=url, params=payload).json()
 
     if response["code"] == 0:
         print("qmsg 推送成功！")
+        return True
     else:
         print(f'qmsg 推送失败！{response["reason"]}')
+        return False
 
 
-def wecom_app(title: str, content: str) -> None:
-    """
-    通过 企业微信 APP 推送消息。
-    """
-    if not push_config.get("QYWX_AM"):
-        print("QYWX_AM 未设置!!\n取消推送")
-        return
-    QYWX_AM_AY = re.split(",", push_config.get("QYWX_AM"))
-    if 4 < len(QYWX_AM_AY) > 5:
-        print("QYWX_AM 设置错误!!\n取消推送")
-        return
-    print("企业微信 APP 服务启动")
-
-    corpid = QYWX_AM_AY[0]
-    corpsecret = QYWX_AM_AY[1]
-    touser = QYWX_AM_AY[2]
-    agentid = QYWX_AM_AY[3]
-    try:
-        media_id = QYWX_AM_AY[4]
-    except IndexError:
-        media_id = ""
-    wx = WeCom(corpid, corpsecret, agentid)
-    # 如果没有配置 media_id 默认就以 text 方式发送
-    if not media_id:
-        message = title + "\n\n" + content
-        response = wx.send_text(message, touser)
-    else:
-        response = wx.send_mpnews(title, content, media_id, touser)
-
-    if response == "ok":
-        print("企业微信推送成功！")
-    else:
-        print("企业微信推送失败！错误信息如下：\n", response)
-
-
-class WeCom:
-    def __init__(self, corpid, corpsecret, agentid):
-        self.CORPID = corpid
-        self.CORPSECRET = corpsecret
-        self.AGENTID = agentid
-        self.ORIGIN = "https://qyapi.weixin.qq.com"
-        if push_config.get("QYWX_ORIGIN"):
-            self.ORIGIN = push_config.get("QYWX_ORIGIN")
-
-    def get_access_token(self):
-        url = f"{self.ORIGIN}/cgi-bin/gettoken"
-        values = {
-            "corpid": self.CORPID,
-            "corpsecret": self.CORPSECRET,
-        }
-        req = requests.post(url, params=values)
-        data = json.loads(req.text)
-        return data["access_token"]
-
-    def send_text(self, message, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
-        send_values = {
-            "touser": touser,
-            "msgtype": "text",
-            "agentid": self.AGENTID,
-            "text": {"content": message},
-            "safe": "0",
-        }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
-
-    def send_mpnews(self, title, message, media_id, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
-        send_values = {
-            "touser": touser,
-            "msgtype": "mpnews",
-            "agentid": self.AGENTID,
-            "mpnews": {
-                "articles": [
-                    {
-                        "title": title,
-                        "thumb_media_id": media_id,
-                        "author": "Author",
-                        "content_source_url": "",
-                        "content": message.replace("\n", "<br/>"),
-                        "digest": message,
-                    }
-                ]
-            },
-        }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
-
-
-def wecom_bot(title: str, content: str) -> None:
+def wecom_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过 企业微信机器人 推送消息。
     """
-    if not push_config.get("QYWX_KEY"):
+    config = _config(config)
+    if not config.get("QYWX_KEY"):
         print("企业微信机器人 服务的 QYWX_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("企业微信机器人服务启动")
 
     origin = "https://qyapi.weixin.qq.com"
-    if push_config.get("QYWX_ORIGIN"):
-        origin = push_config.get("QYWX_ORIGIN")
+    if config.get("QYWX_ORIGIN"):
+        origin = config.get("QYWX_ORIGIN")
 
-    url = f"{origin}/cgi-bin/webhook/send?key={push_config.get('QYWX_KEY')}"
+    url = f"{origin}/cgi-bin/webhook/send?key={config.get('QYWX_KEY')}"
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = _http("wecom_bot").post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["errcode"] == 0:
         print("企业微信机器人推送成功！")
+        return True
     else:
         print("企业微信机器人推送失败！")
+        return False
 
 
-def telegram_bot(title: str, content: str) -> None:
+def telegram_bot(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 telegram 机器人 推送消息。
     """
-    if not push_config.get("TG_BOT_TOKEN") or not push_config.get("TG_USER_ID"):
+    config = _config(config)
+    if not config.get("TG_BOT_TOKEN") or not config.get("TG_USER_ID"):
         print("tg 服务的 bot_token 或者 user_id 未设置!!\n取消推送")
-        return
+        return False
     print("tg 服务启动")
 
-    if push_config.get("TG_API_HOST"):
-        url = f"{push_config.get('TG_API_HOST')}/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
+    if config.get("TG_API_HOST"):
+        url = f"{config.get('TG_API_HOST')}/bot{config.get('TG_BOT_TOKEN')}/sendMessage"
     else:
         url = (
-            f"https://api.telegram.org/bot{push_config.get('TG_BOT_TOKEN')}/sendMessage"
+            f"https://api.telegram.org/bot{config.get('TG_BOT_TOKEN')}/sendMessage"
         )
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
     payload = {
-        "chat_id": str(push_config.get("TG_USER_ID")),
+        "chat_id": str(config.get("TG_USER_ID")),
         "text": f"{title}\n\n{content}",
         "disable_web_page_preview": "true",
     }
     proxies = None
-    if push_config.get("TG_PROXY_HOST") and push_config.get("TG_PROXY_PORT"):
-        if push_config.get("TG_PROXY_AUTH") is not None and "@" not in push_config.get(
-                "TG_PROXY_HOST"
-        ):
-            push_config["TG_PROXY_HOST"] = (
-                    push_config.get("TG_PROXY_AUTH")
-                    + "@"
-                    + push_config.get("TG_PROXY_HOST")
-            )
-        proxyStr = "http://{}:{}".format(
-            push_config.get("TG_PROXY_HOST"), push_config.get("TG_PROXY_PORT")
-        )
+    proxy_host = config.get("TG_PROXY_HOST")
+    if proxy_host and config.get("TG_PROXY_PORT"):
+        # 配置快照是只读的，代理认证信息拼接到局部变量中
+        if config.get("TG_PROXY_AUTH") and "@" not in proxy_host:
+            proxy_host = config.get("TG_PROXY_AUTH") + "@" + proxy_host
+        proxyStr = "http://{}:{}".format(proxy_host, config.get("TG_PROXY_PORT"))
         proxies = {"http": proxyStr, "https": proxyStr}
-    response = requests.post(
+    response = _http("telegram_bot").post(
         url=url, headers=headers, params=payload, proxies=proxies
     ).json()
 
     if response["ok"]:
         print("tg 推送成功！")
+        return True
     else:
         print("tg 推送失败！")
+        return False
 
 
-def aibotk(title: str, content: str) -> None:
+def aibotk(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 智能微秘书 推送消息。
     """
+    config = _config(config)
     if (
-            not push_config.get("AIBOTK_KEY")
-            or not push_config.get("AIBOTK_TYPE")
-            or not push_config.get("AIBOTK_NAME")
+            not config.get("AIBOTK_KEY")
+            or not config.get("AIBOTK_TYPE")
+            or not config.get("AIBOTK_NAME")
     ):
         print(
             "智能微秘书 的 AIBOTK_KEY 或者 AIBOTK_TYPE 或者 AIBOTK_NAME 未设置!!\n取消推送"
         )
-        return
+        return False
     print("智能微秘书 服务启动")
 
-    if push_config.get("AIBOTK_TYPE") == "room":
+    if config.get("AIBOTK_TYPE") == "room":
         url = "https://api-bot.aibotk.com/openapi/v1/chat/room"
         data = {
-            "apiKey": push_config.get("AIBOTK_KEY"),
-            "roomName": push_config.get("AIBOTK_NAME"),
+            "apiKey": config.get("AIBOTK_KEY"),
+            "roomName": config.get("AIBOTK_NAME"),
             "message": {"type": 1, "content": f"【青龙快讯】\n\n{title}\n{content}"},
         }
     else:
         url = "https://api-bot.aibotk.com/openapi/v1/chat/contact"
         data = {
-            "apiKey": push_config.get("AIBOTK_KEY"),
-            "name": push_config.get("AIBOTK_NAME"),
+            "apiKey": config.get("AIBOTK_KEY"),
+            "name": config.get("AIBOTK_NAME"),
             "message": {"type": 1, "content": f"【青龙快讯】\n\n{title}\n{content}"},
         }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = _http("aibotk").post(url=url, data=body, headers=headers).json()
     print(response)
     if response["code"] == 0:
         print("智能微秘书 推送成功！")
+        return True
     else:
         print(f'智能微秘书 推送失败！{response["error"]}')
+        return False
 
 
-def smtp(title: str, content: str) -> None:
-    """
-    使用 SMTP 邮件 推送消息。
-    """
-    if (
-            not push_config.get("SMTP_SERVER")
-            or not push_config.get("SMTP_SSL")
-            or not push_config.get("SMTP_EMAIL")
-            or not push_config.get("SMTP_PASSWORD")
-            or not push_config.get("SMTP_NAME")
-    ):
-        print(
-            "SMTP 邮件 的 SMTP_SERVER 或者 SMTP_SSL 或者 SMTP_EMAIL 或者 SMTP_PASSWORD 或者 SMTP_NAME 未设置!!\n取消推送"
-        )
-        return
-    print("SMTP 邮件 服务启动")
-
-    message = MIMEText(content, "plain", "utf-8")
-    message["From"] = formataddr(
-        (
-            Header(push_config.get("SMTP_NAME"), "utf-8").encode(),
-            push_config.get("SMTP_EMAIL"),
-        )
-    )
-    message["To"] = formataddr(
-        (
-            Header(push_config.get("SMTP_NAME"), "utf-8").encode(),
-            push_config.get("SMTP_EMAIL"),
-        )
-    )
-    message["Subject"] = Header(title, "utf-8")
-
-    try:
-        smtp_server = (
-            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"))
-            if push_config.get("SMTP_SSL") == "true"
-            else smtplib.SMTP(push_config.get("SMTP_SERVER"))
-        )
-        smtp_server.login(
-            push_config.get("SMTP_EMAIL"), push_config.get("SMTP_PASSWORD")
-        )
-        smtp_server.sendmail(
-            push_config.get("SMTP_EMAIL"),
-            push_config.get("SMTP_EMAIL"),
-            message.as_bytes(),
-        )
-        smtp_server.close()
-        print("SMTP 邮件 推送成功！")
-    except Exception as e:
-        print(f"SMTP 邮件 推送失败！{e}")
-
-
-def pushme(title: str, content: str) -> None:
+def pushme(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 PushMe 推送消息。
     """
-    if not push_config.get("PUSHME_KEY"):
+    config = _config(config)
+    if not config.get("PUSHME_KEY"):
         print("PushMe 服务的 PUSHME_KEY 未设置!!\n取消推送")
-        return
+        return False
     print("PushMe 服务启动")
 
     url = (
-        push_config.get("PUSHME_URL")
-        if push_config.get("PUSHME_URL")
+        config.get("PUSHME_URL")
+        if config.get("PUSHME_URL")
         else "https://push.i-i.me/"
     )
     data = {
-        "push_key": push_config.get("PUSHME_KEY"),
+        "push_key": config.get("PUSHME_KEY"),
         "title": title,
         "content": content,
-        "date": push_config.get("date") if push_config.get("date") else "",
-        "type": push_config.get("type") if push_config.get("type") else "",
+        "date": config.get("date") if config.get("date") else "",
+        "type": config.get("type") if config.get("type") else "",
     }
-    response = requests.post(url, data=data)
+    response = _http("pushme").post(url, data=data)
 
     if response.status_code == 200 and response.text == "success":
         print("PushMe 推送成功！")
+        return True
     else:
         print(f"PushMe 推送失败！{response.status_code} {response.text}")
+        return False
 
 
-def chronocat(title: str, content: str) -> None:
+def chronocat(title: str, content: str, config: Mapping = None) -> bool:
     """
     使用 CHRONOCAT 推送消息。
     """
+    config = _config(config)
     if (
-            not push_config.get("CHRONOCAT_URL")
-            or not push_config.get("CHRONOCAT_QQ")
-            or not push_config.get("CHRONOCAT_TOKEN")
+            not config.get("CHRONOCAT_URL")
+            or not config.get("CHRONOCAT_QQ")
+            or not config.get("CHRONOCAT_TOKEN")
     ):
         print("CHRONOCAT 服务的 CHRONOCAT_URL 或 CHRONOCAT_QQ 未设置!!\n取消推送")
-        return
+        return False
 
     print("CHRONOCAT 服务启动")
 
-    user_ids = re.findall(r"user_id=(\d+)", push_config.get("CHRONOCAT_QQ"))
-    group_ids = re.findall(r"group_id=(\d+)", push_config.get("CHRONOCAT_QQ"))
+    user_ids = re.findall(r"user_id=(\d+)", config.get("CHRONOCAT_QQ"))
+    group_ids = re.findall(r"group_id=(\d+)", config.get("CHRONOCAT_QQ"))
 
-    url = f'{push_config.get("CHRONOCAT_URL")}/api/message/send'
+    url = f'{config.get("CHRONOCAT_URL")}/api/message/send'
     headers = {
         "Content-Type": "application/json",
-        "Authorization": f'Bearer {push_config.get("CHRONOCAT_TOKEN")}',
+        "Authorization": f'Bearer {config.get("CHRONOCAT_TOKEN")}',
     }
 
+    success = True
     for chat_type, ids in [(1, user_ids), (2, group_ids)]:
         if not ids:
             continue
@@ -781,17 +1027,19 @@ def chronocat(title: str, content: str) -> None:
                     }
                 ],
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = _http("chronocat").post(url, headers=headers, data=json.dumps(data))
             if response.status_code == 200:
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送成功！")
                 else:
                     print(f"QQ群消息:{ids}推送成功！")
             else:
+                success = False
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送失败！")
                 else:
                     print(f"QQ群消息:{ids}推送失败！")
+    return success
 
 
 def parse_headers(headers):
@@ -845,25 +1093,26 @@ def parse_body(body, content_type, value_format_fn=None):
     return parsed
 
 
-def custom_notify(title: str, content: str) -> None:
+def custom_notify(title: str, content: str, config: Mapping = None) -> bool:
     """
     通过 自定义通知 推送消息。
     """
-    if not push_config.get("WEBHOOK_URL") or not push_config.get("WEBHOOK_METHOD"):
+    config = _config(config)
+    if not config.get("WEBHOOK_URL") or not config.get("WEBHOOK_METHOD"):
         print("自定义通知的 WEBHOOK_URL 或 WEBHOOK_METHOD 未设置!!\n取消推送")
-        return
+        return False
 
     print("自定义通知服务启动")
 
-    WEBHOOK_URL = push_config.get("WEBHOOK_URL")
-    WEBHOOK_METHOD = push_config.get("WEBHOOK_METHOD")
-    WEBHOOK_CONTENT_TYPE = push_config.get("WEBHOOK_CONTENT_TYPE")
-    WEBHOOK_BODY = push_config.get("WEBHOOK_BODY")
-    WEBHOOK_HEADERS = push_config.get("WEBHOOK_HEADERS")
+    WEBHOOK_URL = config.get("WEBHOOK_URL")
+    WEBHOOK_METHOD = config.get("WEBHOOK_METHOD")
+    WEBHOOK_CONTENT_TYPE = config.get("WEBHOOK_CONTENT_TYPE")
+    WEBHOOK_BODY = config.get("WEBHOOK_BODY")
+    WEBHOOK_HEADERS = config.get("WEBHOOK_HEADERS")
 
     if "$title" not in WEBHOOK_URL and "$title" not in WEBHOOK_BODY:
         print("请求头或者请求体中必须包含 $title 和 $content")
-        return
+        return False
 
     headers = parse_headers(WEBHOOK_HEADERS)
     body = parse_body(
@@ -874,14 +1123,91 @@ def custom_notify(title: str, content: str) -> None:
     formatted_url = WEBHOOK_URL.replace(
         "$title", urllib.parse.quote_plus(title)
     ).replace("$content", urllib.parse.quote_plus(content))
-    response = requests.request(
-        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, timeout=15, data=body
+    response = _http("custom_notify").request(
+        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, data=body
     )
 
     if response.status_code == 200:
         print("自定义通知推送成功！")
+        return True
     else:
         print(f"自定义通知推送失败！{response.status_code} {response.text}")
+        return False
+
+
+# 一言接口不可用时使用的内置句子
+HITOKOTO_FALLBACK = (
+    ("人生如逆旅，我亦是行人。", "临江仙·送钱穆父"),
+    ("路漫漫其修远兮，吾将上下而求索。", "离骚"),
+    ("长风破浪会有时，直挂云帆济沧海。", "行路难"),
+    ("纸上得来终觉浅，绝知此事要躬行。", "冬夜读书示子聿"),
+    ("千里之行，始于足下。", "道德经"),
+    ("不积跬步，无以至千里。", "劝学"),
+    ("山重水复疑无路，柳暗花明又一村。", "游山西村"),
+    ("采菊东篱下，悠然见南山。", "饮酒"),
+    ("行到水穷处，坐看云起时。", "终南别业"),
+    ("会当凌绝顶，一览众山小。", "望岳"),
+)
+
+
+class HitokotoBuffer:
+    """
+    一言的环形缓冲区：推送时直接从缓冲区取句子，数量不足时在后台线程中补充；
+    补充请求有严格的超时，缓冲区为空时使用内置句子，推送不再等待一言接口。
+    """
+
+    URL = "https://v1.hitokoto.cn/"
+
+    def __init__(self, capacity: int = HITOKOTO_BUFFER_SIZE, timeout: float = HITOKOTO_TIMEOUT):
+        self.capacity = max(capacity, 1)
+        self.timeout = timeout
+        self._quotes = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._retry_at = 0.0
+        self._pid = None
+
+    def _fetch(self) -> str:
+        res = _http("hitokoto").get(self.URL, timeout=self.timeout).json()
+        return res["hitokoto"] + "    ----" + res["from"]
+
+    def _refill(self) -> None:
+        try:
+            while len(self._quotes) < self.capacity:
+                self._quotes.append(self._fetch())
+        except Exception as e:
+            # 接口不可用时暂停一段时间再试，期间使用内置句子
+            self._retry_at = time.time() + 60
+            print(f"获取一言失败，暂时使用内置句子: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def _maybe_refill(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 后子进程中不存在父进程的补充线程
+                self._pid = os.getpid()
+                self._refilling = False
+            if self._refilling or len(self._quotes) > self.capacity // 2 or time.time() < self._retry_at:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, name="HitokotoRefill", daemon=True).start()
+
+    def get(self) -> str:
+        """
+        取出一条一言，不会阻塞。
+        """
+        try:
+            quote = self._quotes.popleft()
+        except IndexError:
+            text, source = random.choice(HITOKOTO_FALLBACK)
+            quote = text + "    ----" + source
+        self._maybe_refill()
+        return quote
+
+
+_hitokoto = HitokotoBuffer()
 
 
 def one() -> str:
@@ -889,104 +1215,363 @@ def one() -> str:
     获取一条一言。
     :return:
     """
-    url = "https://v1.hitokoto.cn/"
-    res = requests.get(url).json()
-    return res["hitokoto"] + "    ----" + res["from"]
+    return _hitokoto.get()
 
 
-def add_notify_function():
-    notify_function = []
-    if push_config.get("BARK_PUSH"):
-        notify_function.append(bark)
-    if push_config.get("CONSOLE"):
-        notify_function.append(console)
-    if push_config.get("DD_BOT_TOKEN") and push_config.get("DD_BOT_SECRET"):
-        notify_function.append(dingding_bot)
-    if push_config.get("FSKEY"):
-        notify_function.append(feishu_bot)
-    if push_config.get("GOBOT_URL") and push_config.get("GOBOT_QQ"):
-        notify_function.append(go_cqhttp)
-    if push_config.get("GOTIFY_URL") and push_config.get("GOTIFY_TOKEN"):
-        notify_function.append(gotify)
-    if push_config.get("IGOT_PUSH_KEY"):
-        notify_function.append(iGot)
-    if push_config.get("PUSH_KEY"):
-        notify_function.append(serverJ)
-    if push_config.get("DEER_KEY"):
-        notify_function.append(pushdeer)
-    if push_config.get("CHAT_URL") and push_config.get("CHAT_TOKEN"):
-        notify_function.append(chat)
-    if push_config.get("PUSH_PLUS_TOKEN"):
-        notify_function.append(pushplus_bot)
-    if push_config.get("WE_PLUS_BOT_TOKEN"):
-        notify_function.append(weplus_bot)
-    if push_config.get("QMSG_KEY") and push_config.get("QMSG_TYPE"):
-        notify_function.append(qmsg_bot)
-    if push_config.get("QYWX_AM"):
-        notify_function.append(wecom_app)
-    if push_config.get("QYWX_KEY"):
-        notify_function.append(wecom_bot)
-    if push_config.get("TG_BOT_TOKEN") and push_config.get("TG_USER_ID"):
-        notify_function.append(telegram_bot)
-    if (
-            push_config.get("AIBOTK_KEY")
-            and push_config.get("AIBOTK_TYPE")
-            and push_config.get("AIBOTK_NAME")
-    ):
-        notify_function.append(aibotk)
-    if (
-            push_config.get("SMTP_SERVER")
-            and push_config.get("SMTP_SSL")
-            and push_config.get("SMTP_EMAIL")
-            and push_config.get("SMTP_PASSWORD")
-            and push_config.get("SMTP_NAME")
-    ):
-        notify_function.append(smtp)
-    if push_config.get("PUSHME_KEY"):
-        notify_function.append(pushme)
-    if (
-            push_config.get("CHRONOCAT_URL")
-            and push_config.get("CHRONOCAT_QQ")
-            and push_config.get("CHRONOCAT_TOKEN")
-    ):
-        notify_function.append(chronocat)
-    if push_config.get("WEBHOOK_URL") and push_config.get("WEBHOOK_METHOD"):
-        notify_function.append(custom_notify)
+class Channel(NamedTuple):
+    """
+    一个已启用的推送渠道：渠道名、推送函数和构建注册表时的只读配置快照。
+    """
+    name: str
+    func: Callable
+    config: Mapping
+
+
+class ChannelSpec(NamedTuple):
+    """
+    推送渠道的声明：required 中的配置项都不为空时启用该渠道；
+    func 可以是函数，也可以是 "模块:函数名" 字符串，后者在渠道启用时才导入；
+    validate 可选，接收配置返回错误信息，构建注册表时校验失败的渠道不启用。
+    """
+    name: str
+    func: Union[Callable, str]
+    required: tuple
+    validate: Callable = None
+
+
+def _resolve(func: Union[Callable, str]) -> Callable:
+    if callable(func):
+        return func
+    module, _, attr = func.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _validate_wecom_app(config: Mapping):
+    if not 4 <= len(config.get("QYWX_AM").split(",")) <= 5:
+        return "QYWX_AM 设置错误，应为 corpid,corpsecret,touser,agentid[,media_id]"
+    return None
+
+
+_channel_specs = [
+    ChannelSpec("bark", bark, ("BARK_PUSH",)),
+    ChannelSpec("console", console, ("CONSOLE",)),
+    ChannelSpec("dingding_bot", "utils.notify_channels.dingtalk:dingding_bot", ("DD_BOT_TOKEN", "DD_BOT_SECRET")),
+    ChannelSpec("feishu_bot", feishu_bot, ("FSKEY",)),
+    ChannelSpec("go_cqhttp", go_cqhttp, ("GOBOT_URL", "GOBOT_QQ")),
+    ChannelSpec("gotify", gotify, ("GOTIFY_URL", "GOTIFY_TOKEN")),
+    ChannelSpec("iGot", iGot, ("IGOT_PUSH_KEY",)),
+    ChannelSpec("serverJ", serverJ, ("PUSH_KEY",)),
+    ChannelSpec("pushdeer", pushdeer, ("DEER_KEY",)),
+    ChannelSpec("chat", chat, ("CHAT_URL", "CHAT_TOKEN")),
+    ChannelSpec("pushplus_bot", pushplus_bot, ("PUSH_PLUS_TOKEN",)),
+    ChannelSpec("weplus_bot", weplus_bot, ("WE_PLUS_BOT_TOKEN",)),
+    ChannelSpec("qmsg_bot", qmsg_bot, ("QMSG_KEY", "QMSG_TYPE")),
+    ChannelSpec("wecom_app", "utils.notify_channels.wecom:wecom_app", ("QYWX_AM",), _validate_wecom_app),
+    ChannelSpec("wecom_bot", wecom_bot, ("QYWX_KEY",)),
+    ChannelSpec("telegram_bot", telegram_bot, ("TG_BOT_TOKEN", "TG_USER_ID")),
+    ChannelSpec("aibotk", aibotk, ("AIBOTK_KEY", "AIBOTK_TYPE", "AIBOTK_NAME")),
+    ChannelSpec(
+        "smtp", "utils.notify_channels.smtp:smtp", ("SMTP_SERVER", "SMTP_SSL", "SMTP_EMAIL", "SMTP_PASSWORD", "SMTP_NAME")
+    ),
+    ChannelSpec("pushme", pushme, ("PUSHME_KEY",)),
+    ChannelSpec("chronocat", chronocat, ("CHRONOCAT_URL", "CHRONOCAT_QQ", "CHRONOCAT_TOKEN")),
+    ChannelSpec("custom_notify", custom_notify, ("WEBHOOK_URL", "WEBHOOK_METHOD")),
+]
+_specs_lock = threading.Lock()
+
+
+class ChannelRegistry:
+    """
+    根据一份配置构建的推送渠道列表，构建后不再修改；配置变化时整体替换为新的注册表，
+    正在进行的推送继续使用旧的注册表，不会读到一半新一半旧的配置。
+    """
+
+    def __init__(self, config: Mapping, specs=None):
+        self.config = MappingProxyType(dict(config))
+        with _specs_lock:
+            specs = list(specs if specs is not None else _channel_specs)
+        channels = []
+        for spec in specs:
+            if not all(self.config.get(key) for key in spec.required):
+                continue
+            error = spec.validate(self.config) if spec.validate else None
+            if error:
+                print(f"{spec.name} 未启用: {error}")
+                continue
+            try:
+                func = _resolve(spec.func)
+            except Exception as e:
+                print(f"{spec.name} 未启用: 加载渠道失败 {e}")
+                continue
+            channels.append(Channel(spec.name, func, self.config))
+        self.channels = tuple(channels)
+
+    def names(self) -> list:
+        return [channel.name for channel in self.channels]
+
+
+def _config(config: Mapping = None) -> Mapping:
+    """
+    渠道函数未传入配置时使用当前注册表的配置快照。
+    """
+    return config if config is not None else _registry.config
+
 
+def reload_config(overrides: Mapping = None) -> ChannelRegistry:
+    """
+    重新读取 NOTIFY_CONFIG_FILE、环境变量（以及 overrides）并原子地替换渠道注册表，返回新的注册表。
+    配置文件变化时由 ConfigReloader 调用；配置文件无效时抛出 ValueError，保留当前的注册表。
+    """
+    return _swap(_load_config(overrides))
+
+
+def _swap(config: dict) -> ChannelRegistry:
+    # 先构建完整的新注册表，再一次性替换引用，进行中的推送继续使用旧的注册表
+    global push_config, _registry
+    registry = ChannelRegistry(config)
+    push_config, _registry = config, registry
+    print(f"推送渠道已加载: {', '.join(registry.names()) or '无'}")
+    return registry
+
+
+def register_channel(
+        name: str,
+        func: Union[Callable, str],
+        required=(),
+        keys=(),
+        validate: Callable = None
+) -> None:
+    """
+    注册推送渠道插件。func 的签名为 func(title, content, config) -> bool，也可以是 "模块:函数名"，启用时才导入；
+    required 中的配置项都不为空时启用，required 和 keys 中的配置项会从环境变量读取。
+    同名渠道会被替换，注册后立即重建注册表。
+    """
+    required = tuple(required)
+    with _specs_lock:
+        _plugin_keys.update(required, keys)
+        _channel_specs[:] = [spec for spec in _channel_specs if spec.name != name]
+        _channel_specs.append(ChannelSpec(name, func, required, validate))
+    _swap(_load_config(strict=False))
+
+
+def _load_plugins(modules: str) -> None:
+    # 插件模块在导入时调用 register_channel 注册渠道
+    for module in filter(None, (part.strip() for part in modules.split(","))):
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"加载推送插件 {module} 失败: {e}")
+
+
+def add_notify_function():
+    """
+    返回当前启用的推送函数，保留给旧代码使用。
+    """
+    notify_function = [channel.func for channel in _registry.channels]
     if not notify_function:
         print("无推送渠道，请检查通知变量是否正确")
     return notify_function
 
 
-def send(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+def timed_notify(channel: Channel, title: str, content: str) -> Optional[bool]:
+    """
+    调用单个推送渠道并记录推送耗时，返回是否成功；熔断器不放行（冷却期内或试探请求进行中）时不推送，返回 None。
+    """
+    name = channel.name
+    breaker = _breaker(name)
+    if not breaker.allow():
+        print(f"{name} 处于熔断状态，跳过推送")
+        return None
+
+    start = time.perf_counter()
+    error = None
+    try:
+        success = channel.func(title, content, channel.config) is not False
+    except Exception as e:
+        print(f"{name} 推送时发生错误: {e}")
+        success, error = False, str(e)
+    finally:
+        NOTIFY_LATENCY.labels(channel=name).observe(time.perf_counter() - start)
+    breaker.record(success, error)
+    return success
+
+
+def _prepare(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+    """
+    处理推送内容并选择渠道，返回要推送的内容和渠道；不需要推送时返回 None。
+    传入 kwargs 时只为本次推送构建临时注册表，不修改全局配置。
+    """
+    registry = _registry
     if kwargs:
-        global push_config
-        if ignore_default_config:
-            push_config = kwargs  # 清空从环境变量获取的配置
-        else:
-            push_config.update(kwargs)
+        registry = ChannelRegistry(kwargs if ignore_default_config else {**registry.config, **kwargs})
 
     if not content:
         print(f"{title} 推送内容为空！")
-        return
+        return None
 
     # 根据标题跳过一些消息推送，环境变量：SKIP_PUSH_TITLE 用回车分隔
     skipTitle = os.getenv("SKIP_PUSH_TITLE")
     if skipTitle:
         if title in re.split("\n", skipTitle):
             print(f"{title} 在SKIP_PUSH_TITLE环境变量内，跳过推送！")
-            return
+            return None
+
+    if not registry.channels:
+        print("无推送渠道，请检查通知变量是否正确")
+        return None
 
-    hitokoto = push_config.get("HITOKOTO")
+    hitokoto = registry.config.get("HITOKOTO")
     content += "\n\n" + one() if hitokoto != "false" else ""
 
-    notify_function = add_notify_function()
-    ts = [
-        threading.Thread(target=mode, args=(title, content), name=mode.__name__)
-        for mode in notify_function
-    ]
-    [t.start() for t in ts]
-    [t.join() for t in ts]
+    return content, registry.channels
+
+
+def _dispatch(title: str, content: str, channels) -> dict:
+    """
+    把每个渠道的推送提交到有界线程池，返回 渠道名 -> Future。
+    """
+    futures = {}
+    for channel in channels:
+        future = _submit(channel, title, content)
+        if future is None:
+            print(f"{channel.name} 排队时间超过 {NOTIFY_RATE_LIMIT_MAX_WAIT} 秒，放弃推送")
+            future = Future()
+            future.set_result(False)
+        futures[channel.name] = future
+    return futures
+
+
+def send_async(title: str, content: str, ignore_default_config: bool = False, **kwargs) -> Future:
+    """
+    异步推送消息，立即返回 Future，所有渠道推送结束后完成，结果为 渠道名 -> 是否成功（熔断中未推送为 None）。
+    """
+    combined = Future()
+    try:
+        prepared = _prepare(title, content, ignore_default_config, **kwargs)
+    except Exception as e:
+        combined.set_exception(e)
+        return combined
+    if not prepared:
+        combined.set_result({})
+        return combined
+
+    futures = _dispatch(title, *prepared)
+    if not futures:
+        combined.set_result({})
+        return combined
+
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_):
+        with lock:
+            remaining[0] -= 1
+            finished = remaining[0] == 0
+        if finished:
+            combined.set_result({name: future.result() for name, future in futures.items()})
+
+    for future in futures.values():
+        future.add_done_callback(_done)
+    return combined
+
+
+def send(
+        title: str,
+        content: str,
+        ignore_default_config: bool = False,
+        deadline: float = NOTIFY_SEND_DEADLINE,
+        **kwargs
+) -> dict:
+    """
+    推送消息并等待结果，最多等待 deadline 秒，超时的渠道在后台继续推送，结果记为 None；熔断中未推送的渠道结果同样为 None。
+    """
+    prepared = _prepare(title, content, ignore_default_config, **kwargs)
+    if not prepared:
+        return {}
+
+    futures = _dispatch(title, *prepared)
+    wait(list(futures.values()), timeout=deadline)
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            results[name] = future.result()
+        else:
+            print(f"{name} 推送超过 {deadline} 秒未完成，不再等待")
+            results[name] = None
+    return results
+
+
+def prepare(title: str, content: str):
+    """
+    处理推送内容并返回 (内容, 启用的渠道名列表)，不需要推送时返回 None；供通知发件箱在写入前调用。
+    """
+    prepared = _prepare(title, content)
+    if not prepared:
+        return None
+    content, channels = prepared
+    return content, [channel.name for channel in channels]
+
+
+def is_enabled(name: str) -> bool:
+    """
+    渠道是否在当前注册表中启用。
+    """
+    return any(channel.name == name for channel in _registry.channels)
+
+
+def deliver_async(name: str, title: str, content: str, max_wait: float = NOTIFY_RATE_LIMIT_MAX_WAIT) -> Future:
+    """
+    通过当前注册表中的指定渠道推送一次，返回 Future：成功为 True，失败为 False；
+    渠道处于熔断冷却期（或另一个试探请求进行中）或排队时间超过 max_wait 时不推送，结果为 None，可在 next_available 之后重试。
+    """
+    future = Future()
+    channel = next((c for c in _registry.channels if c.name == name), None)
+    if channel is None:
+        print(f"{name} 渠道未启用，取消推送")
+        future.set_result(False)
+        return future
+    if _breaker(name).is_open():
+        future.set_result(None)
+        return future
+    submitted = _submit(channel, title, content, max_wait)
+    if submitted is None:
+        future.set_result(None)
+        return future
+    return submitted
+
+
+def next_available(name: str) -> float:
+    """
+    渠道下一次可以推送的时间戳（熔断冷却结束且有推送配额）。
+    """
+    retry_at = circuit_states().get(name, {}).get("retry_at") or time.time()
+    try:
+        return max(retry_at, _rate_limiter.available_at(name))
+    except Exception:
+        return retry_at
+
+
+# 移到 utils.notify_channels 中按需导入的名称，保留 notify.smtp、notify.dingding_bot 等旧的访问方式
+_LAZY_ATTRS = {
+    "dingding_bot": "utils.notify_channels.dingtalk",
+    "send_dingtalk_message": "utils.notify_channels.dingtalk",
+    "smtp": "utils.notify_channels.smtp",
+    "SMTPSession": "utils.notify_channels.smtp",
+    "SMTPPool": "utils.notify_channels.smtp",
+    "wecom_app": "utils.notify_channels.wecom",
+    "WeCom": "utils.notify_channels.wecom",
+    "WeComTokenCache": "utils.notify_channels.wecom",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        return getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_registry = ChannelRegistry(push_config)
+_load_plugins(NOTIFY_PLUGINS)
 
 
 def main():
@@ -0,0 +1 @@
+# 依赖较重或需要签名的推送渠道，由 utils.notify 的渠道注册表按需导入
@@ -0,0 +1,59 @@
+# 钉钉机器人渠道，请求需要 HMAC 签名，只在配置了 DD_BOT_TOKEN 和 DD_BOT_SECRET 时由 utils.notify 加载
+import base64
+import hashlib
+import hmac
+import time
+import urllib.parse
+from typing import Mapping
+
+from utils.notify import _config, _http, print
+
+
+def send_dingtalk_message(webhook, secret, msg_type, content):
+    timestamp = str(round(time.time() * 1000))
+    secret_enc = secret.encode('utf-8')
+    string_to_sign = '{}\n{}'.format(timestamp, secret)
+    string_to_sign_enc = string_to_sign.encode('utf-8')
+    hmac_code = hmac.new(secret_enc, string_to_sign_enc, digestmod=hashlib.sha256).digest()
+    sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
+
+    url = f"{webhook}&timestamp={timestamp}&sign={sign}"
+
+    headers = {'Content-Type': 'application/json'}
+    data = {
+        "msgtype": msg_type,
+        msg_type: content
+    }
+
+    response = _http("dingding_bot").post(url, json=data, headers=headers)
+    return response.json()
+
+
+def dingding_bot(title: str, content: str, config: Mapping = None) -> bool:
+    """
+    使用 钉钉机器人 推送消息。
+    """
+    config = _config(config)
+    webhook = f"https://oapi.dingtalk.com/robot/send?access_token={config.get('DD_BOT_TOKEN')}"
+    secret = config.get('DD_BOT_SECRET')
+
+    if not secret or not webhook:
+        print("钉钉机器人 服务的 DD_BOT_SECRET 或者 DD_BOT_TOKEN 未设置!!\n取消推送")
+        return False
+
+    print("钉钉机器人 服务启动")
+
+    msg_type = "markdown"
+    markdown_content = {
+        "title": title,
+        "text": f"## {title}\n\n{content}"
+    }
+
+    result = send_dingtalk_message(webhook, secret, msg_type, markdown_content)
+
+    if result.get("errcode") == 0:
+        print("钉钉机器人 推送成功！")
+        return True
+    else:
+        print(f"钉钉机器人 推送失败！错误信息：{result}")
+        return False
@@ -0,0 +1,172 @@
+# SMTP 邮件渠道，只在配置了 SMTP_* 时由 utils.notify 加载
+import os
+import smtplib
+import socket
+import threading
+import time
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import formataddr
+from typing import Mapping
+
+from config.constants import NOTIFY_SMTP_IDLE_TIMEOUT
+from utils.notify import _config, _timeout, print
+
+
+class SMTPSession:
+    """
+    一个 SMTP 服务器账号的长连接：登录后保持连接，下次发送时空闲已超过 idle_timeout 秒则先断开；
+    复用前用 NOOP 检查连接，连接断开时重新连接并重发一次，服务器拒收等其他错误直接抛出。同一连接上的发送依次进行。
+    """
+
+    def __init__(self, server: str, use_ssl: bool, email: str, password: str, timeout: float, idle_timeout: float):
+        self.server = server
+        self.use_ssl = use_ssl
+        self.email = email
+        self.password = password
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connects = 0
+        self._conn = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.use_ssl:
+            conn = smtplib.SMTP_SSL(self.server, timeout=self.timeout)
+        else:
+            conn = smtplib.SMTP(self.server, timeout=self.timeout)
+        try:
+            conn.login(self.email, self.password)
+        except Exception:
+            conn.close()
+            raise
+        self.connects += 1
+        return conn
+
+    def _discard(self) -> None:
+        # 连接已不可用时直接关闭 socket，不再发送 QUIT
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _alive(self) -> bool:
+        if self._conn is None:
+            return False
+        if time.time() - self._last_used > self.idle_timeout:
+            self._close()
+            return False
+        try:
+            if self._conn.noop()[0] == 250:
+                return True
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._discard()
+        return False
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+            self._discard()
+
+    def send(self, to_addrs, message: bytes) -> None:
+        """
+        发送一封邮件，失败时抛出 smtplib 的异常。
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self._alive():
+                    self._conn = self._connect()
+                try:
+                    self._conn.sendmail(self.email, to_addrs, message)
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout):
+                    # 服务器已关闭连接（NOOP 之后才断开等），重新连接后重发一次；
+                    # 拒收（SMTPRecipientsRefused、SMTPDataError 等）说明服务器处理过这封邮件，不能重发
+                    self._discard()
+                    if attempt:
+                        raise
+            self._last_used = time.time()
+
+
+class SMTPPool:
+    """
+    按服务器和账号复用 SMTPSession，fork 后的子进程中重新建立连接。
+    """
+
+    def __init__(self, idle_timeout: float = NOTIFY_SMTP_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def session(self, server: str, use_ssl: bool, email: str, password: str) -> SMTPSession:
+        with self._lock:
+            if self._pid != os.getpid():
+                # 父进程的连接不能在子进程中使用，也不能关闭（会影响父进程），直接丢弃
+                self._sessions = {}
+                self._pid = os.getpid()
+            key = (server, use_ssl, email, password)
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = SMTPSession(
+                    server, use_ssl, email, password, _timeout("smtp"), self.idle_timeout
+                )
+            return session
+
+
+_smtp_pool = SMTPPool()
+
+
+def smtp(title: str, content: str, config: Mapping = None) -> bool:
+    """
+    使用 SMTP 邮件 推送消息。
+    """
+    config = _config(config)
+    if (
+            not config.get("SMTP_SERVER")
+            or not config.get("SMTP_SSL")
+            or not config.get("SMTP_EMAIL")
+            or not config.get("SMTP_PASSWORD")
+            or not config.get("SMTP_NAME")
+    ):
+        print(
+            "SMTP 邮件 的 SMTP_SERVER 或者 SMTP_SSL 或者 SMTP_EMAIL 或者 SMTP_PASSWORD 或者 SMTP_NAME 未设置!!\n取消推送"
+        )
+        return False
+    print("SMTP 邮件 服务启动")
+
+    message = MIMEText(content, "plain", "utf-8")
+    message["From"] = formataddr(
+        (
+            Header(config.get("SMTP_NAME"), "utf-8").encode(),
+            config.get("SMTP_EMAIL"),
+        )
+    )
+    message["To"] = formataddr(
+        (
+            Header(config.get("SMTP_NAME"), "utf-8").encode(),
+            config.get("SMTP_EMAIL"),
+        )
+    )
+    message["Subject"] = Header(title, "utf-8")
+
+    try:
+        session = _smtp_pool.session(
+            config.get("SMTP_SERVER"),
+            config.get("SMTP_SSL") == "true",
+            config.get("SMTP_EMAIL"),
+            config.get("SMTP_PASSWORD"),
+        )
+        session.send(config.get("SMTP_EMAIL"), message.as_bytes())
+        print("SMTP 邮件 推送成功！")
+        return True
+    except Exception as e:
+        print(f"SMTP 邮件 推送失败！{e}")
+        return False
@@ -0,0 +1,258 @@
+# 企业微信应用渠道，只在配置了 QYWX_AM 时由 utils.notify 加载
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Mapping
+
+from config.constants import NOTIFY_STATE_PATH, WECOM_TOKEN_REFRESH_MARGIN
+from utils.notify import _config, _http, print
+from utils.sqlite_utils import get_connection
+
+
+def wecom_app(title: str, content: str, config: Mapping = None) -> bool:
+    """
+    通过 企业微信 APP 推送消息。
+    """
+    config = _config(config)
+    if not config.get("QYWX_AM"):
+        print("QYWX_AM 未设置!!\n取消推送")
+        return False
+    QYWX_AM_AY = re.split(",", config.get("QYWX_AM"))
+    if 4 < len(QYWX_AM_AY) > 5:
+        print("QYWX_AM 设置错误!!\n取消推送")
+        return False
+    print("企业微信 APP 服务启动")
+
+    corpid = QYWX_AM_AY[0]
+    corpsecret = QYWX_AM_AY[1]
+    touser = QYWX_AM_AY[2]
+    agentid = QYWX_AM_AY[3]
+    try:
+        media_id = QYWX_AM_AY[4]
+    except IndexError:
+        media_id = ""
+    wx = WeCom(corpid, corpsecret, agentid, config.get("QYWX_ORIGIN"))
+    # 如果没有配置 media_id 默认就以 text 方式发送
+    if not media_id:
+        message = title + "\n\n" + content
+        response = wx.send_text(message, touser)
+    else:
+        response = wx.send_mpnews(title, content, media_id, touser)
+
+    if response == "ok":
+        print("企业微信推送成功！")
+        return True
+    else:
+        print("企业微信推送失败！错误信息如下：\n", response)
+        return False
+
+
+class WeComTokenCache:
+    """
+    企业微信 access_token 缓存，按 corpid/secret 区分，进程内缓存加 SQLite 共享给所有 worker；
+    距离过期不足 WECOM_TOKEN_REFRESH_MARGIN 秒时提前刷新。
+
+    刷新通过 SQLite 中的刷新租约做到跨进程只有一个调用方请求 gettoken：
+    其他调用方在旧 token 仍未过期时直接使用旧 token，否则等待持有租约的进程写入新 token。
+    """
+
+    # 刷新租约时长（秒），持有者崩溃或请求超时后其他进程可以接管刷新
+    REFRESH_LEASE = 15
+    # 等待其他进程刷新时检查共享缓存的间隔（秒）
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, path: str = NOTIFY_STATE_PATH, margin: float = WECOM_TOKEN_REFRESH_MARGIN):
+        self.path = path
+        self.margin = margin
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = get_connection(self.path)
+        if not self._ready:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wecom_tokens ("
+                "key TEXT PRIMARY KEY, access_token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wecom_token_refresh ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, lease_until REAL NOT NULL)"
+            )
+            self._ready = True
+        return conn
+
+    @staticmethod
+    def key(origin: str, corpid: str, corpsecret: str) -> str:
+        return hashlib.sha256(f"{origin}|{corpid}|{corpsecret}".encode("utf-8")).hexdigest()
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and entry[1] - self.margin > time.time()
+
+    @staticmethod
+    def _valid(entry, stale: str = None) -> bool:
+        # 尚未过期（可能已进入提前刷新的时间段）且不是调用方确认已失效的 token
+        return entry is not None and entry[0] != stale and entry[1] > time.time()
+
+    def get(self, key: str, fetch, stale: str = None) -> str:
+        """
+        获取 access_token，缓存中没有可用的 token 时调用 fetch 获取。
+
+        fetch 返回 (access_token, expires_in)；stale 为调用方确认已失效的 token，缓存中是它时强制刷新。
+        """
+        with self._lock:
+            entry = self._tokens.get(key)
+            if self._fresh(entry) and entry[0] != stale:
+                return entry[0]
+
+            owner = f"{os.getpid()}-{threading.get_ident()}"
+            while True:
+                try:
+                    entry, claimed = self._claim(key, owner, stale)
+                except Exception as e:
+                    print(f"读取企业微信 token 缓存失败: {e}")
+                    return self._fetch(key, fetch)
+                if claimed:
+                    return self._fetch(key, fetch, owner)
+                if self._valid(entry, stale):
+                    # 共享缓存中的 token 仍可用，或其他进程正在刷新而旧 token 尚未过期
+                    self._tokens[key] = entry
+                    return entry[0]
+                time.sleep(self.POLL_INTERVAL)
+
+    def _claim(self, key: str, owner: str, stale: str = None):
+        """
+        读取共享缓存，需要刷新且没有其他进程在刷新时获取刷新租约，返回 (缓存的 token, 是否获得租约)。
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT access_token, expires_at FROM wecom_tokens WHERE key = ?", (key,)
+            ).fetchone()
+            entry = (row["access_token"], row["expires_at"]) if row is not None else None
+            if self._fresh(entry) and entry[0] != stale:
+                conn.execute("COMMIT")
+                return entry, False
+            lease = conn.execute(
+                "SELECT owner, lease_until FROM wecom_token_refresh WHERE key = ?", (key,)
+            ).fetchone()
+            if lease is not None and lease["owner"] != owner and lease["lease_until"] > now:
+                conn.execute("COMMIT")
+                return entry, False
+            conn.execute(
+                "INSERT OR REPLACE INTO wecom_token_refresh (key, owner, lease_until) VALUES (?, ?, ?)",
+                (key, owner, now + self.REFRESH_LEASE),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return entry, True
+
+    def _fetch(self, key: str, fetch, owner: str = None) -> str:
+        """
+        调用 fetch 获取新 token 并写入缓存，持有刷新租约时一并释放。
+        """
+        try:
+            access_token, expires_in = fetch()
+        except Exception:
+            if owner:
+                self._release(key, owner)
+            raise
+        entry = (access_token, time.time() + expires_in)
+        self._tokens[key] = entry
+        conn = None
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO wecom_tokens (key, access_token, expires_at) VALUES (?, ?, ?)",
+                (key, entry[0], entry[1]),
+            )
+            conn.execute("DELETE FROM wecom_token_refresh WHERE key = ? AND owner = ?", (key, owner))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"写入企业微信 token 缓存失败: {e}")
+        return access_token
+
+    def _release(self, key: str, owner: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM wecom_token_refresh WHERE key = ? AND owner = ?", (key, owner))
+        except Exception as e:
+            print(f"释放企业微信 token 刷新租约失败: {e}")
+
+
+_wecom_tokens = WeComTokenCache()
+
+
+class WeCom:
+    # access_token 无效或已过期的错误码，遇到时强制刷新 token 并重试一次
+    TOKEN_ERRCODES = (40014, 42001)
+
+    def __init__(self, corpid, corpsecret, agentid, origin=None):
+        self.CORPID = corpid
+        self.CORPSECRET = corpsecret
+        self.AGENTID = agentid
+        self.ORIGIN = origin or "https://qyapi.weixin.qq.com"
+        self._token_key = WeComTokenCache.key(self.ORIGIN, self.CORPID, self.CORPSECRET)
+
+    def _fetch_access_token(self):
+        url = f"{self.ORIGIN}/cgi-bin/gettoken"
+        values = {
+            "corpid": self.CORPID,
+            "corpsecret": self.CORPSECRET,
+        }
+        req = _http("wecom_app").post(url, params=values)
+        data = json.loads(req.text)
+        return data["access_token"], data.get("expires_in", 7200)
+
+    def get_access_token(self, stale: str = None):
+        return _wecom_tokens.get(self._token_key, self._fetch_access_token, stale)
+
+    def _send(self, send_values):
+        send_msges = bytes(json.dumps(send_values), "utf-8")
+        access_token = self.get_access_token()
+        for attempt in range(2):
+            send_url = f"{self.ORIGIN}/cgi-bin/message/send?access_token={access_token}"
+            respone = _http("wecom_app").post(send_url, send_msges).json()
+            if respone.get("errcode") not in self.TOKEN_ERRCODES or attempt:
+                return respone["errmsg"]
+            print("企业微信 access_token 已失效，刷新后重试")
+            access_token = self.get_access_token(stale=access_token)
+
+    def send_text(self, message, touser="@all"):
+        send_values = {
+            "touser": touser,
+            "msgtype": "text",
+            "agentid": self.AGENTID,
+            "text": {"content": message},
+            "safe": "0",
+        }
+        return self._send(send_values)
+
+    def send_mpnews(self, title, message, media_id, touser="@all"):
+        send_values = {
+            "touser": touser,
+            "msgtype": "mpnews",
+            "agentid": self.AGENTID,
+            "mpnews": {
+                "articles": [
+                    {
+                        "title": title,
+                        "thumb_media_id": media_id,
+                        "author": "Author",
+                        "content_source_url": "",
+                        "content": message.replace("\n", "<br/>"),
+                        "digest": message,
+                    }
+                ]
+            },
+        }
+        return self._send(send_values)
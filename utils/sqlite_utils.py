@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import threading
+
+# 每个线程、每个进程各自持有连接，避免跨线程/跨 fork 共享同一个 sqlite3 连接
+_local = threading.local()
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    创建一个新的 SQLite 连接
+
+    连接使用 WAL 日志模式和自动提交（isolation_level=None），
+    需要原子性的操作请显式使用 BEGIN IMMEDIATE。
+
+    Args:
+        path: 数据库文件路径，所在目录不存在时自动创建
+
+    Returns:
+        sqlite3.Connection: 新建的连接
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    return conn
+
+
+def get_connection(path: str) -> sqlite3.Connection:
+    """
+    获取当前线程复用的 SQLite 连接
+
+    连接按 (进程ID, 路径) 缓存在线程本地存储中，fork 后的子进程会自动重新建立连接。
+
+    Args:
+        path: 数据库文件路径
+
+    Returns:
+        sqlite3.Connection: 当前线程可复用的连接
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    key = (os.getpid(), path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = connect(path)
+    return conn
@@ -0,0 +1,70 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.metrics import WORKER_STARTUP
+
+# 各启动阶段的时间戳，按进程记录：fork（gunicorn post_fork）、create_app、app_ready、first_request
+_marks: Dict[str, float] = {}
+_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def mark(name: str) -> bool:
+    """
+    记录一个启动阶段的时间点，同一进程中每个阶段只记录第一次
+
+    Args:
+        name: 阶段名称
+
+    Returns:
+        bool: 是否是第一次记录
+    """
+    global _pid
+    with _lock:
+        if _pid != os.getpid():
+            # fork 前父进程中的记录不属于当前进程
+            _marks.clear()
+            _pid = os.getpid()
+        if name in _marks:
+            return False
+        _marks[name] = time.time()
+        return True
+
+
+def report() -> Dict[str, float]:
+    """
+    计算各启动阶段的耗时（秒）
+
+    Returns:
+        Dict[str, float]: imports 为 fork 到开始创建应用（主要是模块导入），create_app 为创建应用的耗时，
+        first_request 为 fork 到收到第一个请求；不在 gunicorn 下运行时以开始创建应用为起点
+    """
+    with _lock:
+        marks = dict(_marks) if _pid == os.getpid() else {}
+    start = marks.get('fork') or marks.get('create_app')
+    result = {}
+    if start is None:
+        return result
+    if 'fork' in marks and 'create_app' in marks:
+        result['imports'] = marks['create_app'] - marks['fork']
+    if 'create_app' in marks and 'app_ready' in marks:
+        result['create_app'] = marks['app_ready'] - marks['create_app']
+    if 'first_request' in marks:
+        result['first_request'] = marks['first_request'] - start
+    return result
+
+
+def first_request() -> None:
+    """Flask before_request 钩子：记录第一个请求的时间并输出启动耗时"""
+    if ('first_request' in _marks and _pid == os.getpid()) or not mark('first_request'):
+        return
+    phases = report()
+    for phase, seconds in phases.items():
+        WORKER_STARTUP.labels(phase=phase).set(seconds)
+    logging.getLogger('docker-hooks').info(
+        f"worker 启动耗时: pid={os.getpid()}, "
+        + ", ".join(f"{phase}={seconds * 1000:.0f}ms" for phase, seconds in phases.items())
+    )
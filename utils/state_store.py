@@ -0,0 +1,333 @@
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any
+
+from config.constants import (
+    STATE_BACKEND,
+    STATE_DB_PATH,
+    STATE_REDIS_URL,
+    STATE_REDIS_PREFIX
+)
+from utils.sqlite_utils import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend(ABC):
+    """
+    部署状态存储后端接口
+
+    每个项目一条记录，包含锁持有者、锁过期时间、最后部署时间、当前部署ID和部署状态；
+    每次修改都会递增 version，compare_and_set 基于 version 实现原子更新。
+
+    部署锁是带租约的锁：每次成功获取都会得到一个单调递增的 fencing token，
+    带 fence 参数的写入只有在该 token 仍是最新时才会生效，租约过期后被他人接管的旧持有者无法再写入。
+    """
+
+    # 允许通过 compare_and_set / update 修改的字段
+    FIELDS = ('lock_owner', 'lock_expires', 'last_deploy_at', 'deploy_id', 'deploy_status')
+
+    @abstractmethod
+    def get_state(self, project: str) -> Dict[str, Any]:
+        """
+        获取项目的部署状态
+
+        Returns:
+            Dict[str, Any]: 包含 FIELDS 中各字段、fence 和 version 的字典，
+                项目没有记录时各字段为 None、fence 和 version 为 0
+        """
+
+    @abstractmethod
+    def compare_and_set(self, project: str, expected_version: int, **fields) -> bool:
+        """
+        当项目记录的 version 等于 expected_version 时原子地更新字段
+
+        Returns:
+            bool: 是否更新成功
+        """
+
+    @abstractmethod
+    def acquire_lock(self, project: str, owner: str, ttl: float) -> Optional[int]:
+        """
+        获取项目的部署锁，锁未被持有或已过期时成功
+
+        Args:
+            project: 项目名称
+            owner: 持有者标识
+            ttl: 锁租约时长（秒）
+
+        Returns:
+            Optional[int]: 成功时返回 fencing token；锁已被占用时返回 None
+        """
+
+    @abstractmethod
+    def release_lock(self, project: str, owner: str) -> None:
+        """释放部署锁，只有当前持有者可以释放"""
+
+    @abstractmethod
+    def update(self, project: str, fence: Optional[int] = None, **fields) -> bool:
+        """
+        更新项目记录的字段
+
+        Args:
+            project: 项目名称
+            fence: 可选，fencing token；指定时只有该 token 仍是最新时才会写入
+            **fields: 要更新的字段
+
+        Returns:
+            bool: 是否写入成功
+        """
+
+    @staticmethod
+    def _check_fields(fields: Dict[str, Any]) -> None:
+        unknown = set(fields) - set(StateBackend.FIELDS)
+        if unknown:
+            raise ValueError(f"未知的状态字段: {', '.join(sorted(unknown))}")
+
+
+class SQLiteStateBackend(StateBackend):
+    """基于 SQLite WAL 的部署状态存储，同一主机（或共享同一文件）上的所有 worker 进程共享"""
+
+    def __init__(self, path: str):
+        """
+        初始化状态存储
+
+        Args:
+            path: SQLite 文件路径
+        """
+        self.path = path
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS deploy_state (
+                project TEXT PRIMARY KEY,
+                lock_owner TEXT,
+                lock_expires REAL,
+                last_deploy_at REAL,
+                deploy_id TEXT,
+                deploy_status TEXT,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = {row['name'] for row in self._conn().execute('PRAGMA table_info(deploy_state)')}
+        if 'fence' not in columns:
+            try:
+                self._conn().execute('ALTER TABLE deploy_state ADD COLUMN fence INTEGER NOT NULL DEFAULT 0')
+            except sqlite3.OperationalError:
+                pass  # 其他 worker 已经添加
+
+    def _conn(self):
+        return get_connection(self.path)
+
+    def _ensure_row(self, project: str) -> None:
+        self._conn().execute('INSERT OR IGNORE INTO deploy_state (project) VALUES (?)', (project,))
+
+    def get_state(self, project: str) -> Dict[str, Any]:
+        row = self._conn().execute('SELECT * FROM deploy_state WHERE project = ?', (project,)).fetchone()
+        if row is None:
+            state = {field: None for field in self.FIELDS}
+            state.update(fence=0, version=0)
+            return state
+        return {key: row[key] for key in self.FIELDS + ('fence', 'version')}
+
+    def compare_and_set(self, project: str, expected_version: int, **fields) -> bool:
+        self._check_fields(fields)
+        self._ensure_row(project)
+        assignments = ''.join(f'{field} = ?, ' for field in fields)
+        cursor = self._conn().execute(
+            f'UPDATE deploy_state SET {assignments}version = version + 1 WHERE project = ? AND version = ?',
+            (*fields.values(), project, expected_version)
+        )
+        return cursor.rowcount == 1
+
+    def acquire_lock(self, project: str, owner: str, ttl: float) -> Optional[int]:
+        self._ensure_row(project)
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE deploy_state
+                SET lock_owner = ?, lock_expires = ?, fence = fence + 1, version = version + 1
+                WHERE project = ? AND (lock_owner IS NULL OR lock_expires < ?)
+                """,
+                (owner, now + ttl, project, now)
+            )
+            fence = None
+            if cursor.rowcount == 1:
+                fence = conn.execute('SELECT fence FROM deploy_state WHERE project = ?', (project,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return fence
+
+    def release_lock(self, project: str, owner: str) -> None:
+        self._conn().execute(
+            'UPDATE deploy_state SET lock_owner = NULL, lock_expires = NULL, version = version + 1 '
+            'WHERE project = ? AND lock_owner = ?',
+            (project, owner)
+        )
+
+    def update(self, project: str, fence: Optional[int] = None, **fields) -> bool:
+        self._check_fields(fields)
+        self._ensure_row(project)
+        assignments = ''.join(f'{field} = ?, ' for field in fields)
+        sql = f'UPDATE deploy_state SET {assignments}version = version + 1 WHERE project = ?'
+        params = (*fields.values(), project)
+        if fence is not None:
+            sql += ' AND fence = ?'
+            params += (fence,)
+        return self._conn().execute(sql, params).rowcount == 1
+
+
+class RedisStateBackend(StateBackend):
+    """
+    基于 Redis 协议服务器的部署状态存储，用于多个节点部署在负载均衡之后的场景
+
+    - 锁：{prefix}:lock:{project}，SET NX PX 实现租约
+    - 状态：{prefix}:state:{project} 哈希，包含 FIELDS、fence 和 version
+    所有读改写操作都通过 Lua 脚本在服务端原子执行。
+    """
+
+    _ACQUIRE = """
+    if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+        local fence = redis.call('HINCRBY', KEYS[2], 'fence', 1)
+        redis.call('HSET', KEYS[2], 'lock_owner', ARGV[1], 'lock_expires', ARGV[3])
+        redis.call('HINCRBY', KEYS[2], 'version', 1)
+        return fence
+    end
+    return false
+    """
+
+    _RELEASE = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+    end
+    if redis.call('HGET', KEYS[2], 'lock_owner') == ARGV[1] then
+        redis.call('HDEL', KEYS[2], 'lock_owner', 'lock_expires')
+        redis.call('HINCRBY', KEYS[2], 'version', 1)
+    end
+    return 1
+    """
+
+    # ARGV[1]: 条件类型（none/fence/version），ARGV[2]: 条件值，之后为 字段, 值 对；值为空字符串表示删除
+    _UPDATE = """
+    if ARGV[1] == 'fence' and tonumber(redis.call('HGET', KEYS[1], 'fence') or '0') ~= tonumber(ARGV[2]) then
+        return 0
+    end
+    if ARGV[1] == 'version' and tonumber(redis.call('HGET', KEYS[1], 'version') or '0') ~= tonumber(ARGV[2]) then
+        return 0
+    end
+    for i = 3, #ARGV, 2 do
+        if ARGV[i + 1] == '' then
+            redis.call('HDEL', KEYS[1], ARGV[i])
+        else
+            redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        end
+    end
+    redis.call('HINCRBY', KEYS[1], 'version', 1)
+    return 1
+    """
+
+    # 数值类型的字段，读取时转换
+    _FLOAT_FIELDS = ('lock_expires', 'last_deploy_at')
+
+    def __init__(self, url: str, prefix: str = STATE_REDIS_PREFIX, client=None):
+        """
+        初始化状态存储
+
+        Args:
+            url: Redis 连接地址，如 redis://localhost:6379/0
+            prefix: 键前缀
+            client: 可选，已创建的 Redis 客户端
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ValueError("使用 redis 状态存储后端需要安装 redis 包: pip install redis")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self._acquire = client.register_script(self._ACQUIRE)
+        self._release = client.register_script(self._RELEASE)
+        self._update = client.register_script(self._UPDATE)
+
+    def _lock_key(self, project: str) -> str:
+        return f"{self.prefix}:lock:{project}"
+
+    def _state_key(self, project: str) -> str:
+        return f"{self.prefix}:state:{project}"
+
+    @staticmethod
+    def _encode(fields: Dict[str, Any]) -> list:
+        args = []
+        for field, value in fields.items():
+            args.extend([field, '' if value is None else str(value)])
+        return args
+
+    def get_state(self, project: str) -> Dict[str, Any]:
+        raw = self.client.hgetall(self._state_key(project))
+        state = {}
+        for field in self.FIELDS:
+            value = raw.get(field)
+            if value is not None and field in self._FLOAT_FIELDS:
+                value = float(value)
+            state[field] = value
+        state['fence'] = int(raw.get('fence', 0))
+        state['version'] = int(raw.get('version', 0))
+        return state
+
+    def compare_and_set(self, project: str, expected_version: int, **fields) -> bool:
+        self._check_fields(fields)
+        result = self._update(
+            keys=[self._state_key(project)],
+            args=['version', expected_version, *self._encode(fields)]
+        )
+        return result == 1
+
+    def acquire_lock(self, project: str, owner: str, ttl: float) -> Optional[int]:
+        fence = self._acquire(
+            keys=[self._lock_key(project), self._state_key(project)],
+            args=[owner, int(ttl * 1000), time.time() + ttl]
+        )
+        return int(fence) if fence else None
+
+    def release_lock(self, project: str, owner: str) -> None:
+        self._release(keys=[self._lock_key(project), self._state_key(project)], args=[owner])
+
+    def update(self, project: str, fence: Optional[int] = None, **fields) -> bool:
+        self._check_fields(fields)
+        condition = ['fence', fence] if fence is not None else ['none', '']
+        result = self._update(keys=[self._state_key(project)], args=[*condition, *self._encode(fields)])
+        return result == 1
+
+
+_backend: Optional[StateBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_state_backend() -> StateBackend:
+    """
+    获取进程内共享的状态存储后端，由 STATE_BACKEND 环境变量选择
+
+    Returns:
+        StateBackend: 状态存储后端实例
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if STATE_BACKEND == 'sqlite':
+                    _backend = SQLiteStateBackend(STATE_DB_PATH)
+                elif STATE_BACKEND == 'redis':
+                    _backend = RedisStateBackend(STATE_REDIS_URL)
+                else:
+                    raise ValueError(f"不支持的状态存储后端: {STATE_BACKEND}")
+                logger.info(f"部署状态存储后端: {STATE_BACKEND}")
+    return _backend